@@ -0,0 +1,96 @@
+"""接口调用吞吐量的基准测试
+
+在独立进程中启动一个直接返回空对象的桩服务，比较预先计算请求头并使用连接池会话的 `ApiProtocol.call_api`
+与旧实现 (每次调用重新构造请求头与接口地址、使用默认会话) 的每秒请求数。
+
+    python experimental/bench_api.py
+"""
+
+import asyncio
+import multiprocessing
+import time
+
+from aiohttp import BytesPayload, web
+
+from satori import Login, LoginStatus, User
+from satori.client import Account, ApiInfo, ApiProtocol, SessionPool
+from satori.client.network.util import validate_response
+from satori.utils import encode_bytes
+
+PORT = 18950
+REQUESTS = 5000
+CONCURRENCY = 50
+
+
+class LegacyProtocol(ApiProtocol):
+    async def call_api(self, action, params=None, multipart=False, method="POST"):
+        endpoint = f"{self.account.config.api_base!s}/{action}"
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.account.config.token or ''}",
+            "X-Platform": self.account.platform,
+            "X-Self-ID": self.account.self_id,
+            "Satori-Platform": self.account.platform,
+            "Satori-User-ID": self.account.self_id,
+        }
+        async with self.session.request(
+            method,
+            endpoint,
+            data=BytesPayload(encode_bytes(params or {}), content_type="application/json", encoding="utf-8"),
+            headers=headers,
+            timeout=self.timeout,
+        ) as resp:
+            return await validate_response(resp)
+
+
+async def handle(request: web.Request):
+    await request.read()
+    return web.json_response({})
+
+
+async def bench(account: Account) -> float:
+    queue = iter(range(REQUESTS))
+
+    async def worker():
+        for _ in queue:
+            await account.protocol.call_api("channel.get", {"channel_id": "1"})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    return REQUESTS / (time.perf_counter() - start)
+
+
+def serve():
+    app = web.Application()
+    app.router.add_post("/v1/{action}", handle)
+    web.run_app(app, host="127.0.0.1", port=PORT, access_log=None, print=None)
+
+
+async def main():
+
+    login = Login(sn=0, status=LoginStatus.ONLINE, adapter="bench", platform="bench", user=User("1"))
+    config = ApiInfo(host="127.0.0.1", port=PORT, token="bench")
+    pool = SessionPool()
+    legacy = Account(login, config, [], LegacyProtocol)
+    pooled = Account(login, config, [], ApiProtocol, pool)
+    # 预热，建立连接
+    await bench(legacy)
+    await bench(pooled)
+    old = await bench(legacy)
+    new = await bench(pooled)
+    print(f"{'legacy (req/s)':>15} {'pooled (req/s)':>15} {'speedup':>8}")
+    print(f"{old:>15.0f} {new:>15.0f} {new / old:>7.2f}x")
+
+    await legacy.protocol.session.close()
+    await pool.close()
+
+
+if __name__ == "__main__":
+    # 桩服务运行在独立进程中，避免与客户端争用事件循环
+    server = multiprocessing.Process(target=serve, daemon=True)
+    server.start()
+    time.sleep(1)
+    try:
+        asyncio.run(main())
+    finally:
+        server.terminate()
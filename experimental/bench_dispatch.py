@@ -0,0 +1,66 @@
+"""事件分发开销的基准测试
+
+比较按事件类型索引处理函数 (`App.register_on`) 与旧的“每个处理函数包装一层类型判断”方式，
+在不同处理函数数量下每个事件的平均分发耗时。
+
+    python experimental/bench_dispatch.py
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from satori import Channel, ChannelType, Event, Login, LoginStatus, User
+from satori.client import Account, App, WebsocketsInfo
+from satori.const import EventType
+
+EVENTS = 2000
+HANDLER_COUNTS = (1, 10, 50, 200, 1000)
+TYPES = [t.value for t in EventType]
+
+
+async def noop(account, event):
+    pass
+
+
+def legacy(app: App, event_type: str):
+    async def wrapper(account, event):
+        if event.type == event_type:
+            return await noop(account, event)
+
+    app.register(wrapper)
+
+
+async def bench(count: int, indexed: bool) -> float:
+    app = App(main_app=False)
+    conn = SimpleNamespace(accounts={})
+    login = Login(sn=0, status=LoginStatus.ONLINE, adapter="bench", platform="bench", user=User("1"))
+    account = Account(login, WebsocketsInfo(), [])
+    app.accounts[f"bench_1@{id(conn):x}"] = account
+    for i in range(count):
+        # 每种事件类型均匀分配处理函数，其中只有一部分会匹配 message-created
+        event_type = TYPES[i % len(TYPES)]
+        if indexed:
+            app.register_on(event_type)(noop)
+        else:
+            legacy(app, event_type)
+    event = Event(EventType.MESSAGE_CREATED, datetime.now(), login, channel=Channel("c", ChannelType.TEXT))
+    start = time.perf_counter()
+    for _ in range(EVENTS):
+        await app.post(event, conn)  # type: ignore
+    elapsed = time.perf_counter() - start
+    await account.protocol.session.close()
+    return elapsed / EVENTS * 1e6
+
+
+async def main():
+    print(f"{'handlers':>8} {'legacy (us)':>12} {'indexed (us)':>13} {'speedup':>8}")
+    for count in HANDLER_COUNTS:
+        old = await bench(count, False)
+        new = await bench(count, True)
+        print(f"{count:>8} {old:>12.2f} {new:>13.2f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
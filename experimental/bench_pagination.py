@@ -0,0 +1,44 @@
+"""分页遍历的基准测试
+
+模拟每页 100 个元素、每次请求 20ms 延迟、每个元素处理 0.1ms 的分页接口 (约 1 万个群成员)，
+比较不同预取页数下遍历全部元素的耗时。
+
+    python experimental/bench_pagination.py
+"""
+
+import asyncio
+import time
+
+from satori.model import IterablePageResult, PageResult
+
+PAGES = 100
+PAGE_SIZE = 100
+LATENCY = 0.02
+WORK = 0.0001
+
+
+async def fetch(token: str | None) -> PageResult[int]:
+    page = int(token or 0)
+    await asyncio.sleep(LATENCY)
+    return PageResult(list(range(PAGE_SIZE)), str(page + 1) if page + 1 < PAGES else None)
+
+
+async def bench(prefetch: int) -> float:
+    start = time.perf_counter()
+    async for _ in IterablePageResult(fetch, prefetch=prefetch):
+        # 模拟处理开销，每个元素占用一小段事件循环时间
+        end = time.perf_counter() + WORK
+        while time.perf_counter() < end:
+            pass
+        await asyncio.sleep(0)
+    return time.perf_counter() - start
+
+
+async def main():
+    print(f"{'prefetch':>8} {'elapsed (s)':>12}")
+    for prefetch in (0, 1, 2, 4):
+        print(f"{prefetch:>8} {await bench(prefetch):>12.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
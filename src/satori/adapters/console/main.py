@@ -9,7 +9,7 @@ from nonechat import ConsoleSetting, Frontend
 from starlette.responses import JSONResponse, Response
 
 from satori.server import Adapter as BaseAdapter
-from satori.server import Request
+from satori.server import Request, stream_response
 from satori.server.adapter import LoginType
 
 from .api import apply
@@ -71,8 +71,7 @@ class ConsoleAdapter(BaseAdapter):
                 return JSONResponse({})
             else:
                 return Response(f"Unknown API: {api}", status_code=404)
-        async with self.server.session.get(path) as resp:
-            return Response(await resp.read())
+        return await stream_response(self.server.session, path)
 
     async def get_logins(self) -> list[LoginType]:
         return list(self.app.backend.logins.values())
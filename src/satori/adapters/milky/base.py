@@ -14,6 +14,7 @@ from satori.exception import ActionFailed
 from satori.model import Event, Login, LoginStatus
 from satori.server.adapter import Adapter as BaseAdapter
 from satori.server.model import Request
+from satori.server.response import stream_response
 from satori.utils import decode, encode
 
 from .api import apply
@@ -79,9 +80,7 @@ class MilkyBaseAdapter(BaseAdapter, ABC):
         headers = self.headers.copy()
         if self.token:
             headers.setdefault("Authorization", f"Bearer {self.token}")
-        async with self.session.get(url, headers=headers) as resp:
-            content = await resp.read()
-            return Response(content=content, media_type=resp.headers.get("Content-Type"))
+        return await stream_response(self.session, url, headers=headers)
 
     async def call_api(self, action: str, params: dict | None = None) -> dict:
         if not self.session:
@@ -16,7 +16,7 @@ from yarl import URL
 from satori import Event, EventType, LoginStatus
 from satori.exception import ActionFailed
 from satori.model import Login, User
-from satori.server import Request
+from satori.server import Request, stream_response
 from satori.server.adapter import Adapter as BaseAdapter
 from satori.utils import decode, encode
 
@@ -223,8 +223,7 @@ class OneBot11ForwardAdapter(BaseAdapter):
     async def handle_internal(self, request: Request, path: str) -> Response:
         if path.startswith("_api"):
             return JSONResponse(await self.call_api(path[5:], await request.origin.json()))
-        async with self.session.get(path) as resp:
-            return Response(await resp.read())
+        return await stream_response(self.session, path)
 
     async def call_api(self, action: str, params: dict | None = None) -> dict:
         if not self.connection:
@@ -14,7 +14,7 @@ from yarl import URL
 from satori import Event, EventType, LoginStatus
 from satori.exception import ActionFailed
 from satori.model import Login, User
-from satori.server import Request
+from satori.server import Request, stream_response
 from satori.server.adapter import Adapter as BaseAdapter
 from satori.utils import decode, encode
 
@@ -192,8 +192,10 @@ class OneBot11ReverseAdapter(BaseAdapter):
             if connection.response_waiters:
                 for future in connection.response_waiters.values():
                     future.cancel()
-            self.logins[account_id].status = LoginStatus.OFFLINE
-            await self.server.post(Event(EventType.LOGIN_REMOVED, datetime.now(), self.logins[account_id]))
+            # 移除登录信息，以便重连时重新发布 login-added
+            if login := self.logins.pop(account_id, None):
+                login.status = LoginStatus.OFFLINE
+                await self.server.post(Event(EventType.LOGIN_REMOVED, datetime.now(), login))
             await asyncio.sleep(1)
 
     async def launch(self, manager: Launart):
@@ -218,8 +220,7 @@ class OneBot11ReverseAdapter(BaseAdapter):
         if path.startswith("_api"):
             self_id = request.self_id
             return JSONResponse(await self.connections[self_id].call_api(path[5:], await request.origin.json()))
-        async with self.server.session.get(path) as resp:
-            return Response(await resp.read())
+        return await stream_response(self.server.session, path)
 
     def __str__(self):
         return self.id
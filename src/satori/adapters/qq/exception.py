@@ -2,6 +2,7 @@ import json
 from collections.abc import Mapping
 
 from satori.exception import ActionFailed as BaseActionFailed
+from satori.exception import RateLimitException as BaseRateLimitException
 from satori.exception import UnauthorizedException as BaseUnauthorizedException
 
 from .audit_store import audit_result
@@ -48,8 +49,13 @@ class UnauthorizedException(ActionFailed, BaseUnauthorizedException):
     pass
 
 
-class RateLimitException(ActionFailed):
-    pass
+class RateLimitException(ActionFailed, BaseRateLimitException):
+    @property
+    def retry_after(self) -> float | None:  # type: ignore
+        try:
+            return float(self.headers["Retry-After"])
+        except (KeyError, ValueError):
+            return None
 
 
 class ApiNotAvailable(ActionFailed):
@@ -15,6 +15,7 @@ from satori.element import Custom, E, Element, Quote, Raw
 from satori.model import Login, MessageObject
 from satori.parser import Element as RawElement
 from satori.parser import parse, select
+from satori.server.utils import map_file
 
 from ...exception import ActionFailed
 from .ark import parse_qq_ark
@@ -405,8 +406,10 @@ class QQGroupMessageEncoder(QQBotMessageEncoder):
         elif is_uri:
             path = parse_file_uri(url)
             filename = filename or path.name
-            raw_data = path.read_bytes()
-            file_data = base64.b64encode(raw_data).decode("utf-8")
+            # 大文件走分片上传，无需整体读入内存与编码
+            raw_data = map_file(path)
+            if len(raw_data) <= MAX_FILESIZE_ONCE:
+                file_data = base64.b64encode(raw_data).decode("utf-8")
         if not file_data:
             req["url"] = url
         else:
@@ -429,7 +432,7 @@ class QQGroupMessageEncoder(QQBotMessageEncoder):
             logger.error(f"Failed to upload file to {self.channel_id}: {url}\nError: {e}")
             return None
 
-    async def _send_file_chunked(self, raw: bytes, file_type: int, filename: str | None = None):
+    async def _send_file_chunked(self, raw: bytes | memoryview, file_type: int, filename: str | None = None):
         req: dict = {
             "file_type": file_type,
             "file_name": filename or "file",
@@ -461,7 +464,6 @@ class QQGroupMessageEncoder(QQBotMessageEncoder):
 
         upload_id = prepare_resp["upload_id"]
         base_block_size = int(prepare_resp["block_size"])
-        chunks = bytearray(raw)
         parts = prepare_resp["parts"]
         concurrency = prepare_resp["upload_config"]["concurrency"]
         sent = 0
@@ -473,7 +475,7 @@ class QQGroupMessageEncoder(QQBotMessageEncoder):
             for part in batch:
                 index = part["index"]
                 block_size = int(part.get("block_size") or base_block_size)
-                chunk = chunks[sent : sent + block_size]
+                chunk = buffer[sent : sent + block_size]
                 sent += block_size
                 tasks.append(_put(part["presigned_url"], chunk))
                 req = {
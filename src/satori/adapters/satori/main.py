@@ -1,3 +1,5 @@
+from dataclasses import replace
+from datetime import datetime
 from typing import cast
 
 from launart import Launart, any_completed
@@ -5,11 +7,11 @@ from launart.status import Phase
 from starlette.datastructures import FormData
 from starlette.responses import JSONResponse, Response
 
-from satori import Api
+from satori import Api, Event, EventType, LoginStatus, Upload
 from satori.client import App, WebsocketsInfo
 from satori.exception import ActionFailed
 from satori.server import Adapter as BaseAdapter
-from satori.server import Request
+from satori.server import Request, stream_response
 from satori.server.adapter import LoginType
 
 
@@ -27,8 +29,30 @@ class SatoriAdapter(BaseAdapter):
 
         @self.app.register
         async def _(acc, event):
+            # 登录事件已由 lifecycle 同步，仅转发服务端尚未反映的变化
+            if event.type in (EventType.LOGIN_ADDED, EventType.LOGIN_UPDATED):
+                if not self.server.logins.changed(event.login):
+                    return
+            elif event.type == EventType.LOGIN_REMOVED and not self._registered(event.login):
+                return
             await self.server.post(event)
 
+        @self.app.lifecycle
+        async def _(acc, state):
+            # 通过 READY 得到或在断线时失去的登录信息不会产生 login-* 事件，需要以事件的形式同步至服务端，
+            # 使服务端的客户端、工作进程与集群中的其他节点都能得知
+            login = acc.self_info
+            if state == LoginStatus.OFFLINE and login.status != LoginStatus.OFFLINE:
+                if self._registered(login):
+                    await self.server.post(Event(EventType.LOGIN_REMOVED, datetime.now(), login))
+                return
+            if state == LoginStatus.RECONNECT:
+                login = replace(login, status=LoginStatus.RECONNECT)
+            if self.server.logins.changed(login):
+                key = (login.platform, login.user.id)
+                event_type = EventType.LOGIN_UPDATED if key in self.server.logins else EventType.LOGIN_ADDED
+                await self.server.post(Event(event_type, datetime.now(), login))
+
         self.routes["internal/*"] = self._handle_request
         self.routes |= {api.value: self._handle_request for api in Api.__members__.values()}
         if not post_upload:
@@ -42,6 +66,9 @@ class SatoriAdapter(BaseAdapter):
     def account(self):
         return next(iter(self.app.accounts.values()), None)
 
+    def _registered(self, login) -> bool:
+        return bool(login.user) and (login.platform, login.user.id) in self.server.logins
+
     def get_platform(self) -> str:
         return "satori"
 
@@ -59,7 +86,11 @@ class SatoriAdapter(BaseAdapter):
                 k: (
                     v
                     if isinstance(v, str)
-                    else {"value": v.file.read(), "content_type": v.content_type, "filename": v.filename}
+                    else {
+                        "value": Upload(v.file).stream(),
+                        "content_type": v.content_type,
+                        "filename": v.filename or k,
+                    }
                 )
                 for k, v in data.items()
             }
@@ -78,8 +109,7 @@ class SatoriAdapter(BaseAdapter):
                 return Response(str(e), status_code=500)
         if acc := self.account:
             return Response(await self.account.protocol.download(f"internal:{acc.platform}/{acc.self_id}/{path}"))
-        async with self.server.session.get(path) as resp:
-            return Response(await resp.read())
+        return await stream_response(self.server.session, path)
 
     async def get_logins(self) -> list[LoginType]:
         if not (acc := self.account):
@@ -100,7 +130,7 @@ class SatoriAdapter(BaseAdapter):
         manager.add_component(self.app.connections[0])
 
         async with self.stage("preparing"):
-            pass
+            self.app.scheduler.start(self.app.post)
 
         async with self.stage("blocking"):
             await any_completed(
@@ -109,7 +139,8 @@ class SatoriAdapter(BaseAdapter):
             )
 
         async with self.stage("cleanup"):
-            pass
+            await self.app.scheduler.stop()
+            await self.app.pool.close()
 
 
 Adapter = SatoriAdapter
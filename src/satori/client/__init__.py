@@ -6,7 +6,6 @@ import signal
 import threading
 import traceback
 from collections.abc import Awaitable, Callable, Iterable
-from functools import wraps
 from typing import TYPE_CHECKING, Any, Literal, TypeVar, overload
 
 from creart import it
@@ -20,13 +19,24 @@ from satori.model import Event, LoginStatus
 
 from .account import Account as Account
 from .account import ApiInfo as ApiInfo
+from .bulk import BulkItem as BulkItem
+from .bulk import BulkResult as BulkResult
+from .cache import ResponseCache as ResponseCache
 from .config import Config
 from .config import WebhookInfo as WebhookInfo
 from .config import WebsocketsInfo as WebsocketsInfo
+from .dispatch import HandlerIndex as HandlerIndex
+from .entity import EntityCache as EntityCache
+from .entity import EntityStats as EntityStats
+from .entity import EntityStore as EntityStore
 from .network.base import BaseNetwork as BaseNetwork
 from .network.webhook import WebhookNetwork
 from .network.websocket import WsNetwork
+from .pool import SessionPool as SessionPool
 from .protocol import ApiProtocol as ApiProtocol
+from .registry import AccountRegistry as AccountRegistry
+from .scheduler import EventScheduler as EventScheduler
+from .scheduler import SchedulerStats as SchedulerStats
 
 TConfig = TypeVar("TConfig", bound=Config)
 TE = TypeVar("TE", bound=Event, contravariant=True)
@@ -40,7 +50,7 @@ _app: App | None = None
 
 
 @overload
-def get_accounts() -> dict[str, Account]: ...
+def get_accounts() -> AccountRegistry: ...
 
 
 @overload
@@ -52,7 +62,7 @@ def get_accounts(self_id: str | None = None):
         raise RuntimeError("App instance is not initialized.")
     if not self_id:
         return _app.accounts
-    return [acc for acc in _app.accounts.values() if acc.self_info.user.id == self_id]
+    return _app.accounts.by_self_id(self_id)
 
 
 def get_app() -> App:
@@ -67,24 +77,41 @@ class App(Service):
     required: set[str] = {"http.client/aiohttp"}
     stages: set[str] = {"preparing", "blocking", "cleanup"}
 
-    accounts: dict[str, Account]
+    accounts: AccountRegistry
     connections: list[BaseNetwork]
     event_callbacks: list[Callable[[Account, Event], Awaitable[Any]]]
+    handlers: HandlerIndex
     lifecycle_callbacks: list[Callable[[Account, LoginStatus], Awaitable[Any]]]
 
     @classmethod
     def register_config(cls, tc: type[TConfig], tn: type[BaseNetwork[TConfig]]):
         MAPPING[tc] = tn
 
-    def __init__(self, *configs: Config, default_api_cls: type[ApiProtocol] = ApiProtocol, main_app: bool = True):
+    def __init__(
+        self,
+        *configs: Config,
+        default_api_cls: type[ApiProtocol] = ApiProtocol,
+        main_app: bool = True,
+        scheduler: EventScheduler | None = None,
+        pool: SessionPool | None = None,
+        responses: ResponseCache | None = None,
+        entities: EntityStore | None = None,
+    ):
         global _app
 
         if _app is not None and main_app:
             raise RuntimeError("App instance already exists. Only one App instance is allowed.")
-        self.accounts = {}
+        self.accounts = AccountRegistry()
         self.connections = []
         self.event_callbacks = []
+        self.handlers = HandlerIndex()
         self.lifecycle_callbacks = []
+        self.scheduler = scheduler or EventScheduler()
+        # 未启动调度器时 (如嵌入其他组件中使用) 事件在单独的任务中交给 post 处理
+        self.scheduler.handler = self.post
+        self.pool = pool or SessionPool()
+        self.responses = ResponseCache() if responses is None else responses
+        self.entities = EntityStore() if entities is None else entities
         super().__init__()
         for config in configs:
             self.apply(config)
@@ -101,9 +128,20 @@ class App(Service):
     def register(self, callback: Callable[[Account, Event], Awaitable[Any]]):
         self.event_callbacks.append(callback)
 
+    def unregister(self, callback: Callable[[Account, Event], Awaitable[Any]]):
+        """移除通过 register 或 register_on 注册的处理函数"""
+        if callback in self.event_callbacks:
+            self.event_callbacks.remove(callback)
+        self.handlers.remove(None, callback)
+
     @overload
     def register_on(
-        self, event_type: Literal[EventType.FRIEND_ADDED, EventType.FRIEND_REMOVED, EventType.FRIEND_REQUEST]
+        self,
+        event_type: Literal[EventType.FRIEND_ADDED, EventType.FRIEND_REMOVED, EventType.FRIEND_REQUEST],
+        *,
+        platform: str | None = None,
+        self_id: str | None = None,
+        channel_id: str | None = None,
     ) -> Callable[
         [Callable[[Account, events.UserEvent], Awaitable[Any]]],
         Callable[[Account, events.UserEvent], Awaitable[Any]],
@@ -115,6 +153,10 @@ class App(Service):
         event_type: Literal[
             EventType.GUILD_ADDED, EventType.GUILD_REMOVED, EventType.GUILD_REQUEST, EventType.GUILD_UPDATED
         ],
+        *,
+        platform: str | None = None,
+        self_id: str | None = None,
+        channel_id: str | None = None,
     ) -> Callable[
         [Callable[[Account, events.GuildEvent], Awaitable[Any]]],
         Callable[[Account, events.GuildEvent], Awaitable[Any]],
@@ -124,6 +166,10 @@ class App(Service):
     def register_on(
         self,
         event_type: Literal[EventType.CHANNEL_ADDED, EventType.CHANNEL_REMOVED, EventType.CHANNEL_UPDATED],
+        *,
+        platform: str | None = None,
+        self_id: str | None = None,
+        channel_id: str | None = None,
     ) -> Callable[
         [Callable[[Account, events.ChannelEvent], Awaitable[Any]]],
         Callable[[Account, events.ChannelEvent], Awaitable[Any]],
@@ -138,6 +184,10 @@ class App(Service):
             EventType.GUILD_MEMBER_UPDATED,
             EventType.GUILD_MEMBER_REQUEST,
         ],
+        *,
+        platform: str | None = None,
+        self_id: str | None = None,
+        channel_id: str | None = None,
     ) -> Callable[
         [Callable[[Account, events.GuildMemberEvent], Awaitable[Any]]],
         Callable[[Account, events.GuildMemberEvent], Awaitable[Any]],
@@ -147,6 +197,10 @@ class App(Service):
     def register_on(
         self,
         event_type: Literal[EventType.GUILD_ROLE_CREATED, EventType.GUILD_ROLE_DELETED, EventType.GUILD_ROLE_UPDATED],
+        *,
+        platform: str | None = None,
+        self_id: str | None = None,
+        channel_id: str | None = None,
     ) -> Callable[
         [Callable[[Account, events.GuildRoleEvent], Awaitable[Any]]],
         Callable[[Account, events.GuildRoleEvent], Awaitable[Any]],
@@ -156,6 +210,10 @@ class App(Service):
     def register_on(
         self,
         event_type: Literal[EventType.GUILD_EMOJI_ADDED, EventType.GUILD_EMOJI_REMOVED, EventType.GUILD_EMOJI_UPDATED],
+        *,
+        platform: str | None = None,
+        self_id: str | None = None,
+        channel_id: str | None = None,
     ) -> Callable[
         [Callable[[Account, events.GuildEmojiEvent], Awaitable[Any]]],
         Callable[[Account, events.GuildEmojiEvent], Awaitable[Any]],
@@ -163,7 +221,12 @@ class App(Service):
 
     @overload
     def register_on(
-        self, event_type: Literal[EventType.LOGIN_ADDED, EventType.LOGIN_REMOVED, EventType.LOGIN_UPDATED]
+        self,
+        event_type: Literal[EventType.LOGIN_ADDED, EventType.LOGIN_REMOVED, EventType.LOGIN_UPDATED],
+        *,
+        platform: str | None = None,
+        self_id: str | None = None,
+        channel_id: str | None = None,
     ) -> Callable[
         [Callable[[Account, events.LoginEvent], Awaitable[Any]]],
         Callable[[Account, events.LoginEvent], Awaitable[Any]],
@@ -173,47 +236,90 @@ class App(Service):
     def register_on(
         self,
         event_type: Literal[EventType.MESSAGE_CREATED, EventType.MESSAGE_DELETED, EventType.MESSAGE_UPDATED],
+        *,
+        platform: str | None = None,
+        self_id: str | None = None,
+        channel_id: str | None = None,
     ) -> Callable[
         [Callable[[Account, events.MessageEvent], Awaitable[Any]]],
         Callable[[Account, events.MessageEvent], Awaitable[Any]],
     ]: ...
 
     @overload
-    def register_on(self, event_type: Literal[EventType.REACTION_ADDED, EventType.REACTION_REMOVED]) -> Callable[
+    def register_on(
+        self,
+        event_type: Literal[EventType.REACTION_ADDED, EventType.REACTION_REMOVED],
+        *,
+        platform: str | None = None,
+        self_id: str | None = None,
+        channel_id: str | None = None,
+    ) -> Callable[
         [Callable[[Account, events.ReactionEvent], Awaitable[Any]]],
         Callable[[Account, events.ReactionEvent], Awaitable[Any]],
     ]: ...
 
     @overload
-    def register_on(self, event_type: Literal[EventType.INTERACTION_BUTTON]) -> Callable[
+    def register_on(
+        self,
+        event_type: Literal[EventType.INTERACTION_BUTTON],
+        *,
+        platform: str | None = None,
+        self_id: str | None = None,
+        channel_id: str | None = None,
+    ) -> Callable[
         [Callable[[Account, events.ButtonInteractionEvent], Awaitable[Any]]],
         Callable[[Account, events.ButtonInteractionEvent], Awaitable[Any]],
     ]: ...
 
     @overload
-    def register_on(self, event_type: Literal[EventType.INTERACTION_COMMAND]) -> Callable[
+    def register_on(
+        self,
+        event_type: Literal[EventType.INTERACTION_COMMAND],
+        *,
+        platform: str | None = None,
+        self_id: str | None = None,
+        channel_id: str | None = None,
+    ) -> Callable[
         [Callable[[Account, events.ArgvInteractionEvent | events.MessageEvent], Awaitable[Any]]],
         Callable[[Account, events.ArgvInteractionEvent | events.MessageEvent], Awaitable[Any]],
     ]: ...
 
     @overload
-    def register_on(self, event_type: Literal[EventType.INTERNAL]) -> Callable[
+    def register_on(
+        self,
+        event_type: Literal[EventType.INTERNAL],
+        *,
+        platform: str | None = None,
+        self_id: str | None = None,
+        channel_id: str | None = None,
+    ) -> Callable[
         [Callable[[Account, events.InternalEvent], Awaitable[Any]]],
         Callable[[Account, events.InternalEvent], Awaitable[Any]],
     ]: ...
 
     @overload
     def register_on(
-        self, event_type: str
+        self, event_type: str, *, platform: str | None = None, self_id: str | None = None, channel_id: str | None = None
     ) -> Callable[[Callable[[Account, Event], Awaitable[Any]]], Callable[[Account, Event], Awaitable[Any]]]: ...
 
-    def register_on(self, event_type: str | EventType):
+    def register_on(
+        self,
+        event_type: str | EventType,
+        *,
+        platform: str | None = None,
+        self_id: str | None = None,
+        channel_id: str | None = None,
+    ):
+        """注册指定类型事件的处理函数，可以额外限定平台、账号与频道"""
+
         def decorator(func: Callable[[Account, Any], Awaitable[Any]], /) -> Callable[[Account, Any], Awaitable[Any]]:
-            @wraps(func)
+            @functools.wraps(func)
             async def wrapper(account: Account, event: Event) -> Any:
-                if event.type == event_type:
+                if event.type == event_type and entry.test(account, event):
                     return await func(account, event)
 
+            # 包装函数同时登记在索引与 event_callbacks 中，分发时只经由索引调用
+            entry = self.handlers.add(event_type, wrapper, platform=platform, self_id=self_id, channel_id=channel_id)
             self.register(wrapper)
             return wrapper
 
@@ -240,16 +346,18 @@ class App(Service):
             if not login.user:
                 logger.warning(f"Received login-added event without user info: {login}")
                 return
-            login_sn = f"{login.platform}_{login.user.id}@{id(conn):x}"
             account = Account(
                 login,
                 conn.config,
                 conn.proxy_urls,
                 self.default_api_cls,
+                pool=self.pool,
+                responses=self.responses,
+                entities=self.entities,
             )
             logger.info(f"account added: {account}")
             (account.connected.set() if login.status == LoginStatus.ONLINE else account.connected.clear())
-            self.accounts[login_sn] = account
+            login_sn = self.accounts.add(account, conn)
             conn.accounts[login_sn] = account
             await self.account_update(account, login.status)
         elif ev_type == EventType.LOGIN_UPDATED:
@@ -259,8 +367,7 @@ class App(Service):
             if not login.user:
                 logger.warning(f"Received login-updated event without user info: {login}")
                 return
-            login_sn = f"{login.platform}_{login.user.id}@{id(conn):x}"
-            if login_sn not in self.accounts:
+            if (account := self.accounts.lookup(login.platform, login.user.id, conn)) is None:
                 if login.status != LoginStatus.ONLINE:
                     logger.warning(f"Received event for unknown account: {event}")
                     return
@@ -269,14 +376,16 @@ class App(Service):
                     conn.config,
                     conn.proxy_urls,
                     self.default_api_cls,
+                    pool=self.pool,
+                    responses=self.responses,
+                    entities=self.entities,
                 )
                 logger.info(f"account added: {account}")
                 account.connected.set()
-                self.accounts[login_sn] = account
+                login_sn = self.accounts.add(account, conn)
                 conn.accounts[login_sn] = account
                 await self.account_update(account, LoginStatus.ONLINE)
             else:
-                account = self.accounts[login_sn]
                 account.self_info = login
             logger.info(f"account updated: {account}")
             (
@@ -292,26 +401,27 @@ class App(Service):
             if not login.user:
                 logger.warning(f"Received login-removed event without user info: {login}")
                 return
-            login_sn = f"{login.platform}_{login.user.id}@{id(conn):x}"
-            if login_sn not in self.accounts:
-                logger.warning(f"Received event for unknown account: {event}")
-                return
-            account = self.accounts[login_sn]
-        else:
-            login_sn = f"{event.login.platform}_{event.login.user.id}@{id(conn):x}"
-            if login_sn not in self.accounts:
+            if (account := self.accounts.lookup(login.platform, login.user.id, conn)) is None:
                 logger.warning(f"Received event for unknown account: {event}")
                 return
-            account = self.accounts[login_sn]
-
-        if self.event_callbacks:
-            if len(self.event_callbacks) == 1:
+        elif (account := self.accounts.lookup(event.login.platform, event.login.user.id, conn)) is None:
+            logger.warning(f"Received event for unknown account: {event}")
+            return
+
+        self.responses.invalidate_event(account, event)
+        self.entities.observe(account.platform, event)
+        callbacks = self.event_callbacks
+        if self.handlers:
+            matched = self.handlers.match(account, event)
+            callbacks = [callback for callback in callbacks if callback not in self.handlers] + matched
+        if callbacks:
+            if len(callbacks) == 1:
                 try:
-                    await self.event_callbacks[0](account, event)
+                    await callbacks[0](account, event)
                 except Exception:
                     traceback.print_exc()
             else:
-                task = asyncio.gather(*(callback(account, event) for callback in self.event_callbacks))
+                task = asyncio.gather(*(callback(account, event) for callback in callbacks))
                 try:
                     await task
                 except Exception:
@@ -322,15 +432,18 @@ class App(Service):
             logger.info(f"account removed: {account}")
             account.connected.clear()
             await self.account_update(account, LoginStatus.OFFLINE)
-            del self.accounts[login_sn]
-            del conn.accounts[login_sn]
+            self.responses.clear(account)
+            for login_sn, value in self.accounts.by_connection(conn).items():
+                if value is account:
+                    del self.accounts[login_sn]
+                    conn.accounts.pop(login_sn, None)
 
     async def launch(self, manager: Launart):
         for conn in self.connections:
             manager.add_component(conn)
 
         async with self.stage("preparing"):
-            ...
+            self.scheduler.start(self.post)
 
         async with self.stage("blocking"):
             await any_completed(
@@ -339,9 +452,11 @@ class App(Service):
             )
 
         async with self.stage("cleanup"):
+            await self.scheduler.stop()
             for account in self.accounts.values():
                 await self.account_update(account, LoginStatus.OFFLINE)
             self.accounts.clear()
+            await self.pool.close()
 
     def run(
         self,
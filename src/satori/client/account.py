@@ -8,6 +8,9 @@ from yarl import URL
 
 from satori.model import Login
 
+from .cache import ResponseCache
+from .entity import EntityCache, EntityStore
+from .pool import SessionPool
 from .protocol import ApiProtocol
 
 TP = TypeVar("TP", bound="ApiProtocol", default=ApiProtocol, covariant=True)
@@ -37,11 +40,18 @@ class Account(Generic[TP]):
         config: ApiInfo,
         proxy_urls: list[str],
         protocol_cls: type[TP] = ApiProtocol,
+        pool: SessionPool | None = None,
+        responses: ResponseCache | None = None,
+        entities: EntityStore | None = None,
     ):
         self.adapter = login.adapter
         self.self_info = login
         self.config = config
         self.proxy_urls = proxy_urls
+        self.pool = pool
+        self.responses = responses
+        self.entities = EntityStore() if entities is None else entities
+        self.cache = EntityCache(self, self.entities)
         self.protocol = protocol_cls(self)  # type: ignore
         self.connected = asyncio.Event()
 
@@ -59,6 +69,9 @@ class Account(Generic[TP]):
             config or (ApiInfo(**kwargs) if kwargs else self.config),
             self.proxy_urls,
             protocol_cls,
+            self.pool,
+            self.responses,
+            self.entities,
         )
 
     def ensure_url(self, url: str) -> URL:
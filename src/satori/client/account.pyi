@@ -1,5 +1,6 @@
 import asyncio
-from collections.abc import Iterable
+from collections.abc import AsyncGenerator, Callable, Iterable, Mapping
+from os import PathLike
 from typing import Any, Protocol, overload
 from typing_extensions import Generic, TypeVar, deprecated  # noqa: UP035
 
@@ -24,6 +25,10 @@ from satori.model import (
     User,
 )
 
+from .bulk import BulkResult
+from .cache import ResponseCache
+from .entity import EntityCache, EntityStore
+from .pool import SessionPool
 from .protocol import ApiProtocol
 
 TP = TypeVar("TP", bound="ApiProtocol", default=ApiProtocol, covariant=True)
@@ -53,6 +58,10 @@ class Account(Generic[TP]):
     config: Api
     protocol: TP
     connected: asyncio.Event
+    pool: SessionPool | None
+    responses: ResponseCache | None
+    entities: EntityStore
+    cache: EntityCache
 
     def __init__(
         self,
@@ -60,6 +69,9 @@ class Account(Generic[TP]):
         config: Api,
         proxy_urls: list[str],
         protocol_cls: type[TP] = ApiProtocol,
+        pool: SessionPool | None = None,
+        responses: ResponseCache | None = None,
+        entities: EntityStore | None = None,
     ): ...
     @property
     def platform(self) -> str: ...
@@ -583,8 +595,14 @@ class Account(Generic[TP]):
             list[Login]: `Login` 对象构成的数组
         """
 
-    async def webhook_create(self, url: str, token: str | None = None):
-        """创建 Webhook。"""
+    async def webhook_create(self, url: str, token: str | None = None, filter: dict[str, list[str]] | None = None):
+        """创建 Webhook。
+
+        Args:
+            url (str): Webhook 地址
+            token (str | None): 推送事件时使用的鉴权令牌
+            filter (dict[str, list[str]] | None): 事件订阅过滤器，见 `Identify.filter`
+        """
 
     async def webhook_delete(self, url: str):
         """删除 Webhook。"""
@@ -601,8 +619,129 @@ class Account(Generic[TP]):
         """
     upload = upload_create
 
-    async def download(self, url: str) -> bytes:
+    @overload
+    async def upload_files(
+        self,
+        uploads: Mapping[str, Upload],
+        *,
+        progress: Callable[[str, int, int | None], Any] | None = None,
+        chunk_size: int = 65536,
+        concurrency: int | None = None,
+    ) -> dict[str, str]: ...
+    @overload
+    async def upload_files(
+        self,
+        uploads: Iterable[Upload],
+        *,
+        progress: Callable[[str, int, int | None], Any] | None = None,
+        chunk_size: int = 65536,
+        concurrency: int | None = None,
+    ) -> list[str]: ...
+    async def upload_files(
+        self,
+        uploads: Iterable[Upload] | Mapping[str, Upload],
+        *,
+        progress: Callable[[str, int, int | None], Any] | None = None,
+        chunk_size: int = 65536,
+        concurrency: int | None = None,
+    ):
+        """上传文件，文件内容以流的形式发送而不会整体读入内存。
+
+        Args:
+            uploads (Iterable[Upload] | Mapping[str, Upload]): 要上传的文件；传入映射时以其键作为字段名
+            progress (Callable[[str, int, int | None], Any] | None): 进度回调，
+                以 (字段名, 已发送字节数, 总字节数) 调用；总字节数无法预先得知时为 None
+            chunk_size (int): 每块的最大字节数
+            concurrency (int | None): 为 None 时所有文件在一次请求中上传；
+                否则每个文件单独请求，至多同时进行 `concurrency` 个
+
+        Returns:
+            list[str] | dict[str, str]: 与传入顺序一致的链接列表；传入映射时为字段名到链接的映射
+        """
+
+    async def download(self, url: str, cache: bool = True) -> bytes:
         """访问内部链接。"""
 
+    def download_stream(
+        self,
+        url: str,
+        cache: bool = True,
+        *,
+        offset: int = 0,
+        if_range: str | None = None,
+        chunk_size: int = 65536,
+    ) -> AsyncGenerator[bytes]:
+        """以流的形式访问资源链接，逐块返回内容。
+
+        Args:
+            url (str): 资源链接
+            cache (bool): 是否允许使用服务端的资源缓存，可传入 `Resource.cache`
+            offset (int): 起始位置；通过 Range 请求获取，服务端不支持 Range 时跳过之前的内容
+            if_range (str | None): 之前获取到的资源 ETag 或 Last-Modified，随 Range 请求发送；
+                资源已变化时抛出 `NetworkError`，而不是返回新资源的后半部分
+            chunk_size (int): 每块的最大字节数
+        """
+
+    async def download_to(
+        self, url: str, path: str | PathLike[str], cache: bool = True, *, resume: bool = False, chunk_size: int = 65536
+    ) -> int:
+        """将资源链接的内容写入文件，内存中至多保留一块数据。
+
+        `resume` 为 True 时，下载期间会在 `{path}.resume` 中记录资源的 ETag 或 Last-Modified。
+        再次下载时若存在该记录，则以 Range 与 If-Range 请求从文件末尾继续；资源已变化或与本地文件不符时重新下载。
+        没有记录的已有文件不会被续传，而是被覆盖。
+
+        Args:
+            url (str): 资源链接
+            path (str | PathLike[str]): 目标文件路径
+            cache (bool): 是否允许使用服务端的资源缓存，可传入 `Resource.cache`
+            resume (bool): 是否启用断点续传
+            chunk_size (int): 每块的最大字节数
+
+        Returns:
+            int: 文件的总字节数
+        """
+
     async def request_internal(self, url: str, method: str = "GET", **kwargs) -> dict:
         """访问内部链接。"""
+
+    async def batch(self, *calls: tuple[str, dict | None]) -> list[Any]:
+        """批量调用接口。
+
+        所有调用会合并为一次请求发送至服务端的 batch 接口，由服务端并发执行。
+
+        Args:
+            *calls (tuple[str, dict | None]): 由接口名称与参数构成的调用
+
+        Returns:
+            list[Any]: 与调用顺序一致的结果列表；调用失败时对应位置为 `ActionFailed` 异常对象
+        """
+
+    async def bulk(
+        self,
+        action: str,
+        params: Iterable[dict],
+        *,
+        concurrency: int = 8,
+        batch_size: int | None = None,
+        max_retries: int = 3,
+        retry_delay: float = 1,
+    ) -> BulkResult:
+        """对多个目标批量调用同一接口。
+
+        各项以 `concurrency` 为上限并发调用；遇到频率限制 (`RateLimitException`) 时所有调用暂停
+        `retry_after` 秒 (未给出时按 `retry_delay` 指数退避) 后重试，至多重试 `max_retries` 次。
+
+        指定 `batch_size` 时，每 `batch_size` 项合并为一次服务端 batch 请求；服务端不支持 batch 时自动改为逐项调用。
+
+        Args:
+            action (str | Api): 接口名称
+            params (Iterable[dict]): 各项的参数
+            concurrency (int): 同时进行的调用 (或 batch 请求) 数
+            batch_size (int | None): 每次 batch 请求包含的项数，为 None 时逐项调用
+            max_retries (int): 频率限制下的最大重试次数
+            retry_delay (float): 未给出重试时间时的初始退避时长 (秒)
+
+        Returns:
+            BulkResult: 与输入顺序一致的各项结果与异常
+        """
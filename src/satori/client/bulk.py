@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from itertools import islice
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
+
+from satori.const import Api
+from satori.exception import ApiNotAvailable, MethodNotAllowedException, NotFoundException, RateLimitException
+
+if TYPE_CHECKING:
+    from .protocol import ApiProtocol
+
+
+@dataclass(eq=False)
+class BulkItem:
+    params: dict
+    result: Any = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class BulkResult:
+    items: list[BulkItem]
+    """与输入顺序一致的各项结果"""
+
+    def __iter__(self) -> Iterator[BulkItem]:
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def succeeded(self) -> list[BulkItem]:
+        return [item for item in self.items if item.error is None]
+
+    @property
+    def failed(self) -> list[BulkItem]:
+        return [item for item in self.items if item.error is not None]
+
+
+class _Bulk:
+    def __init__(
+        self,
+        protocol: ApiProtocol,
+        action: str,
+        *,
+        concurrency: int,
+        max_retries: int,
+        retry_delay: float,
+    ):
+        self.protocol = protocol
+        self.action = action
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.resume_at = 0.0
+
+    async def _wait(self):
+        """触发频率限制后，所有工作协程都暂停到 `resume_at`"""
+        while (delay := self.resume_at - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+
+    def _limited(self, error: RateLimitException, attempt: int) -> bool:
+        """记录频率限制；返回是否还可以重试"""
+        if attempt >= self.max_retries:
+            return False
+        delay = self.retry_delay * 2**attempt if error.retry_after is None else error.retry_after
+        self.resume_at = max(self.resume_at, time.monotonic() + delay)
+        return True
+
+    async def call(self, item: BulkItem):
+        for attempt in range(self.max_retries + 1):
+            await self._wait()
+            try:
+                item.result = await self.protocol.call_api(self.action, item.params)
+                item.error = None
+                return
+            except RateLimitException as e:
+                item.error = e
+                if not self._limited(e, attempt):
+                    return
+            except Exception as e:
+                item.error = e
+                return
+
+    async def call_batch(self, items: list[BulkItem]) -> bool:
+        """经由服务端的 batch 接口调用；服务端不支持 batch 时返回 False"""
+        pending = items
+        for attempt in range(self.max_retries + 1):
+            await self._wait()
+            try:
+                results = await self.protocol.batch(*((self.action, item.params) for item in pending))
+            except (NotFoundException, MethodNotAllowedException, ApiNotAvailable):
+                return False
+            except RateLimitException as e:
+                if not self._limited(e, attempt):
+                    for item in pending:
+                        item.error = e
+                    return True
+                continue
+            except Exception as e:
+                for item in pending:
+                    item.error = e
+                return True
+            limited: list[BulkItem] = []
+            for item, result in zip(pending, results):
+                if isinstance(result, Exception):
+                    item.error = result
+                    if isinstance(result, RateLimitException):
+                        limited.append(item)
+                else:
+                    item.result, item.error = result, None
+                    if (responses := self.protocol.account.responses) is not None:
+                        responses.invalidate(self.protocol.account, self.action, item.params)
+            if not limited or not self._limited(limited[0].error, attempt):  # type: ignore
+                return True
+            pending = limited
+        return True
+
+    async def run(self, params: Iterable[dict], batch_size: int | None) -> BulkResult:
+        items: list[BulkItem] = []
+        source = iter(params)
+        use_batch = batch_size is not None
+
+        def take(size: int) -> list[BulkItem]:
+            chunk = [BulkItem(p) for p in islice(source, size)]
+            items.extend(chunk)
+            return chunk
+
+        async def worker():
+            nonlocal use_batch
+            while chunk := take(batch_size if use_batch else 1):  # type: ignore
+                if use_batch:
+                    if await self.call_batch(chunk):
+                        continue
+                    if use_batch:
+                        logger.warning("Server does not support batch calls, falling back to individual calls")
+                        use_batch = False
+                for item in chunk:
+                    await self.call(item)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        return BulkResult(items)
+
+
+async def bulk(
+    protocol: ApiProtocol,
+    action: str | Api,
+    params: Iterable[dict],
+    *,
+    concurrency: int = 8,
+    batch_size: int | None = None,
+    max_retries: int = 3,
+    retry_delay: float = 1,
+) -> BulkResult:
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+    if batch_size is not None and batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    runner = _Bulk(
+        protocol,
+        action.value if isinstance(action, Api) else action,
+        concurrency=concurrency,
+        max_retries=max_retries,
+        retry_delay=retry_delay,
+    )
+    return await runner.run(params, batch_size)
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from typing import TYPE_CHECKING, Any
+
+from satori.const import Api, EventType
+from satori.model import Event
+from satori.utils import decode, encode_bytes
+
+if TYPE_CHECKING:
+    from .account import Account
+
+READ_ACTIONS = frozenset(api.value for api in Api if api.value.endswith((".get", ".list")))
+"""只读接口，相同参数的并发调用会被合并"""
+
+_Rule = tuple[tuple[Api, tuple[str, ...]], ...]
+
+_GUILD: _Rule = ((Api.GUILD_GET, ("guild_id",)), (Api.GUILD_LIST, ()))
+_CHANNEL: _Rule = ((Api.CHANNEL_GET, ("channel_id",)), (Api.CHANNEL_LIST, ()))
+_MEMBER: _Rule = ((Api.GUILD_MEMBER_GET, ("guild_id", "user_id")), (Api.GUILD_MEMBER_LIST, ("guild_id",)))
+_ROLE: _Rule = ((Api.GUILD_ROLE_LIST, ("guild_id",)),)
+_MESSAGE: _Rule = ((Api.MESSAGE_GET, ("channel_id", "message_id")), (Api.MESSAGE_LIST, ("channel_id",)))
+_REACTION: _Rule = ((Api.REACTION_LIST, ("channel_id", "message_id")),)
+_FRIEND: _Rule = ((Api.FRIEND_LIST, ()),)
+
+INVALIDATES: dict[str, _Rule] = {
+    EventType.GUILD_ADDED: _GUILD,
+    EventType.GUILD_UPDATED: _GUILD,
+    EventType.GUILD_REMOVED: _GUILD,
+    EventType.CHANNEL_ADDED: _CHANNEL,
+    EventType.CHANNEL_UPDATED: _CHANNEL,
+    EventType.CHANNEL_REMOVED: _CHANNEL,
+    EventType.GUILD_MEMBER_ADDED: _MEMBER,
+    EventType.GUILD_MEMBER_UPDATED: _MEMBER,
+    EventType.GUILD_MEMBER_REMOVED: _MEMBER,
+    EventType.GUILD_ROLE_CREATED: _ROLE,
+    EventType.GUILD_ROLE_UPDATED: _ROLE,
+    EventType.GUILD_ROLE_DELETED: _ROLE,
+    EventType.MESSAGE_CREATED: ((Api.MESSAGE_LIST, ("channel_id",)),),
+    EventType.MESSAGE_UPDATED: _MESSAGE,
+    EventType.MESSAGE_DELETED: _MESSAGE,
+    EventType.REACTION_ADDED: _REACTION,
+    EventType.REACTION_REMOVED: _REACTION,
+    EventType.FRIEND_ADDED: _FRIEND,
+    EventType.FRIEND_REMOVED: _FRIEND,
+    EventType.LOGIN_UPDATED: ((Api.LOGIN_GET, ()),),
+    Api.GUILD_APPROVE: _GUILD,
+    Api.CHANNEL_CREATE: _CHANNEL,
+    Api.CHANNEL_UPDATE: _CHANNEL,
+    Api.CHANNEL_DELETE: _CHANNEL,
+    Api.CHANNEL_MUTE: _CHANNEL,
+    Api.GUILD_MEMBER_KICK: _MEMBER,
+    Api.GUILD_MEMBER_MUTE: _MEMBER,
+    Api.GUILD_MEMBER_ROLE_SET: _MEMBER,
+    Api.GUILD_MEMBER_ROLE_UNSET: _MEMBER,
+    Api.GUILD_ROLE_CREATE: _ROLE,
+    Api.GUILD_ROLE_UPDATE: _ROLE,
+    Api.GUILD_ROLE_DELETE: _ROLE,
+    Api.MESSAGE_CREATE: ((Api.MESSAGE_LIST, ("channel_id",)),),
+    Api.MESSAGE_UPDATE: _MESSAGE,
+    Api.MESSAGE_DELETE: _MESSAGE,
+    Api.REACTION_CREATE: _REACTION,
+    Api.REACTION_DELETE: _REACTION,
+    Api.REACTION_CLEAR: _REACTION,
+    Api.FRIEND_DELETE: _FRIEND,
+    Api.FRIEND_APPROVE: _FRIEND,
+}
+"""事件或写接口 -> 需要失效的 (只读接口, 需要匹配的参数)；未给出的参数视为匹配全部"""
+
+_Bucket = tuple[str, str, str, str | None, str]
+"""(platform, self_id, api_base, token, action)"""
+
+
+def _freeze(params: dict) -> Hashable:
+    key = tuple(sorted(params.items()))
+    try:
+        hash(key)
+    except TypeError:
+        return encode_bytes(params)
+    return key
+
+
+def event_ids(event: Event) -> dict[str, str]:
+    """事件涉及的资源 ID，以接口参数名为键"""
+    ids: dict[str, str] = {}
+    if event.guild:
+        ids["guild_id"] = event.guild.id
+    if event.channel:
+        ids["channel_id"] = event.channel.id
+    if event.user:
+        ids["user_id"] = event.user.id
+    if event.message:
+        ids["message_id"] = event.message.id
+    return ids
+
+
+def _matches(params: dict, fields: tuple[str, ...], ids: dict[str, Any]) -> bool:
+    return all(field not in ids or params.get(field) == ids[field] for field in fields)
+
+
+class ResponseCache:
+    """只读接口的请求合并与响应缓存
+
+    同一账号以相同参数并发调用只读接口 (`*.get` 与 `*.list`) 时只会发出一次请求，各调用方共享其结果。
+    结果以编码后的形式保存，每个调用方都会得到独立解码的副本，修改返回值不会影响其他调用方与缓存。
+    请求与缓存按账号所使用的 API 地址与令牌区分，`Account.custom` 得到的账号不会共享其他地址的结果。
+
+    `ttl` 以接口为键设置响应的缓存时长 (秒)，未列出的接口不缓存。缓存在收到相关事件 (如 `guild-member-updated`、
+    `channel-updated`) 或通过本账号调用相关的写接口后失效。
+
+    Args:
+        ttl (dict[Api | str, float] | None): 各接口的缓存时长
+        coalesce (bool): 是否合并并发的相同请求
+        max_entries (int): 缓存条目数上限
+    """
+
+    def __init__(self, ttl: dict[Api | str, float] | None = None, *, coalesce: bool = True, max_entries: int = 10000):
+        self.ttl: dict[str, float] = {
+            (action.value if isinstance(action, Api) else action): value for action, value in (ttl or {}).items()
+        }
+        self.coalesce = coalesce
+        self.max_entries = max_entries
+        self._entries: dict[_Bucket, dict[Hashable, tuple[float, dict, bytes]]] = {}
+        self._size = 0
+        self._inflight: dict[tuple[_Bucket, Hashable], tuple[asyncio.Task, dict]] = {}
+
+    def __len__(self):
+        return self._size
+
+    async def call(self, account: Account, action: str, params: Any, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """经由缓存调用接口；`fetch` 发出实际的请求"""
+        if action not in READ_ACTIONS or not isinstance(params, dict):
+            result = await fetch()
+            if action in INVALIDATES and isinstance(params, dict):
+                self.invalidate(account, action, params)
+            return result
+        bucket = (account.platform, account.self_id, str(account.config.api_base), account.config.token, action)
+        key = _freeze(params)
+        ttl = self.ttl.get(action)
+        if ttl and (entries := self._entries.get(bucket)) and (entry := entries.get(key)):
+            if entry[0] > time.monotonic():
+                return decode(entry[2])
+            del entries[key]
+            self._size -= 1
+        if not self.coalesce and not ttl:
+            return await fetch()
+        if (inflight := self._inflight.get((bucket, key))) is not None:
+            task = inflight[0]
+        else:
+            task = asyncio.ensure_future(self._fetch(fetch))
+            self._inflight[bucket, key] = (task, params)
+            task.add_done_callback(lambda t: self._settle(t, bucket, key, params, ttl))
+        # 单个调用方被取消时不影响共享的请求
+        return decode(await asyncio.shield(task))
+
+    @staticmethod
+    async def _fetch(fetch: Callable[[], Awaitable[Any]]) -> bytes:
+        return encode_bytes(await fetch())
+
+    def _settle(self, task: asyncio.Task, bucket: _Bucket, key: Hashable, params: dict, ttl: float | None):
+        if (inflight := self._inflight.get((bucket, key))) is None or inflight[0] is not task:
+            # 请求期间缓存已失效，结果可能已经过时
+            return
+        del self._inflight[bucket, key]
+        if not ttl or task.cancelled() or task.exception() is not None:
+            return
+        entries = self._entries.setdefault(bucket, {})
+        if key not in entries:
+            if self._size >= self.max_entries and not self._evict():
+                return
+            self._size += 1
+        entries[key] = (time.monotonic() + ttl, params, task.result())
+
+    def _evict(self) -> bool:
+        """清理过期条目；仍然已满时移除最早缓存的条目"""
+        now = time.monotonic()
+        for bucket, entries in list(self._entries.items()):
+            for key in [key for key, entry in entries.items() if entry[0] <= now]:
+                del entries[key]
+                self._size -= 1
+            if not entries:
+                del self._entries[bucket]
+        if self._size < self.max_entries:
+            return True
+        for entries in self._entries.values():
+            if entries:
+                del entries[next(iter(entries))]
+                self._size -= 1
+                return True
+        return False
+
+    def invalidate(self, account: Account, trigger: str, ids: dict[str, Any]):
+        """使事件或写接口 `trigger` 涉及的缓存失效"""
+        login = (account.platform, account.self_id)
+        for action, fields in INVALIDATES.get(trigger, ()):
+            # 同一登录经由不同 API 地址的缓存一并失效
+            for bucket, entries in self._entries.items():
+                if bucket[:2] != login or bucket[-1] != action.value:
+                    continue
+                for key, (_, params, _) in list(entries.items()):
+                    if _matches(params, fields, ids):
+                        del entries[key]
+                        self._size -= 1
+            for inflight_key, (_, params) in list(self._inflight.items()):
+                bucket = inflight_key[0]
+                if bucket[:2] == login and bucket[-1] == action.value and _matches(params, fields, ids):
+                    # 之后的调用重新发出请求，进行中的请求结果不再缓存
+                    del self._inflight[inflight_key]
+
+    def invalidate_event(self, account: Account, event: Event):
+        if (self._size or self._inflight) and event.type in INVALIDATES:
+            self.invalidate(account, event.type, event_ids(event))
+
+    def clear(self, account: Account | None = None):
+        """清空缓存；指定账号时只清空该账号的缓存"""
+        for bucket in list(self._entries):
+            if account is None or bucket[:2] == (account.platform, account.self_id):
+                self._size -= len(self._entries.pop(bucket))
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Literal
 
 from yarl import URL
 
@@ -25,6 +26,12 @@ class WebsocketsInfo(Config):
     token: str | None = None
     secure: bool = False
     timeout: float | None = None
+    filter: dict[str, list[str]] | None = None
+    """事件订阅过滤器，由服务端按 platforms, self_ids, types, channels, guilds 筛选推送的事件"""
+    encoding: Literal["json", "msgpack"] = "json"
+    """事件通道的编码方式；msgpack 需要安装 msgspec，服务端不支持时回退到 JSON"""
+    compress: bool = False
+    """是否请求 permessage-deflate 压缩"""
     identity: str = None  # type: ignore
     api_base: URL = None  # type: ignore
 
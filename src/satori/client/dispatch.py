@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from satori.model import Event
+
+if TYPE_CHECKING:
+    from .account import Account
+
+Handler = Callable[["Account", Any], Awaitable[Any]]
+
+
+@dataclass(frozen=True, eq=False)
+class HandlerEntry:
+    func: Handler
+    platform: str | None = None
+    self_id: str | None = None
+    channel_id: str | None = None
+
+    def accepts(self, account: Account) -> bool:
+        return (self.platform is None or self.platform == account.platform) and (
+            self.self_id is None or self.self_id == account.self_id
+        )
+
+    def test(self, account: Account, event: Event) -> bool:
+        if self.channel_id is not None and not (event.channel and event.channel.id == self.channel_id):
+            return False
+        return self.accepts(account)
+
+
+class HandlerIndex:
+    """事件处理函数的分发索引
+
+    处理函数按事件类型分组，指定了频道的处理函数再按频道 ID 分组，
+    因此每个事件只需两次字典查找即可取得候选处理函数，不匹配的处理函数不会被调用。
+    """
+
+    def __init__(self):
+        self._index: dict[str, dict[str | None, list[HandlerEntry]]] = {}
+        self._funcs: dict[Handler, int] = {}
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, func: Handler) -> bool:
+        return func in self._funcs
+
+    def add(
+        self,
+        event_type: str,
+        func: Handler,
+        *,
+        platform: str | None = None,
+        self_id: str | None = None,
+        channel_id: str | None = None,
+    ) -> HandlerEntry:
+        entry = HandlerEntry(func, platform, self_id, channel_id)
+        self._index.setdefault(event_type, {}).setdefault(channel_id, []).append(entry)
+        self._funcs[func] = self._funcs.get(func, 0) + 1
+        self._size += 1
+        return entry
+
+    def remove(self, event_type: str | None, func: Handler) -> bool:
+        """移除某一事件类型下的处理函数，事件类型为 None 时移除所有事件类型下的该函数"""
+        removed = False
+        for key in list(self._index) if event_type is None else [event_type]:
+            for entries in self._index.get(key, {}).values():
+                for entry in [entry for entry in entries if entry.func is func]:
+                    entries.remove(entry)
+                    self._size -= 1
+                    removed = True
+                    if (count := self._funcs[func] - 1) > 0:
+                        self._funcs[func] = count
+                    else:
+                        del self._funcs[func]
+        return removed
+
+    def match(self, account: Account, event: Event) -> list[Handler]:
+        if (by_channel := self._index.get(event.type)) is None:
+            return []
+        entries = by_channel.get(None, [])
+        if event.channel and (specific := by_channel.get(event.channel.id)):
+            entries = entries + specific
+        return [entry.func for entry in entries if entry.accepts(account)]
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass, fields, replace
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from satori.const import EventType
+from satori.model import Channel, Event, Friend, Guild, Member, User
+
+if TYPE_CHECKING:
+    from .account import Account
+
+T = TypeVar("T", User, Guild, Channel, Member)
+
+EntityKey = tuple[str, ...]
+"""(kind, platform, *ids)"""
+
+REMOVALS = {
+    EventType.GUILD_REMOVED: "guild",
+    EventType.CHANNEL_REMOVED: "channel",
+    EventType.GUILD_MEMBER_REMOVED: "member",
+}
+
+
+def _missing(value: Any) -> bool:
+    return value is None or value == []
+
+
+def _useful(entity: Any) -> bool:
+    """实体是否包含 ID 以外的信息；事件中只有 ID 的片段不会被缓存"""
+    if isinstance(entity, Member):
+        return any(not _missing(value) for value in (entity.nick, entity.avatar, entity.joined_at, entity.roles)) or (
+            entity.user is not None and _useful(entity.user)
+        )
+    if isinstance(entity, Channel):
+        return entity.name is not None
+    return any(not _missing(getattr(entity, f.name)) for f in fields(entity) if f.name != "id")
+
+
+def _merge(old: T, new: T) -> T:
+    """以 `new` 为准，`new` 中缺失的字段使用 `old` 中的值"""
+    fill = {
+        f.name: getattr(old, f.name)
+        for f in fields(new)
+        if f.init and _missing(getattr(new, f.name)) and not _missing(getattr(old, f.name))
+    }
+    if isinstance(new, Member) and new.user is not None and old.user is not None:  # type: ignore
+        fill["user"] = _merge(old.user, new.user)  # type: ignore
+    return replace(new, **fill) if fill else new
+
+
+@dataclass
+class EntityStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    """因超出容量被移除的实体数"""
+    size: int = 0
+
+    @property
+    def saved(self) -> int:
+        """节省的接口调用次数"""
+        return self.hits
+
+
+class EntityStore:
+    """由事件与接口结果增量维护的实体缓存
+
+    缓存用户、群组、频道与群成员，按平台区分。事件中携带的实体片段会与已缓存的实体合并；
+    只含 ID 的片段不会被缓存。实体在 `ttl` 秒后过期，总数超过 `max_entries` 时移除最久未使用的实体。
+
+    Args:
+        ttl (float): 实体的有效期 (秒)
+        max_entries (int): 实体数上限
+    """
+
+    def __init__(self, ttl: float = 300, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = EntityStats()
+        self._entries: OrderedDict[EntityKey, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: EntityKey) -> Any:
+        if (entry := self._entries.get(key)) is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            self.stats.size = len(self._entries)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: EntityKey, entity: Any):
+        if (old := self.get(key)) is not None:
+            entity = _merge(old, entity)
+        elif not _useful(entity):
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, entity)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+        self.stats.size = len(self._entries)
+
+    def discard(self, key: EntityKey):
+        if self._entries.pop(key, None) is not None:
+            self.stats.size = len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self.stats.size = 0
+
+    def put_user(self, platform: str, user: User):
+        self.put(("user", platform, user.id), user)
+
+    def put_guild(self, platform: str, guild: Guild):
+        self.put(("guild", platform, guild.id), guild)
+
+    def put_channel(self, platform: str, channel: Channel):
+        self.put(("channel", platform, channel.id), channel)
+
+    def put_member(self, platform: str, guild_id: str, member: Member, user: User | None = None):
+        """`user` 用于补全事件中不含用户信息的成员片段"""
+        if member.user is None:
+            if user is None:
+                return
+            member = replace(member, user=user)
+        if member.user is not None:
+            self.put_user(platform, member.user)
+            self.put(("member", platform, guild_id, member.user.id), member)
+
+    def put_many(self, platform: str, entities: Iterable[Any], guild_id: str | None = None):
+        """缓存分页接口返回的实体"""
+        for entity in entities:
+            if isinstance(entity, Member):
+                if guild_id is not None:
+                    self.put_member(platform, guild_id, entity)
+            elif isinstance(entity, User):
+                self.put_user(platform, entity)
+            elif isinstance(entity, Friend):
+                if entity.user is not None:
+                    self.put_user(platform, entity.user)
+            elif isinstance(entity, Guild):
+                self.put_guild(platform, entity)
+            elif isinstance(entity, Channel):
+                self.put_channel(platform, entity)
+
+    def observe(self, platform: str, event: Event):
+        """根据事件更新缓存"""
+        guild_id = event.guild.id if event.guild else None
+        if kind := REMOVALS.get(event.type):  # type: ignore
+            if kind == "guild" and guild_id:
+                self.discard(("guild", platform, guild_id))
+            elif kind == "channel" and event.channel:
+                self.discard(("channel", platform, event.channel.id))
+            elif kind == "member" and guild_id and event.user:
+                self.discard(("member", platform, guild_id, event.user.id))
+            return
+        if event.user:
+            self.put_user(platform, event.user)
+        if event.guild:
+            self.put_guild(platform, event.guild)
+        if event.channel:
+            self.put_channel(platform, event.channel)
+        if event.member and guild_id:
+            self.put_member(platform, guild_id, event.member, event.user)
+
+
+class EntityCache:
+    """账号的实体访问接口
+
+    优先返回缓存中的实体，未命中时调用对应接口获取并缓存。
+    """
+
+    def __init__(self, account: Account, store: EntityStore):
+        self.account = account
+        self.store = store
+
+    @property
+    def stats(self) -> EntityStats:
+        return self.store.stats
+
+    def _hit(self, key: EntityKey) -> Any:
+        if (entity := self.store.get(key)) is None:
+            self.store.stats.misses += 1
+        else:
+            self.store.stats.hits += 1
+        return entity
+
+    async def user(self, user_id: str) -> User:
+        if (user := self._hit(("user", self.account.platform, user_id))) is not None:
+            return user
+        return await self.account.protocol.user_get(user_id)
+
+    async def guild(self, guild_id: str) -> Guild:
+        if (guild := self._hit(("guild", self.account.platform, guild_id))) is not None:
+            return guild
+        return await self.account.protocol.guild_get(guild_id)
+
+    async def channel(self, channel_id: str) -> Channel:
+        if (channel := self._hit(("channel", self.account.platform, channel_id))) is not None:
+            return channel
+        return await self.account.protocol.channel_get(channel_id)
+
+    async def member(self, guild_id: str, user_id: str) -> Member:
+        if (member := self._hit(("member", self.account.platform, guild_id, user_id))) is not None:
+            return member
+        return await self.account.protocol.guild_member_get(guild_id, user_id)
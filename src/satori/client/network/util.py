@@ -3,10 +3,12 @@ from typing import Literal, overload
 from aiohttp import ClientResponse
 
 from satori.exception import (
+    ActionFailed,
     BadRequestException,
     ForbiddenException,
     MethodNotAllowedException,
     NotFoundException,
+    RateLimitException,
     ServerException,
     UnauthorizedException,
 )
@@ -38,7 +40,36 @@ async def validate_response(resp: ClientResponse, noreturn=False):
             raise NotFoundException(await resp.text())
         case 405:
             raise MethodNotAllowedException(await resp.text())
+        case 429:
+            raise RateLimitException(await resp.text(), retry_after=_retry_after(resp.headers.get("Retry-After")))
         case x if x >= 500:
             raise ServerException(await resp.text())
         case _:
             resp.raise_for_status()
+
+
+_STATUS_EXCEPTIONS: dict[int, type[ActionFailed]] = {
+    400: BadRequestException,
+    401: UnauthorizedException,
+    403: ForbiddenException,
+    404: NotFoundException,
+    405: MethodNotAllowedException,
+}
+
+
+def _retry_after(value: str | None) -> float | None:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def status_exception(status: int, message: str, retry_after: float | None = None) -> ActionFailed:
+    """根据状态码构造对应的异常"""
+    if status == 429:
+        return RateLimitException(message, retry_after=retry_after)
+    if status in _STATUS_EXCEPTIONS:
+        return _STATUS_EXCEPTIONS[status](message)
+    if status >= 500:
+        return ServerException(message)
+    return ActionFailed(message)
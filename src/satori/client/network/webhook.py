@@ -1,7 +1,5 @@
 from __future__ import annotations
 
-import asyncio
-
 from aiohttp import ClientTimeout, web
 from graia.amnesia.builtins.aiohttp import AiohttpClientService
 from launart.manager import Launart
@@ -65,7 +63,7 @@ class WebhookNetwork(BaseNetwork[WebhookInfo]):
             return web.Response(status=500, reason=f"Failed to parse event caused by {e!r}")
         else:
             self.sequence = event.sn
-        asyncio.create_task(self.app.post(event, self))
+        await self.app.scheduler.submit(event, self)
         return web.Response()
 
     @property
@@ -105,23 +103,29 @@ class WebhookNetwork(BaseNetwork[WebhookInfo]):
             for login in meta.logins:
                 if not login.user:
                     continue
-                login_sn = f"{login.platform}_{login.user.id}@{id(self):x}"
-                account = Account(login, self.config, meta.proxy_urls, self.app.default_api_cls)
+                account = Account(
+                    login,
+                    self.config,
+                    meta.proxy_urls,
+                    self.app.default_api_cls,
+                    pool=self.app.pool,
+                    responses=self.app.responses,
+                    entities=self.app.entities,
+                )
                 logger.info(f"account registered: {account}")
                 (account.connected.set() if login.status == LoginStatus.ONLINE else account.connected.clear())
-                self.app.accounts[login_sn] = account
+                login_sn = self.app.accounts.add(account, self)
                 self.accounts[login_sn] = account
                 await self.app.account_update(account, LoginStatus.ONLINE)
             await site.start()
             await manager.status.wait_for_sigexit()
             logger.info(f"{self.id} Webhook server exiting...")
             self.close_signal.set()
-            for v in list(self.app.accounts.values()):
-                if (identity := f"{v.platform}_{v.self_id}@{id(self):x}") in self.accounts:
-                    v.connected.clear()
-                    await self.app.account_update(v, LoginStatus.OFFLINE)
-                    del self.app.accounts[identity]
-                    del self.accounts[identity]
+            for identity, v in list(self.accounts.items()):
+                v.connected.clear()
+                await self.app.account_update(v, LoginStatus.OFFLINE)
+                self.app.accounts.pop(identity, None)
+                del self.accounts[identity]
 
         async with self.stage("cleanup"):
             await site.stop()
@@ -9,7 +9,7 @@ from launart.utilles import any_completed
 from loguru import logger
 
 from satori.model import Event, Identify, LoginStatus, MetaPayload, Opcode, Ready
-from satori.utils import decode, encode
+from satori.utils import MSGPACK_AVAILABLE, decode_frame, encode, encode_msgpack
 
 from ..account import Account
 from ..config import WebsocketsInfo as WebsocketsInfo
@@ -25,6 +25,8 @@ class WsNetwork(BaseNetwork[WebsocketsInfo]):
         return f"satori/net/ws/{self.config.identity}#{id(self):x}"
 
     connection: aiohttp.ClientWebSocketResponse | None = None
+    binary: bool = False
+    """服务端是否接受了 msgpack 编码；为 True 时发送的信令同样以二进制帧编码"""
 
     async def event_parse_task(self, raw: dict):
         try:
@@ -40,7 +42,7 @@ class WsNetwork(BaseNetwork[WebsocketsInfo]):
                 logger.trace(f"Failed to parse event: {raw}\nCaused by {e!r}")
         else:
             self.sequence = event.sn
-            await self.app.post(event, self)
+            await self.app.scheduler.submit(event, self)
 
     async def message_receive(self):
         if self.connection is None:
@@ -56,10 +58,10 @@ class WsNetwork(BaseNetwork[WebsocketsInfo]):
             }:
                 await self.connection_closed()
                 return
-            elif msg.type == aiohttp.WSMsgType.TEXT:
-                data: dict = decode(msg.data)
+            elif msg.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                data: dict = decode_frame(msg.data)
                 if data["op"] == Opcode.EVENT:
-                    asyncio.create_task(self.event_parse_task(data["body"]))
+                    await self.event_parse_task(data["body"])
                 elif data["op"] == Opcode.META:
                     payload = MetaPayload.parse(data["body"])
                     self.proxy_urls = payload.proxy_urls
@@ -75,7 +77,10 @@ class WsNetwork(BaseNetwork[WebsocketsInfo]):
         if self.connection is None:
             raise RuntimeError("connection is not established")
 
-        await self.connection.send_str(encode(payload))
+        if self.binary:
+            await self.connection.send_bytes(encode_msgpack(payload))
+        else:
+            await self.connection.send_str(encode(payload))
 
     @property
     def alive(self):
@@ -88,7 +93,14 @@ class WsNetwork(BaseNetwork[WebsocketsInfo]):
         """鉴权连接"""
         if not self.connection:
             raise RuntimeError("connection is not established")
-        payload = Identify(token=self.config.token)
+        self.binary = False
+        encoding = None
+        if self.config.encoding == "msgpack":
+            if MSGPACK_AVAILABLE:
+                encoding = "msgpack"
+            else:
+                logger.warning("msgpack encoding requires msgspec, falling back to JSON")
+        payload = Identify(token=self.config.token, filter=self.config.filter, encoding=encoding)
         if self.sequence > -1:
             payload.sn = self.sequence
         try:
@@ -98,10 +110,12 @@ class WsNetwork(BaseNetwork[WebsocketsInfo]):
             return False
 
         resp = await self.connection.receive()
-        if resp.type != aiohttp.WSMsgType.TEXT:
+        if resp.type not in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
             logger.error(f"Received unexpected payload: {resp}")
             return False
-        data = decode(cast(str, resp.data))
+        # 服务端不支持 msgpack 时会继续使用 JSON 文本帧
+        self.binary = resp.type == aiohttp.WSMsgType.BINARY
+        data = decode_frame(cast("str | bytes", resp.data))
         if data["op"] != Opcode.READY:
             logger.error(f"Received unexpected payload: {data}")
             return False
@@ -110,22 +124,37 @@ class WsNetwork(BaseNetwork[WebsocketsInfo]):
         for login in ready.logins:
             if not login.user:
                 continue
-            login_sn = f"{login.platform}_{login.user.id}@{id(self):x}"
-            if login_sn in self.app.accounts:
-                account = self.app.accounts[login_sn]
+            if (account := self.app.accounts.lookup(login.platform, login.user.id, self)) is not None:
+                login_sn = self.app.accounts.identity(login.platform, login.user.id, self)
                 self.accounts[login_sn] = account
+                account.self_info = login
                 if login.status == LoginStatus.ONLINE:
                     account.connected.set()
                 else:
                     account.connected.clear()
                 account.config = self.config
             else:
-                account = Account(login, self.config, ready.proxy_urls, self.app.default_api_cls)
+                account = Account(
+                    login,
+                    self.config,
+                    ready.proxy_urls,
+                    self.app.default_api_cls,
+                    pool=self.app.pool,
+                    responses=self.app.responses,
+                    entities=self.app.entities,
+                )
                 logger.info(f"account registered: {account}")
                 (account.connected.set() if login.status == LoginStatus.ONLINE else account.connected.clear())
-                self.app.accounts[login_sn] = account
+                login_sn = self.app.accounts.add(account, self)
                 self.accounts[login_sn] = account
             await self.app.account_update(account, LoginStatus.ONLINE)
+        # 重连后服务端不再提供的账号视为已移除
+        for login_sn, account in self.app.accounts.by_connection(self).items():
+            if login_sn not in self.accounts:
+                logger.info(f"account removed: {account}")
+                account.connected.clear()
+                await self.app.account_update(account, LoginStatus.OFFLINE)
+                del self.app.accounts[login_sn]
         if not self.accounts:
             logger.warning(f"No account available for {self.config}")
             # return False
@@ -143,7 +172,9 @@ class WsNetwork(BaseNetwork[WebsocketsInfo]):
     async def daemon(self, manager: Launart, session: aiohttp.ClientSession):
         while not manager.status.exiting:
             try:
-                async with session.ws_connect(self.config.ws_base / "events", timeout=300) as self.connection:
+                async with session.ws_connect(
+                    self.config.ws_base / "events", timeout=300, compress=15 if self.config.compress else 0
+                ) as self.connection:
                     logger.debug(f"{self.id} Websocket client connected")
                     self.close_signal.clear()
                     result = await self._authenticate()
@@ -166,12 +197,11 @@ class WsNetwork(BaseNetwork[WebsocketsInfo]):
                         await self.connection.close()
                         self.close_signal.set()
                         self.connection = None
-                        for v in list(self.app.accounts.values()):
-                            if (identity := f"{v.platform}_{v.self_id}@{id(self):x}") in self.accounts:
-                                v.connected.clear()
-                                await self.app.account_update(v, LoginStatus.OFFLINE)
-                                del self.app.accounts[identity]
-                                del self.accounts[identity]
+                        for identity, v in list(self.accounts.items()):
+                            v.connected.clear()
+                            await self.app.account_update(v, LoginStatus.OFFLINE)
+                            self.app.accounts.pop(identity, None)
+                            del self.accounts[identity]
                         return
                     if close_task in done:
                         receiver_task.cancel()
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import asyncio
+
+from aiohttp import ClientSession, TCPConnector
+from yarl import URL
+
+
+class SessionPool:
+    """按 API 主机划分的 HTTP 连接池
+
+    同一主机下的全部账号共用一个 `ClientSession`，连接在请求之间保持复用 (keep-alive)，
+    会话在 `App` 退出时统一关闭。
+
+    Args:
+        limit (int): 每个主机的最大并发连接数，为 0 时不限制
+        keepalive_timeout (float): 空闲连接的保持时间 (秒)
+        dns_cache (int | None): DNS 解析结果的缓存时间 (秒)，为 None 时永久缓存
+    """
+
+    def __init__(self, limit: int = 100, keepalive_timeout: float = 30, dns_cache: int | None = 300):
+        self.limit = limit
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache = dns_cache
+        self._sessions: dict[URL, ClientSession] = {}
+
+    def session(self, base: URL) -> ClientSession:
+        """获取 `base` 所在主机的会话"""
+        origin = base.origin()
+        if (session := self._sessions.get(origin)) is None or session.closed:
+            connector = TCPConnector(
+                limit=self.limit,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.dns_cache,
+            )
+            session = self._sessions[origin] = ClientSession(connector=connector)
+        return session
+
+    async def close(self):
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
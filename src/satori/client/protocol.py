@@ -1,15 +1,20 @@
 from __future__ import annotations
 
-from collections.abc import Iterable
+import asyncio
+import functools
+from collections.abc import AsyncGenerator, Callable, Iterable, Mapping
+from os import PathLike
+from pathlib import Path
 from typing import TYPE_CHECKING, Any, cast, overload
 from typing_extensions import deprecated
 
-from aiohttp import BytesPayload, ClientSession, ClientTimeout, FormData
+from aiohttp import BytesPayload, ClientResponse, ClientSession, ClientTimeout, FormData
 from graia.amnesia.builtins.aiohttp import AiohttpClientService
 from launart import Launart
 
 from satori.const import Api
 from satori.element import Element
+from satori.exception import NetworkError
 from satori.model import (
     Channel,
     Direction,
@@ -31,54 +36,209 @@ from satori.model import (
 )
 from satori.utils import encode_bytes
 
-from .network.util import validate_response
+from .bulk import BulkResult, bulk
+from .network.util import status_exception, validate_response
 
 if TYPE_CHECKING:
     from .account import Account
 
 
+def _validator(resp: ClientResponse) -> str | None:
+    """可用于 If-Range 的资源校验值；弱 ETag 不能用于 If-Range"""
+    etag = resp.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return resp.headers.get("Last-Modified")
+
+
+def _content_range(resp: ClientResponse) -> tuple[int | None, int | None]:
+    """解析 Content-Range 响应头，返回 (起始位置, 资源总长度)；无法解析的部分为 None"""
+    unit, _, spec = resp.headers.get("Content-Range", "").partition(" ")
+    if unit != "bytes":
+        return None, None
+    span, _, total = spec.partition("/")
+    start = span.partition("-")[0]
+    return (int(start) if start.isdigit() else None), (int(total) if total.isdigit() else None)
+
+
 class ApiProtocol:
     def __init__(self, account: Account):
         self.account = account
-        try:
-            self.session = Launart.current().get_component(AiohttpClientService).session
-        except (LookupError, ValueError):
-            self.session = ClientSession()
+        if account.pool is not None:
+            self.session = account.pool.session(account.config.api_base)
+        else:
+            try:
+                self.session = Launart.current().get_component(AiohttpClientService).session
+            except (LookupError, ValueError):
+                self.session = ClientSession()
         self.timeout = ClientTimeout(self.account.config.timeout or 300)
+        self._prepared: tuple[Any, str | None, str, dict[str, str], dict[str, str]] | None = None
+
+    def _prepare(self) -> tuple[str, dict[str, str], dict[str, str]]:
+        """按当前配置预先计算的接口前缀、JSON 请求头与表单请求头；配置变更后重新计算"""
+        config = self.account.config
+        prepared = self._prepared
+        if prepared is None or prepared[0] is not config or prepared[1] != config.token:
+            form_headers = {
+                "Authorization": f"Bearer {config.token or ''}",
+                "X-Platform": self.account.platform,
+                "X-Self-ID": self.account.self_id,
+                "Satori-Platform": self.account.platform,
+                "Satori-User-ID": self.account.self_id,
+            }
+            headers = {"Content-Type": "application/json", **form_headers}
+            prepared = self._prepared = (config, config.token, str(config.api_base), headers, form_headers)
+        return prepared[2], prepared[3], prepared[4]
+
+    async def download(self, url: str, cache: bool = True) -> bytes:
+        """访问资源链接。
 
-    async def download(self, url: str) -> bytes:
-        """访问资源链接。"""
+        Args:
+            url (str): 资源链接
+            cache (bool): 是否允许使用服务端的资源缓存，可传入 `Resource.cache`
+        """
         endpoint = self.account.ensure_url(url)
-        aio = Launart.current().get_component(AiohttpClientService)
-        async with aio.session.get(endpoint) as resp:
+        headers = {} if cache else {"Cache-Control": "no-cache"}
+        async with self.session.get(endpoint, headers=headers) as resp:
             await validate_response(resp, noreturn=True)
             return await resp.read()
 
+    async def download_stream(
+        self,
+        url: str,
+        cache: bool = True,
+        *,
+        offset: int = 0,
+        if_range: str | None = None,
+        chunk_size: int = 65536,
+    ) -> AsyncGenerator[bytes, None]:
+        """以流的形式访问资源链接，逐块返回内容。
+
+        Args:
+            url (str): 资源链接
+            cache (bool): 是否允许使用服务端的资源缓存，可传入 `Resource.cache`
+            offset (int): 起始位置；通过 Range 请求获取，服务端不支持 Range 时跳过之前的内容
+            if_range (str | None): 之前获取到的资源 ETag 或 Last-Modified，随 Range 请求发送；
+                资源已变化时抛出 `NetworkError`，而不是返回新资源的后半部分
+            chunk_size (int): 每块的最大字节数
+        """
+        endpoint = self.account.ensure_url(url)
+        headers = {} if cache else {"Cache-Control": "no-cache"}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            if if_range:
+                headers["If-Range"] = if_range
+        async with self.session.get(endpoint, headers=headers) as resp:
+            if offset and resp.status == 416:
+                if _content_range(resp)[1] == offset:
+                    # 起始位置恰好为资源长度，即之前已经下载完整
+                    return
+                raise NetworkError(f"Range starting at {offset} does not match the resource length")
+            await validate_response(resp, noreturn=True)
+            skip = 0
+            if offset and resp.status == 206:
+                if _content_range(resp)[0] != offset:
+                    raise NetworkError(f"Server returned a range that does not start at {offset}")
+            elif offset:
+                if if_range:
+                    raise NetworkError("Resource has changed since it was partially downloaded")
+                skip = offset
+            async for chunk in resp.content.iter_chunked(chunk_size):
+                if skip:
+                    if len(chunk) <= skip:
+                        skip -= len(chunk)
+                        continue
+                    chunk, skip = chunk[skip:], 0
+                yield chunk
+
+    async def download_to(
+        self, url: str, path: str | PathLike[str], cache: bool = True, *, resume: bool = False, chunk_size: int = 65536
+    ) -> int:
+        """将资源链接的内容写入文件，内存中至多保留一块数据。
+
+        `resume` 为 True 时，下载期间会在 `{path}.resume` 中记录资源的 ETag 或 Last-Modified。
+        再次下载时若存在该记录，则以 Range 与 If-Range 请求从文件末尾继续；资源已变化或与本地文件不符时重新下载。
+        没有记录的已有文件不会被续传，而是被覆盖。
+
+        Args:
+            url (str): 资源链接
+            path (str | PathLike[str]): 目标文件路径
+            cache (bool): 是否允许使用服务端的资源缓存，可传入 `Resource.cache`
+            resume (bool): 是否启用断点续传
+            chunk_size (int): 每块的最大字节数
+
+        Returns:
+            int: 文件的总字节数
+        """
+        path = Path(path)
+        marker = path.with_name(f"{path.name}.resume")
+        offset = 0
+        validator = None
+        if resume and path.is_file() and marker.is_file():
+            if validator := (await asyncio.to_thread(marker.read_text)).strip():
+                offset = path.stat().st_size
+        endpoint = self.account.ensure_url(url)
+        while True:
+            headers = {} if cache else {"Cache-Control": "no-cache"}
+            if offset:
+                headers |= {"Range": f"bytes={offset}-", "If-Range": validator}  # type: ignore
+            async with self.session.get(endpoint, headers=headers) as resp:
+                if offset and resp.status == 416:
+                    if _content_range(resp)[1] == offset:
+                        await asyncio.to_thread(marker.unlink, True)
+                        return offset
+                    # 本地文件比资源更长，不是同一资源
+                    offset = 0
+                    continue
+                await validate_response(resp, noreturn=True)
+                if offset and resp.status == 206 and _content_range(resp)[0] != offset:
+                    offset = 0
+                    continue
+                if resp.status != 206:
+                    # If-Range 不匹配或服务端不支持 Range 时返回完整内容
+                    offset = 0
+                if resume:
+                    if validator := _validator(resp):
+                        await asyncio.to_thread(marker.write_text, validator)
+                    else:
+                        await asyncio.to_thread(marker.unlink, True)
+                file = await asyncio.to_thread(path.open, "ab" if offset else "wb")
+                size = offset
+                try:
+                    async for chunk in resp.content.iter_chunked(chunk_size):
+                        await asyncio.to_thread(file.write, chunk)
+                        size += len(chunk)
+                finally:
+                    await asyncio.to_thread(file.close)
+                if resume:
+                    await asyncio.to_thread(marker.unlink, True)
+                return size
+
     async def request_internal(self, url: str, method: str = "GET", **kwargs) -> dict:
         """访问内部链接。"""
         endpoint = self.account.ensure_url(url)
-        aio = Launart.current().get_component(AiohttpClientService)
-        async with aio.session.request(method, endpoint, **kwargs) as resp:
+        async with self.session.request(method, endpoint, **kwargs) as resp:
             return await validate_response(resp)
 
     async def call_api(
         self, action: str | Api, params: dict | None = None, multipart: bool = False, method: str = "POST"
     ) -> dict:
-        endpoint = f"{self.account.config.api_base!s}/{action.value if isinstance(action, Api) else action}"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.account.config.token or ''}",
-            "X-Platform": self.account.platform,
-            "X-Self-ID": self.account.self_id,
-            "Satori-Platform": self.account.platform,
-            "Satori-User-ID": self.account.self_id,
-        }
+        action = action.value if isinstance(action, Api) else action
+        if self.account.responses is not None and not multipart:
+            return await self.account.responses.call(
+                self.account, action, params, lambda: self._request(action, params, method)
+            )
+        return await self._request(action, params, method, multipart)
+
+    async def _request(self, action: str, params: dict | None, method: str = "POST", multipart: bool = False) -> dict:
+        base, headers, form_headers = self._prepare()
+        endpoint = f"{base}/{action}"
 
         if multipart:
             data = FormData(quote_fields=False)
             if params is None:
                 raise TypeError("multipart requires params")
-            headers.pop("Content-Type")
+            headers = form_headers
             for k, v in params.items():
                 if isinstance(v, dict):
                     data.add_field(k, v["value"], filename=v.get("filename"), content_type=v["content_type"])
@@ -104,6 +264,72 @@ class ApiProtocol:
         ) as resp:
             return await validate_response(resp)
 
+    async def batch(self, *calls: tuple[str | Api, dict | None]) -> list[Any]:
+        """批量调用接口。
+
+        所有调用会合并为一次请求发送至服务端的 batch 接口，由服务端并发执行。
+
+        Args:
+            *calls (tuple[str | Api, dict | None]): 由接口名称与参数构成的调用
+
+        Returns:
+            list[Any]: 与调用顺序一致的结果列表；调用失败时对应位置为 `ActionFailed` 异常对象
+        """
+        if not calls:
+            return []
+        payload = [
+            {"action": action.value if isinstance(action, Api) else action, "params": params or {}}
+            for action, params in calls
+        ]
+        res = await self.call_api("batch", payload)  # type: ignore
+        res = cast("list[dict]", res)
+        return [
+            (
+                item.get("data")
+                if 200 <= item["status"] < 300
+                else status_exception(item["status"], item.get("message", ""), item.get("retry_after"))
+            )
+            for item in res
+        ]
+
+    async def bulk(
+        self,
+        action: str | Api,
+        params: Iterable[dict],
+        *,
+        concurrency: int = 8,
+        batch_size: int | None = None,
+        max_retries: int = 3,
+        retry_delay: float = 1,
+    ) -> BulkResult:
+        """对多个目标批量调用同一接口。
+
+        各项以 `concurrency` 为上限并发调用；遇到频率限制 (`RateLimitException`) 时所有调用暂停
+        `retry_after` 秒 (未给出时按 `retry_delay` 指数退避) 后重试，至多重试 `max_retries` 次。
+
+        指定 `batch_size` 时，每 `batch_size` 项合并为一次服务端 batch 请求；服务端不支持 batch 时自动改为逐项调用。
+
+        Args:
+            action (str | Api): 接口名称
+            params (Iterable[dict]): 各项的参数
+            concurrency (int): 同时进行的调用 (或 batch 请求) 数
+            batch_size (int | None): 每次 batch 请求包含的项数，为 None 时逐项调用
+            max_retries (int): 频率限制下的最大重试次数
+            retry_delay (float): 未给出重试时间时的初始退避时长 (秒)
+
+        Returns:
+            BulkResult: 与输入顺序一致的各项结果与异常
+        """
+        return await bulk(
+            self,
+            action,
+            params,
+            concurrency=concurrency,
+            batch_size=batch_size,
+            max_retries=max_retries,
+            retry_delay=retry_delay,
+        )
+
     async def send(self, event: Event, message: str | Iterable[str | Element]) -> list[MessageObject]:
         """发送消息。返回一个 `MessageObject` 对象构成的数组。
 
@@ -297,7 +523,9 @@ class ApiProtocol:
             Api.CHANNEL_GET,
             {"channel_id": channel_id},
         )
-        return Channel.parse(res)
+        channel = Channel.parse(res)
+        self.account.entities.put_channel(self.account.platform, channel)
+        return channel
 
     def channel_list(self, guild_id: str, next_token: str | None = None) -> IterablePageResult[Channel]:
         """获取群组中的全部频道。返回一个 Channel 的分页列表。
@@ -315,7 +543,9 @@ class ApiProtocol:
                 Api.CHANNEL_LIST,
                 {"guild_id": guild_id, "next": token},
             )
-            return PageResult.parse(res, Channel.parse)
+            page = PageResult.parse(res, Channel.parse)
+            self.account.entities.put_many(self.account.platform, page.data)
+            return page
 
         return IterablePageResult(_, next_token)
 
@@ -416,7 +646,9 @@ class ApiProtocol:
             Api.GUILD_GET,
             {"guild_id": guild_id},
         )
-        return Guild.parse(res)
+        guild = Guild.parse(res)
+        self.account.entities.put_guild(self.account.platform, guild)
+        return guild
 
     def guild_list(self, next_token: str | None = None) -> IterablePageResult[Guild]:
         """获取当前用户加入的全部群组。返回一个 Guild 的分页列表。
@@ -433,7 +665,9 @@ class ApiProtocol:
                 Api.GUILD_LIST,
                 {"next": token},
             )
-            return PageResult.parse(res, Guild.parse)
+            page = PageResult.parse(res, Guild.parse)
+            self.account.entities.put_many(self.account.platform, page.data)
+            return page
 
         return IterablePageResult(_, next_token)
 
@@ -469,7 +703,9 @@ class ApiProtocol:
                 Api.GUILD_MEMBER_LIST,
                 {"guild_id": guild_id, "next": token},
             )
-            return PageResult.parse(res, Member.parse)
+            page = PageResult.parse(res, Member.parse)
+            self.account.entities.put_many(self.account.platform, page.data, guild_id)
+            return page
 
         return IterablePageResult(_, next_token)
 
@@ -487,7 +723,9 @@ class ApiProtocol:
             Api.GUILD_MEMBER_GET,
             {"guild_id": guild_id, "user_id": user_id},
         )
-        return Member.parse(res)
+        member = Member.parse(res)
+        self.account.entities.put_member(self.account.platform, guild_id, member, User(user_id))
+        return member
 
     async def guild_member_kick(self, guild_id: str, user_id: str, permanent: bool = False) -> None:
         """将某个用户踢出群组。
@@ -749,7 +987,9 @@ class ApiProtocol:
 
         async def _(token: str | None):
             res = await self.call_api(Api.FRIEND_LIST, {"next": token})
-            return PageResult.parse(res, Friend.parse)
+            page = PageResult.parse(res, Friend.parse)
+            self.account.entities.put_many(self.account.platform, page.data)
+            return page
 
         return IterablePageResult(_, next_token)
 
@@ -790,7 +1030,9 @@ class ApiProtocol:
             User: `User` 对象
         """
         res = await self.call_api(Api.USER_GET, {"user_id": user_id})
-        return User.parse(res)
+        user = User.parse(res)
+        self.account.entities.put_user(self.account.platform, user)
+        return user
 
     async def internal(self, action: str, method: str = "POST", **kwargs) -> Any:
         """内部接口调用。
@@ -821,9 +1063,18 @@ class ApiProtocol:
         res = await self.call_api("admin/login.list")
         return [LoginPartial.parse(i) for i in res]
 
-    async def webhook_create(self, url: str, token: str | None = None):
-        """创建 Webhook。"""
-        await self.call_api("meta/webhook.create", {"url": url, "token": token})
+    async def webhook_create(self, url: str, token: str | None = None, filter: dict[str, list[str]] | None = None):
+        """创建 Webhook。
+
+        Args:
+            url (str): Webhook 地址
+            token (str | None): 推送事件时使用的鉴权令牌
+            filter (dict[str, list[str]] | None): 事件订阅过滤器，见 `Identify.filter`
+        """
+        data: dict = {"url": url, "token": token}
+        if filter is not None:
+            data["filter"] = filter
+        await self.call_api("meta/webhook.create", data)
 
     async def webhook_delete(self, url: str):
         """删除 Webhook。"""
@@ -843,16 +1094,78 @@ class ApiProtocol:
         """
         if args and kwargs:
             raise RuntimeError("upload can't accept both args and kwargs")
-        if args:
-            ids = []
-            for upload in args:
-                ids.append(str(id(upload)))
-            resp = await self.call_api(
-                Api.UPLOAD_CREATE, {name: upload.dump() for name, upload in zip(ids, args)}, multipart=True
-            )
-            return list(resp.values())
-        return await self.call_api(
-            Api.UPLOAD_CREATE, {k: upload.dump() for k, upload in kwargs.items()}, multipart=True
-        )
+        return await self.upload_files(kwargs if kwargs else args)
 
     upload = upload_create
+
+    @overload
+    async def upload_files(
+        self,
+        uploads: Mapping[str, Upload],
+        *,
+        progress: Callable[[str, int, int | None], Any] | None = None,
+        chunk_size: int = 65536,
+        concurrency: int | None = None,
+    ) -> dict[str, str]: ...
+
+    @overload
+    async def upload_files(
+        self,
+        uploads: Iterable[Upload],
+        *,
+        progress: Callable[[str, int, int | None], Any] | None = None,
+        chunk_size: int = 65536,
+        concurrency: int | None = None,
+    ) -> list[str]: ...
+
+    async def upload_files(
+        self,
+        uploads: Iterable[Upload] | Mapping[str, Upload],
+        *,
+        progress: Callable[[str, int, int | None], Any] | None = None,
+        chunk_size: int = 65536,
+        concurrency: int | None = None,
+    ):
+        """上传文件，文件内容以流的形式发送而不会整体读入内存。
+
+        Args:
+            uploads (Iterable[Upload] | Mapping[str, Upload]): 要上传的文件；传入映射时以其键作为字段名
+            progress (Callable[[str, int, int | None], Any] | None): 进度回调，
+                以 (字段名, 已发送字节数, 总字节数) 调用；总字节数无法预先得知时为 None
+            chunk_size (int): 每块的最大字节数
+            concurrency (int | None): 为 None 时所有文件在一次请求中上传；
+                否则每个文件单独请求，至多同时进行 `concurrency` 个
+
+        Returns:
+            list[str] | dict[str, str]: 与传入顺序一致的链接列表；传入映射时为字段名到链接的映射
+        """
+        named = dict(uploads) if isinstance(uploads, Mapping) else {str(i): upload for i, upload in enumerate(uploads)}
+
+        def part(name: str, upload: Upload) -> dict:
+            if isinstance(upload.file, bytes) and progress is None:
+                return upload.dump()
+            callback = None if progress is None else functools.partial(progress, name)
+            return {
+                "value": upload.stream(chunk_size, callback),
+                # 没有文件名的字段会被服务端当作普通表单字段读入内存
+                "filename": upload.name or name,
+                "content_type": upload.mimetype,
+            }
+
+        if concurrency is None or len(named) <= 1:
+            resp = await self.call_api(
+                Api.UPLOAD_CREATE, {name: part(name, upload) for name, upload in named.items()}, multipart=True
+            )
+        else:
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def single(name: str, upload: Upload) -> dict:
+                async with semaphore:
+                    return await self.call_api(Api.UPLOAD_CREATE, {name: part(name, upload)}, multipart=True)
+
+            resp = {}
+            for result in await asyncio.gather(*(single(name, upload) for name, upload in named.items())):
+                resp.update(result)
+        if isinstance(uploads, Mapping):
+            return resp
+        return [resp[name] for name in named]
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from collections.abc import Iterator, MutableMapping
+from typing import TYPE_CHECKING
+
+from .account import Account
+
+if TYPE_CHECKING:
+    from .network.base import BaseNetwork
+
+AccountKey = tuple[str, str, int]
+"""(platform, self_id, id(connection))"""
+
+
+class AccountRegistry(MutableMapping[str, Account]):
+    """客户端的账号表
+
+    账号以 (platform, self_id, 所属连接) 为主键索引，并按 `self_id`、`platform` 与所属连接建立二级索引，
+    因此事件分发与按 ID 查找账号均无需遍历全部账号。
+
+    为保持兼容，账号表仍可作为以 `"{platform}_{self_id}@{id(connection):x}"` 为键的字典使用，
+    通过字典接口进行的增删同样会维护各个索引。
+    """
+
+    def __init__(self):
+        self._data: dict[str, Account] = {}
+        self._keys: dict[str, AccountKey] = {}
+        self._index: dict[AccountKey, str] = {}
+        self._by_self_id: dict[str, dict[str, Account]] = {}
+        self._by_platform: dict[str, dict[str, Account]] = {}
+        self._by_conn: dict[int, dict[str, Account]] = {}
+
+    @staticmethod
+    def identity(platform: str | None, self_id: str, conn: BaseNetwork) -> str:
+        """账号在字典接口中使用的键"""
+        return f"{platform}_{self_id}@{id(conn):x}"
+
+    @staticmethod
+    def _parse_conn(login_sn: str) -> int:
+        _, sep, conn = login_sn.rpartition("@")
+        try:
+            return int(conn, 16) if sep else 0
+        except ValueError:
+            return 0
+
+    def __getitem__(self, login_sn: str) -> Account:
+        return self._data[login_sn]
+
+    def __setitem__(self, login_sn: str, account: Account):
+        key = (account.platform, account.self_id, self._parse_conn(login_sn))
+        if login_sn in self._data:
+            self._unlink(login_sn)
+        if (previous := self._index.get(key)) is not None:
+            self._unlink(previous)
+        self._data[login_sn] = account
+        self._keys[login_sn] = key
+        self._index[key] = login_sn
+        self._by_self_id.setdefault(key[1], {})[login_sn] = account
+        self._by_platform.setdefault(key[0], {})[login_sn] = account
+        self._by_conn.setdefault(key[2], {})[login_sn] = account
+
+    def __delitem__(self, login_sn: str):
+        if login_sn not in self._data:
+            raise KeyError(login_sn)
+        self._unlink(login_sn)
+
+    def _unlink(self, login_sn: str):
+        del self._data[login_sn]
+        platform, self_id, conn = key = self._keys.pop(login_sn)
+        del self._index[key]
+        for index, value in ((self._by_self_id, self_id), (self._by_platform, platform), (self._by_conn, conn)):
+            bucket = index[value]
+            del bucket[login_sn]
+            if not bucket:
+                del index[value]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, login_sn: object):
+        return login_sn in self._data
+
+    def __repr__(self):
+        return f"AccountRegistry({self._data!r})"
+
+    def clear(self):
+        self._data.clear()
+        self._keys.clear()
+        self._index.clear()
+        self._by_self_id.clear()
+        self._by_platform.clear()
+        self._by_conn.clear()
+
+    def add(self, account: Account, conn: BaseNetwork) -> str:
+        """登记来自某一连接的账号，返回其在字典接口中的键"""
+        login_sn = self.identity(account.self_info.platform, account.self_id, conn)
+        self[login_sn] = account
+        return login_sn
+
+    def lookup(self, platform: str | None, self_id: str, conn: BaseNetwork) -> Account | None:
+        """按 (platform, self_id, 所属连接) 查找账号"""
+        if (login_sn := self._index.get((platform or "satori", self_id, id(conn)))) is None:
+            return None
+        return self._data[login_sn]
+
+    def by_self_id(self, self_id: str) -> list[Account]:
+        return list(self._by_self_id.get(self_id, {}).values())
+
+    def by_platform(self, platform: str) -> list[Account]:
+        return list(self._by_platform.get(platform, {}).values())
+
+    def by_connection(self, conn: BaseNetwork) -> dict[str, Account]:
+        """某一连接下的全部账号，以字典接口中的键为键"""
+        return dict(self._by_conn.get(id(conn), {}))
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Literal
+
+from loguru import logger
+
+from satori.const import EventType
+from satori.model import Event
+
+if TYPE_CHECKING:
+    from .network.base import BaseNetwork
+
+LOGIN_EVENTS = frozenset({EventType.LOGIN_ADDED, EventType.LOGIN_UPDATED, EventType.LOGIN_REMOVED})
+INTERACTION_EVENTS = frozenset({EventType.INTERACTION_BUTTON, EventType.INTERACTION_COMMAND})
+
+LANE_LOGIN = 0
+LANE_INTERACTION = 1
+LANE_DEFAULT = 2
+
+OverflowPolicy = Literal["block", "drop-new", "drop-oldest"]
+
+
+@dataclass(eq=False)
+class _Item:
+    event: Event
+    conn: BaseNetwork
+    lane: int
+    key: tuple
+    submitted_at: float
+
+
+@dataclass
+class SchedulerStats:
+    submitted: int = 0
+    processed: int = 0
+    dropped: int = 0
+    """因队列已满被丢弃的事件数"""
+    failed: int = 0
+    last_lag: float = 0.0
+    """最近一个事件从接收到开始处理的间隔 (秒)"""
+    max_lag: float = 0.0
+    lane_depth: list[int] = field(default_factory=lambda: [0, 0, 0])
+    """各通道 (登录、交互、其他) 中等待处理的事件数"""
+
+    @property
+    def depth(self) -> int:
+        """等待处理的事件总数"""
+        return sum(self.lane_depth)
+
+
+class EventScheduler:
+    """客户端的事件调度器
+
+    事件由固定数量的工作协程处理，同一频道 (无频道时为同一用户) 的事件按接收顺序依次处理，不同频道之间并发。
+    登录事件与交互事件分别进入优先通道，先于其他事件被处理。
+
+    等待处理的事件数达到 `max_pending` 时按 `overflow` 处理新事件:
+
+    - `block`: 等待队列空出，接收端因此停止读取，从而向服务端施加背压
+    - `drop-new`: 丢弃新事件
+    - `drop-oldest`: 丢弃最早的尚未开始处理的事件
+
+    登录事件不会被丢弃。
+
+    工作协程由 `start` 启动；未启动时 (如 App 未由 Launart 启动) 每个事件在单独的任务中交给处理函数，不会阻塞接收端。
+
+    Args:
+        workers (int): 工作协程数
+        max_pending (int): 等待处理的事件数上限
+        overflow (OverflowPolicy): 队列已满时的处理方式
+    """
+
+    def __init__(self, workers: int = 32, max_pending: int = 10000, overflow: OverflowPolicy = "block"):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.workers = workers
+        self.max_pending = max_pending
+        self.overflow = overflow
+        self.stats = SchedulerStats()
+        self.handler: Callable[[Event, BaseNetwork], Awaitable[Any]] | None = None
+        self._pending: dict[tuple, deque[_Item]] = {}
+        self._active: set[tuple] = set()
+        self._ready: tuple[deque[tuple], ...] = (deque(), deque(), deque())
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        self._detached: set[asyncio.Task] = set()
+
+    @staticmethod
+    def lane(event: Event) -> int:
+        if event.type in LOGIN_EVENTS:
+            return LANE_LOGIN
+        if event.type in INTERACTION_EVENTS:
+            return LANE_INTERACTION
+        return LANE_DEFAULT
+
+    @staticmethod
+    def key(event: Event, conn: BaseNetwork, lane: int) -> tuple:
+        """同一键下的事件按顺序处理"""
+        login = event.login
+        self_id = login.user.id if login.user else ""
+        if lane == LANE_LOGIN:
+            return id(conn), login.platform, self_id
+        if event.channel:
+            return id(conn), login.platform, self_id, "channel", event.channel.id
+        if event.user:
+            return id(conn), login.platform, self_id, "user", event.user.id
+        return id(conn), login.platform, self_id
+
+    def _drop_oldest(self) -> bool:
+        """丢弃最早的尚未开始处理的非登录事件"""
+        oldest: deque[_Item] | None = None
+        for queue in self._pending.values():
+            if (
+                queue
+                and queue[0].lane != LANE_LOGIN
+                and (oldest is None or queue[0].submitted_at < oldest[0].submitted_at)
+            ):
+                oldest = queue
+        if oldest is None:
+            return False
+        # 队列变空时保留在 _pending 中，由 _next 或 _finish 清理
+        item = oldest.popleft()
+        self.stats.lane_depth[item.lane] -= 1
+        self.stats.dropped += 1
+        logger.warning(f"Event queue is full, dropped event {item.event.type}#{item.event.sn}")
+        return True
+
+    def _has_room(self, lane: int) -> bool:
+        if lane == LANE_LOGIN or self.stats.depth < self.max_pending:
+            return True
+        return self.overflow == "drop-oldest" and self._drop_oldest()
+
+    async def submit(self, event: Event, conn: BaseNetwork):
+        """提交事件；队列已满且策略为 `block` 时等待"""
+        if not self._tasks:
+            if self.handler is None:
+                raise RuntimeError("EventScheduler has no handler")
+            self.stats.submitted += 1
+            task = asyncio.create_task(self._handle(event, conn))
+            self._detached.add(task)
+            task.add_done_callback(self._detached.discard)
+            return
+        lane = self.lane(event)
+        while not self._has_room(lane):
+            if self.overflow != "block":
+                self.stats.dropped += 1
+                logger.warning(f"Event queue is full, dropped event {event.type}#{event.sn}")
+                return
+            self._space.clear()
+            await self._space.wait()
+        item = _Item(event, conn, lane, self.key(event, conn, lane), time.monotonic())
+        self.stats.submitted += 1
+        self.stats.lane_depth[lane] += 1
+        if (queue := self._pending.get(item.key)) is None:
+            queue = self._pending[item.key] = deque()
+            if item.key not in self._active:
+                self._ready[lane].append(item.key)
+        queue.append(item)
+        self._wakeup.set()
+
+    def _next(self) -> _Item | None:
+        for ready in self._ready:
+            while ready:
+                key = ready.popleft()
+                if not (queue := self._pending[key]):
+                    del self._pending[key]
+                    continue
+                item = queue.popleft()
+                if not queue:
+                    del self._pending[key]
+                self._active.add(key)
+                self.stats.lane_depth[item.lane] -= 1
+                return item
+        return None
+
+    def _finish(self, item: _Item):
+        self._active.discard(item.key)
+        if queue := self._pending.get(item.key):
+            self._ready[queue[0].lane].append(item.key)
+            self._wakeup.set()
+        elif queue is not None:
+            del self._pending[item.key]
+        self._space.set()
+
+    async def _worker(self):
+        while True:
+            if (item := self._next()) is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            lag = time.monotonic() - item.submitted_at
+            self.stats.last_lag = lag
+            self.stats.max_lag = max(self.stats.max_lag, lag)
+            try:
+                await self._handle(item.event, item.conn)
+            finally:
+                self._finish(item)
+
+    async def _handle(self, event: Event, conn: BaseNetwork):
+        try:
+            await self.handler(event, conn)  # type: ignore
+        except Exception as e:
+            self.stats.failed += 1
+            logger.exception(f"Failed to handle event {event.type}#{event.sn}: {e!r}")
+        finally:
+            self.stats.processed += 1
+
+    def start(self, handler: Callable[[Event, BaseNetwork], Awaitable[Any]]):
+        self.handler = handler
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        tasks = [*self._tasks, *self._detached]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
@@ -28,6 +28,17 @@ class MethodNotAllowedException(ActionFailed):
     pass
 
 
+class RateLimitException(ActionFailed):
+    """调用频率超过限制；`retry_after` 为建议的重试等待时间 (秒)"""
+
+    CODE = 429
+    retry_after: float | None = None
+
+    def __init__(self, *args, retry_after: float | None = None):
+        super().__init__(*args)
+        self.retry_after = retry_after
+
+
 class ServerException(ActionFailed):
     CODE = 500
     pass
@@ -1,7 +1,12 @@
+import asyncio
+import io
 import mimetypes
+import os
+import stat
 import sys
 import typing
-from collections.abc import AsyncIterable, Awaitable, Callable
+from collections.abc import AsyncGenerator, AsyncIterable, Awaitable, Callable
+from contextlib import aclosing
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import IntEnum
@@ -306,19 +311,24 @@ class Opcode(IntEnum):
 class Identify(ModelBase):
     token: str | None = None
     sn: int | None = None
+    filter: dict[str, list[str]] | None = None
+    """事件订阅过滤器，可包含 platforms, self_ids, types, channels, guilds 字段"""
+    encoding: str | None = None
+    """期望的信令编码方式，为 `msgpack` 时服务端以二进制帧发送 msgpack 编码的信令"""
 
     @classmethod
     def parse(cls, raw: dict):
         if "sequence" in raw and "sn" not in raw:
             raw["sn"] = raw["sequence"]
-        return cls(token=raw.get("token"), sn=raw.get("sn"))
+        return cls(token=raw.get("token"), sn=raw.get("sn"), filter=raw.get("filter"), encoding=raw.get("encoding"))
 
     @property
     def sequence(self) -> int | None:
         return self.sn
 
     def dump(self):
-        return {k: v for k, v in (("token", self.token), ("sn", self.sn)) if v is not None}
+        fields = (("token", self.token), ("sn", self.sn), ("filter", self.filter), ("encoding", self.encoding))
+        return {k: v for k, v in fields if v is not None}
 
 
 @dataclass(slots=True)
@@ -585,24 +595,94 @@ class PageDequeResult(PageResult[T]):
 
 
 class IterablePageResult(Generic[T], AsyncIterable[T], Awaitable[PageResult[T]]):
-    def __init__(self, func: Callable[[str | None], Awaitable[PageResult[T]]], initial_page: str | None = None):
+    """可异步迭代的分页结果
+
+    直接 `await` 时返回当前页；迭代时依次获取后续各页。迭代期间会在消费当前页的同时请求下一页，
+    最多预先获取 `prefetch` 页，为 0 时只在当前页消费完毕后才请求下一页。
+
+    迭代中途退出 (`break`、异常或任务被取消) 时，尚未完成的预取请求会被取消。
+
+    Args:
+        func (Callable[[str | None], Awaitable[PageResult[T]]]): 按分页令牌获取一页的函数
+        initial_page (str | None): 起始的分页令牌
+        prefetch (int): 预先获取的页数
+    """
+
+    def __init__(
+        self,
+        func: Callable[[str | None], Awaitable[PageResult[T]]],
+        initial_page: str | None = None,
+        prefetch: int = 1,
+    ):
         self.func = func
         self.next_page = initial_page
+        self.prefetch = prefetch
 
     def __await__(self):
         return self.func(self.next_page).__await__()
 
-    def __aiter__(self):
-        async def _gen():
+    async def pages(self, prefetch: int | None = None) -> AsyncGenerator[PageResult[T], None]:
+        """依次获取各页；`prefetch` 缺省时使用创建时的设置"""
+        depth = self.prefetch if prefetch is None else prefetch
+        if depth <= 0:
             while True:
                 result = await self.func(self.next_page)
-                for item in result.data:
-                    yield item
                 self.next_page = result.next
+                yield result
+                if not self.next_page:
+                    return
+
+        buffer: asyncio.Queue[PageResult[T] | Exception] = asyncio.Queue(depth)
+
+        async def fetch(token: str | None):
+            try:
+                while True:
+                    page = await self.func(token)
+                    await buffer.put(page)
+                    if not (token := page.next):
+                        return
+            except Exception as e:
+                await buffer.put(e)
+
+        task = asyncio.create_task(fetch(self.next_page))
+        try:
+            while True:
+                page = await buffer.get()
+                if isinstance(page, Exception):
+                    raise page
+                self.next_page = page.next
+                yield page
                 if not self.next_page:
+                    return
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def _items(self, prefetch: int | None = None) -> AsyncGenerator[T, None]:
+        async with aclosing(self.pages(prefetch)) as pages:
+            async for page in pages:
+                for item in page.data:
+                    yield item
+
+    def __aiter__(self):
+        return self._items()
+
+    async def collect(self, limit: int | None = None, prefetch: int | None = None) -> list[T]:
+        """获取至多 `limit` 个元素，为 None 时获取全部元素"""
+        items: list[T] = []
+        if limit is not None and limit <= 0:
+            return items
+        async with aclosing(self.pages(prefetch)) as pages:
+            async for page in pages:
+                items.extend(page.data)
+                if limit is not None and len(items) >= limit:
+                    del items[limit:]
                     break
+        return items
 
-        return _gen()
+    async def to_list(self) -> list[T]:
+        """获取全部元素"""
+        return await self.collect()
 
 
 Direction: TypeAlias = Literal["before", "after", "around"]
@@ -611,7 +691,7 @@ Order: TypeAlias = Literal["asc", "desc"]
 
 @dataclass(slots=True)
 class Upload:
-    file: bytes | IO[bytes] | PathLike
+    file: bytes | IO[bytes] | PathLike | AsyncIterable[bytes]
     mimetype: str = "image/png"
     name: str | None = None
 
@@ -627,3 +707,69 @@ class Upload:
             file = open(file, "rb")
 
         return {"value": file, "filename": self.name, "content_type": self.mimetype}
+
+    @property
+    def size(self) -> int | None:
+        """剩余待上传的字节数；无法预先得知时为 None"""
+        file = self.file
+        if isinstance(file, bytes):
+            return len(file)
+        if isinstance(file, PathLike):
+            return Path(file).stat().st_size
+        if isinstance(file, AsyncIterable):
+            return None
+        try:
+            if isinstance(file, (io.FileIO, io.BufferedReader, io.BufferedRandom)):
+                # 磁盘文件直接读取元数据，管道等非普通文件改为通过 seek 确定
+                status = os.fstat(file.fileno())
+                if stat.S_ISREG(status.st_mode):
+                    return status.st_size - file.tell()
+            if not file.seekable():
+                return None
+            # SpooledTemporaryFile、BytesIO 等对象调用 fileno 会迫使其写入磁盘，这里只移动读写位置
+            position = file.tell()
+            end = file.seek(0, os.SEEK_END)
+            file.seek(position)
+            return end - position
+        except (AttributeError, OSError, ValueError):
+            return None
+
+    async def stream(
+        self, chunk_size: int = 65536, progress: Callable[[int, int | None], Any] | None = None
+    ) -> AsyncGenerator[bytes, None]:
+        """逐块读取文件内容，路径与文件对象在线程池中读取
+
+        Args:
+            chunk_size (int): 每块的最大字节数
+            progress (Callable[[int, int | None], Any] | None): 每块被读取后以 (已读取字节数, 总字节数) 调用
+        """
+        total = self.size
+        sent = 0
+        file = self.file
+        if isinstance(file, bytes):
+            chunks: AsyncIterable[bytes] = _iter_bytes(file, chunk_size)
+        elif isinstance(file, AsyncIterable):
+            chunks = file
+        else:
+            chunks = _iter_file(file, chunk_size)
+        async for chunk in chunks:
+            yield chunk
+            sent += len(chunk)
+            if progress is not None:
+                progress(sent, total)
+
+
+async def _iter_bytes(data: bytes, chunk_size: int) -> AsyncGenerator[bytes, None]:
+    view = memoryview(data)
+    for i in range(0, len(view), chunk_size):
+        yield bytes(view[i : i + chunk_size])
+
+
+async def _iter_file(file: IO[bytes] | PathLike, chunk_size: int) -> AsyncGenerator[bytes, None]:
+    fp = await asyncio.to_thread(open, file, "rb") if isinstance(file, PathLike) else file
+    try:
+        while chunk := await asyncio.to_thread(fp.read, chunk_size):
+            yield chunk
+    finally:
+        if fp is not file:
+            await asyncio.to_thread(fp.close)
@@ -2,14 +2,17 @@ from __future__ import annotations
 
 import asyncio
 import functools
+import math
 import mimetypes
 import re
 import secrets
 import signal
+import socket
 import threading
 import urllib.parse
-from collections.abc import Awaitable, Callable, Iterable
-from contextlib import suppress
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from contextlib import AbstractContextManager, suppress
+from datetime import datetime
 from itertools import chain
 from pathlib import Path
 from tempfile import TemporaryDirectory
@@ -26,6 +29,7 @@ from launart import Launart, Service, any_completed
 from loguru import logger
 from starlette.applications import Starlette
 from starlette.datastructures import FormData as FormData
+from starlette.formparsers import MultiPartException
 from starlette.requests import Request as StarletteRequest
 from starlette.responses import FileResponse as FileResponse
 from starlette.responses import HTMLResponse as HTMLResponse
@@ -40,20 +44,39 @@ from starlette.websockets import WebSocket, WebSocketDisconnect
 from yarl import URL
 
 from satori.const import Api, EventType
-from satori.exception import ActionFailed
-from satori.model import Event, Meta, ModelBase, Opcode
-from satori.utils import decode
+from satori.exception import ActionFailed, RateLimitException
+from satori.model import Event, ModelBase, Opcode
+from satori.utils import MSGPACK_AVAILABLE, decode, encode, encode_bytes
 
 from .adapter import Adapter as Adapter
-from .connection import WebsocketConnection
+from .cache import MediaCache as MediaCache
+from .cluster import Cluster
+from .cluster import EventBus as EventBus
+from .cluster import LocalBus as LocalBus
+from .cluster import SocketBus as SocketBus
+from .connection import HeartbeatMonitor, WebsocketConnection
+from .dispatch import DispatchIndex
+from .formdata import UploadTooLarge, close_upload, parse_upload
 from .formdata import parse_content_disposition as parse_content_disposition
 from .model import Provider as Provider
 from .model import Request as Request
 from .model import Router as Router
 from .model import WebhookEndpoint as WebhookEndpoint
+from .ratelimit import RateLimit as RateLimit
+from .ratelimit import RateLimited as RateLimited
+from .ratelimit import RateLimiter as RateLimiter
+from .ratelimit import TokenBucket
+from .registry import LOGIN_EVENTS, LoginRegistry
+from .response import EncodedJSONResponse as EncodedJSONResponse
+from .response import proxy_request
+from .response import stream_response as stream_response
 from .route import RouteCall as RouteCall
 from .route import RouterMixin as RouterMixin
-from .utils import Deque
+from .subscription import Subscription as Subscription
+from .subscription import accepts, event_key
+from .upload import UploadStore as UploadStore
+from .utils import Deque, iter_file, map_file
+from .workers import ReusePortASGIService, WorkerHub
 
 _T_endpoint = TypeVar("_T_endpoint", bound=Callable[[StarletteRequest], Awaitable[Response] | Response])
 _T_ws_endpoint = TypeVar("_T_ws_endpoint", bound=Callable[[WebSocket], Awaitable[None]])
@@ -70,9 +93,23 @@ async def _json(self: StarletteRequest) -> Any:
 StarletteRequest.json = _json
 
 
-async def _request_handler(action: str, request: StarletteRequest, func: RouteCall, platform: str, self_id: str):
+async def _request_handler(
+    action: str,
+    request: StarletteRequest,
+    func: RouteCall,
+    platform: str,
+    self_id: str,
+    upload_dir: Path | None = None,
+    upload_max_size: int | None = None,
+):
     if action == Api.UPLOAD_CREATE:
-        async with request.form() as form:
+        try:
+            form = await parse_upload(request, upload_dir, upload_max_size)
+        except UploadTooLarge as e:
+            return Response(status_code=413, content=str(e))
+        except MultiPartException as e:
+            return Response(status_code=400, content=e.message)
+        try:
             res = await func(
                 Request(
                     request,
@@ -82,7 +119,9 @@ async def _request_handler(action: str, request: StarletteRequest, func: RouteCa
                     self_id=self_id,
                 )
             )
-            return JSONResponse(content=res)
+        finally:
+            await close_upload(form)
+        return EncodedJSONResponse(content=res)
     try:
         if request.method == "GET":
             params = dict(request.query_params)
@@ -103,15 +142,86 @@ async def _request_handler(action: str, request: StarletteRequest, func: RouteCa
         return Response(status_code=504, content="Request timeout")
     except ActionFailed as ae:
         logger.warning(ae)
-        return Response(status_code=ae.CODE, content=str(ae))
+        headers = None
+        if isinstance(ae, RateLimitException) and ae.retry_after is not None:
+            headers = _retry_after_headers(ae.retry_after)
+        return Response(status_code=ae.CODE, content=str(ae), headers=headers)
     except Exception as e:
         logger.error(e)
         return Response(status_code=500, content=str(e))
+    if isinstance(res, Response):
+        return res
+    return EncodedJSONResponse(content=_dump_result(res))
+
+
+def _dump_result(res: Any) -> Any:
+    """将路由的返回值转换为可编码的数据；bytes 被视为已编码的 JSON，原样返回"""
     if isinstance(res, ModelBase):
-        return JSONResponse(content=res.dump())
+        return res.dump()
     if res and isinstance(res, list) and isinstance(res[0], ModelBase):
-        return JSONResponse(content=[_.dump() for _ in res])  # type: ignore
-    return res if isinstance(res, Response) else JSONResponse(content=res)
+        return [_.dump() for _ in res]
+    return res
+
+
+async def _batch_item_handler(
+    action: str, request: StarletteRequest, func: RouteCall, params: dict, platform: str, self_id: str
+) -> dict[str, Any]:
+    try:
+        res = await func(
+            Request(
+                request,
+                action,
+                params,
+                platform=platform,
+                self_id=self_id,
+            )
+        )
+    except asyncio.CancelledError:
+        return {"status": 503, "message": "Request cancelled"}
+    except asyncio.TimeoutError:
+        return {"status": 504, "message": "Request timeout"}
+    except ActionFailed as ae:
+        logger.warning(ae)
+        if isinstance(ae, RateLimitException) and ae.retry_after is not None:
+            return {"status": ae.CODE, "message": str(ae), "retry_after": ae.retry_after}
+        return {"status": ae.CODE, "message": str(ae)}
+    except Exception as e:
+        logger.error(e)
+        return {"status": 500, "message": str(e)}
+    if isinstance(res, (bytes, bytearray, memoryview)):
+        return {"status": 200, "data": decode(res)}
+    if not isinstance(res, Response):
+        return {"status": 200, "data": _dump_result(res)}
+    if not hasattr(res, "body"):
+        # StreamingResponse 与 FileResponse 没有完整的响应体，释放其持有的资源后按单项错误返回
+        if isinstance(res, StreamingResponse) and hasattr(res.body_iterator, "aclose"):
+            await res.body_iterator.aclose()  # type: ignore
+        if res.background is not None:
+            await res.background()
+        return {"status": 400, "message": "streaming responses are not supported in batch"}
+    body = bytes(res.body)
+    if res.status_code >= 400:
+        return {"status": res.status_code, "message": body.decode(errors="replace")}
+    if res.media_type == "application/json":
+        return {"status": res.status_code, "data": decode(body) if body else None}
+    return {"status": res.status_code, "data": body.decode(errors="replace")}
+
+
+def _client_key(request: StarletteRequest) -> str:
+    """限流时用于区分客户端的标识"""
+    return request.client.host if request.client else ""
+
+
+def _retry_after_headers(retry_after: float) -> dict[str, str]:
+    return {"Retry-After": str(math.ceil(retry_after))}
+
+
+def _forwarded_response(result: dict[str, Any]) -> Response:
+    """将其他节点返回的调用结果转换为响应"""
+    if "data" in result:
+        return EncodedJSONResponse(content=result["data"], status_code=result["status"])
+    headers = _retry_after_headers(result["retry_after"]) if result.get("retry_after") is not None else None
+    return Response(status_code=result["status"], content=result.get("message"), headers=headers)
 
 
 INTERNAL_URL_PAT = re.compile("internal:(?P<platform>[^/]+)/(?P<self_id>[^/]+)/(?P<path>.+)")
@@ -141,8 +251,22 @@ class Server(Service, RouterMixin):
         *,
         stream_threshold: int = 16 * 1024 * 1024,
         stream_chunk_size: int = 64 * 1024,
+        batch_concurrency: int = 16,
+        batch_max_size: int = 1000,
+        media_cache: MediaCache | None = None,
+        upload_max_size: int | None = 512 * 1024 * 1024,
+        upload_dir: str | Path | None = None,
+        upload_ttl: float = 600,
+        upload_quota: int | None = None,
+        workers: int = 1,
+        cluster: EventBus | None = None,
+        node_id: str | None = None,
+        cluster_call_timeout: float = 300,
+        rate_limiter: RateLimiter | None = None,
+        login_refresh_interval: float | None = 60,
     ):
         self.connections = []
+        self.heartbeats = HeartbeatMonitor()
         self.host = host
         self.port = port
         self.version = version
@@ -156,15 +280,36 @@ class Server(Service, RouterMixin):
         self.providers = []
         self.routers = []
         self.routes = {}
+        self._dispatch = DispatchIndex(self._adapters, self.routes, self.routers)
+        self.logins = LoginRegistry()
+        self.login_refresh_interval = login_refresh_interval
         self.webhooks = webhooks or []
         self._tempdir = TemporaryDirectory()
         self._sequence = 0
         self._event_cache = Deque(maxlen=100)
         self.stream_threshold = stream_threshold
         self.stream_chunk_size = stream_chunk_size
+        self.batch_concurrency = batch_concurrency
+        self.batch_max_size = batch_max_size
+        self.media_cache = media_cache
+        self.rate_limiter = rate_limiter
+        self.upload_max_size = upload_max_size
+        self.uploads = UploadStore(upload_dir or self._tempdir.name, ttl=upload_ttl, quota=upload_quota)
         self.resources: dict[str, Path] = {}
         self.app = Starlette()
-        self.asgi_service = UvicornASGIService(self.host, self.port, options=uvicorn_options)
+        self.workers = workers
+        self._hub: WorkerHub | None = None
+        self.cluster = (
+            Cluster(self, cluster, node_id or secrets.token_hex(8), call_timeout=cluster_call_timeout)
+            if cluster
+            else None
+        )
+        if workers > 1:
+            if not hasattr(socket, "SO_REUSEPORT") or not hasattr(socket, "AF_UNIX"):
+                raise RuntimeError("Multiple workers require SO_REUSEPORT and Unix socket support")
+            self.asgi_service = ReusePortASGIService(self.host, self.port, options=uvicorn_options)
+        else:
+            self.asgi_service = UvicornASGIService(self.host, self.port, options=uvicorn_options)
         super().__init__()
 
     @property
@@ -230,26 +375,45 @@ class Server(Service, RouterMixin):
             self.routers.append(item)
         else:
             raise TypeError(f"Unknown config type: {item}")
+        self._dispatch.invalidate()
+
+    def _routes_changed(self):
+        self._dispatch.invalidate()
 
     def mount(self, route_path: str, file: Path):
         """在指定路径挂载静态文件"""
         self.resources[route_path] = file
 
-    async def post(self, event: Event):
+    async def post(self, event: Event, publish: bool = True):
+        if self.logins.update(event) and event.login.user:
+            self._dispatch.forget(event.login.platform, event.login.user.id)
         event.sn = self._sequence
         self._event_cache.append(event)
         self._sequence += 1
-        for connection in self.connections:
-            if not connection.alive:
-                continue
+        body = event.dump()
+        key = event_key(event)
+        connections = [conn for conn in self.connections if conn.alive and accepts(conn.subscription, key)]
+        # 没有订阅方接收该事件时不进行编码；JSON 与 msgpack 各至多编码一次
+        payload = {"op": Opcode.EVENT, "body": body}
+        frames: dict[bool, str | bytes] = {}
+        if self._hub:
+            frames[False] = text = encode(payload)
+            self._hub.publish(event.sn, text, key)
+        for connection in connections:
+            if (frame := frames.get(connection.binary)) is None:
+                frame = frames[connection.binary] = connection.encode(payload)
             try:
-                await connection.send({"op": Opcode.EVENT, "body": event.dump()})
+                await connection.send_raw(frame)
             except (WebSocketDisconnect, RuntimeError):
                 break
             except Exception as e:
                 print_exc()
                 logger.error(e)
-        for hook in self.webhooks:
+        if self.cluster and publish:
+            await self.cluster.publish(body)
+        webhooks = [hook for hook in self.webhooks if accepts(hook.subscription, key)]
+        data = encode_bytes(body) if webhooks else b""
+        for hook in webhooks:
             try:
                 async with self.session.post(
                     URL(hook.url),
@@ -258,7 +422,7 @@ class Server(Service, RouterMixin):
                         "Authorization": f"Bearer {hook.token or ''}",
                         "Satori-OpCode": str(Opcode.EVENT.value),
                     },
-                    json=event.dump(),
+                    data=data,
                     timeout=ClientTimeout(hook.timeout or 300),
                 ) as resp:
                     resp.raise_for_status()
@@ -274,42 +438,55 @@ class Server(Service, RouterMixin):
             return await ws.close(code=3000, reason="Unauthorized")
         body = identity["body"]
         token = identity["body"].get("token")
-        logins = []
-        proxy_urls = []
         if token != self.token:
             return await ws.close(code=3000, reason="Unauthorized")
-        for provider in self.providers:
-            logins.extend(await provider.get_logins())
-            proxy_urls.extend(provider.proxy_urls())
+        try:
+            connection.subscription = Subscription.parse(body.get("filter"))
+        except (TypeError, ValueError) as e:
+            return await ws.close(code=3001, reason=f"Invalid filter: {e}")
+        connection.binary = body.get("encoding") == "msgpack" and MSGPACK_AVAILABLE
         sequence = body.get("sequence")
         if sequence is None:
             sequence = -1
-        await connection.send(
-            {"op": Opcode.READY, "body": {"logins": [lo.dump() for lo in logins], "proxy_urls": proxy_urls}}
-        )
+        if connection.binary:
+            await connection.send({"op": Opcode.READY, "body": self.logins.payload})
+        else:
+            await connection.send_raw(self.logins.ready_frame)
         self.connections.append(connection)
         logger.debug(f"New connection: {id(connection):x}")
-        heartbeat_task = asyncio.create_task(connection.heartbeat())
-        close_task = asyncio.create_task(connection.close_signal.wait())
+        self.heartbeats.add(connection)
         try:
             if sequence > -1:
                 for event in self._event_cache.after(sequence):
-                    if event.type in (
-                        EventType.LOGIN_ADDED,
-                        EventType.LOGIN_REMOVED,
-                        EventType.LOGIN_UPDATED,
-                    ):
+                    if event.type in LOGIN_EVENTS or not accepts(connection.subscription, event_key(event)):
                         continue
                     await connection.send({"op": Opcode.EVENT, "body": event.dump()})
+                    self.heartbeats.touch(connection)
                     await asyncio.sleep(0.1)
-            await any_completed(heartbeat_task, close_task)
+            await connection.receive_loop(self.heartbeats)
         finally:
             await connection.connection_closed()
             logger.debug(f"Connection closed: {id(connection):x}")
-            heartbeat_task.cancel()
-            close_task.cancel()
+            self.heartbeats.discard(connection)
             self.connections.remove(connection)
 
+    async def admit(self, platform: str, self_id: str, action: str, client: str) -> TokenBucket | None:
+        """按 `rate_limiter` 等待直至允许调用；等待时间超过上限时抛出 `RateLimited`"""
+        if self.rate_limiter is None:
+            return None
+        return await self.rate_limiter.acquire(platform, self_id, action, client)
+
+    def throttled(self, platform: str, self_id: str, action: str, retry_after: float | None = None):
+        """平台返回了频率限制错误，暂停对应的令牌桶"""
+        if self.rate_limiter is not None:
+            self.rate_limiter.penalize(platform, self_id, action, retry_after)
+
+    def _remote(self, platform: str, self_id: str) -> bool:
+        """登录信息是否属于集群中的其他节点"""
+        return bool(
+            self.cluster and self.cluster.owner(platform, self_id) and not self._dispatch.owners(platform, self_id)
+        )
+
     async def http_server_handler(self, request: StarletteRequest):
         if not self._adapters and not self.routes:
             return Response(status_code=404, content=request.path_params["method"])
@@ -319,37 +496,90 @@ class Server(Service, RouterMixin):
         if platform is None or self_id is None:
             return Response(status_code=401, content="Missing header Satori-Platform or Satori-User-ID")
 
-        for _router in self._adapters:
-            if action in _router.routes:
-                func = _router.routes[action]
-            elif action.startswith("internal") and "internal/*" in _router.routes:
-                func = _router.routes["internal/*"]
-            else:
-                continue
-            if not _router.ensure(platform, self_id):
-                continue
-            return await _request_handler(action, request, func, platform, self_id)
-        if action in self.routes:
-            return await _request_handler(action, request, self.routes[action], platform, self_id)
-        if action.startswith("internal") and "internal/*" in self.routes:
-            return await _request_handler(action, request, self.routes["internal/*"], platform, self_id)
-        for _router in self.routers:
-            if action in _router.routes:
-                func = _router.routes[action]
-            elif action.startswith("internal") and "internal/*" in _router.routes:
-                func = _router.routes["internal/*"]
-            else:
-                continue
-            return await _request_handler(action, request, func, platform, self_id)
+        if self._remote(platform, self_id):
+            if action == Api.UPLOAD_CREATE:
+                return Response(status_code=400, content=f"Action {action!r} cannot be forwarded to other nodes")
+            params = dict(request.query_params) if request.method == "GET" else await request.json()
+            return _forwarded_response(await self.cluster.forward(action, params, platform, self_id))  # type: ignore
+        if (func := self._dispatch.resolve(platform, self_id, action)) is not None:
+            try:
+                bucket = await self.admit(platform, self_id, action, _client_key(request))
+            except RateLimited as e:
+                return Response(status_code=429, content=str(e), headers=_retry_after_headers(e.retry_after))
+            response = await _request_handler(
+                action,
+                request,
+                func,
+                platform,
+                self_id,
+                upload_dir=self.uploads.parts,
+                upload_max_size=self.upload_max_size,
+            )
+            if response.status_code == 429:
+                retry_after = response.headers.get("retry-after")
+                self.throttled(platform, self_id, action, float(retry_after) if retry_after else None)
+            if bucket is not None:
+                response.headers.update(RateLimiter.headers(bucket))
+            return response
         return Response(
             status_code=404, content=f"Action {action!r} is not supported in current platform {platform!r}."
         )
 
+    async def batch_handler(self, request: StarletteRequest):
+        """批量调用接口
+
+        请求体为 `{action, params, platform?, self_id?}` 构成的数组，未指定 platform 与 self_id 的调用使用请求头中的值。
+        各调用以 `batch_concurrency` 为上限并发执行，响应体为与请求顺序一致的 `{status, data?, message?}` 数组。
+        """
+        platform = request.headers.get("Satori-Platform")
+        self_id = request.headers.get("Satori-User-ID")
+        try:
+            calls = await request.json()
+        except Exception as e:
+            return Response(status_code=400, content=f"Invalid batch body: {e}")
+        if not isinstance(calls, list):
+            return Response(status_code=400, content="Batch body must be an array")
+        if len(calls) > self.batch_max_size:
+            return Response(status_code=413, content=f"Batch size exceeds limit {self.batch_max_size}")
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+
+        async def run(call: Any) -> dict[str, Any]:
+            if not isinstance(call, dict) or not isinstance(action := call.get("action"), str):
+                return {"status": 400, "message": "Missing action"}
+            _platform = call.get("platform") or platform
+            _self_id = call.get("self_id") or self_id
+            if _platform is None or _self_id is None:
+                return {"status": 401, "message": "Missing platform or self_id"}
+            if action == Api.UPLOAD_CREATE:
+                return {"status": 400, "message": f"Action {action!r} is not supported in batch"}
+            if self._remote(_platform, _self_id):
+                async with semaphore:
+                    return await self.cluster.forward(  # type: ignore
+                        action, call.get("params") or {}, _platform, _self_id
+                    )
+            if (func := self._dispatch.resolve(_platform, _self_id, action)) is None:
+                return {
+                    "status": 404,
+                    "message": f"Action {action!r} is not supported in current platform {_platform!r}.",
+                }
+            try:
+                await self.admit(_platform, _self_id, action, _client_key(request))
+            except RateLimited as e:
+                return {"status": 429, "message": str(e), "retry_after": e.retry_after}
+            async with semaphore:
+                result = await _batch_item_handler(action, request, func, call.get("params") or {}, _platform, _self_id)
+            if result["status"] == 429:
+                self.throttled(_platform, _self_id, action, result.get("retry_after"))
+            return result
+
+        return EncodedJSONResponse(content=await asyncio.gather(*(run(call) for call in calls)))
+
     async def proxy_url_handler(self, request: StarletteRequest):
         url = request.path_params["internal_url"]
+        token = proxy_request.set(request)
         try:
             resp = await self.fetch_proxy(url, request)
-            # if content size > stream_limit, use streaming response
+            # 流式响应直接返回；已缓冲的响应体超过 stream_threshold 时分块发送
             if (
                 isinstance(resp, (PlainTextResponse, HTMLResponse, JSONResponse)) or resp.__class__ is Response
             ) and len(resp.body) > self.stream_threshold:
@@ -369,6 +599,8 @@ class Server(Service, RouterMixin):
         except Exception as e:
             logger.error(repr(e))
             return Response(status_code=500, content=repr(e))
+        finally:
+            proxy_request.reset(token)
 
     async def fetch_proxy(self, url: str, request: StarletteRequest | None = None):
         url = url.replace(":/", "://", 1).replace(":///", "://", 1)
@@ -378,10 +610,9 @@ class Server(Service, RouterMixin):
                 platform = mat["platform"]
                 self_id = mat["self_id"]
                 path = mat["path"]
-                if path.startswith("_tmp"):
-                    file = Path(self._tempdir.name) / path[5:]
-                    if file.exists():
-                        return FileResponse(file)
+                if path.startswith("_tmp/") and (file := self.local_file(path)):
+                    # FileResponse 支持 Range 请求；ASGI 服务器支持 pathsend 扩展时由服务器直接发送文件
+                    return FileResponse(file)
                 assert request is not None
                 for provider in self.providers:
                     if provider.ensure(platform, self_id):
@@ -393,6 +624,10 @@ class Server(Service, RouterMixin):
                 raise NotImplementedError(f"Login with {platform}:{self_id} not found")
             raise TypeError(f"Invalid internal url: {url}")
 
+        # 仅缓存外部链接；内部链接的内容由适配器自行决定
+        cache = self.media_cache if request is not None else None
+        if cache and request and (cached := cache.lookup(url, request)):
+            return cached
         for provider in self.providers:
             for proxy_url_pf in provider.proxy_urls():
                 if not url.startswith(proxy_url_pf):
@@ -400,18 +635,32 @@ class Server(Service, RouterMixin):
                 resp = await provider.handle_proxied(proxy_url_pf, url)
                 if resp is None:
                     continue
+                if cache and request:
+                    return await cache.store(url, request, resp)
                 return resp
         raise ValueError(f"Unknown proxy url: {url}")
 
-    def get_local_file(self, url: str):
-        url = url.split("/")[-1]
-        file = Path(self._tempdir.name) / url
-        if file.exists():
+    def local_file(self, url: str) -> Path | None:
+        """获取上传资源链接 (或其文件名) 对应的文件路径"""
+        return self.uploads.get(url.split("/")[-1])
+
+    def get_local_file(self, url: str) -> bytes | None:
+        """读取上传资源的全部内容"""
+        if file := self.local_file(url):
             return file.read_bytes()
 
+    def map_local_file(self, url: str) -> AbstractContextManager[memoryview] | None:
+        """以只读内存映射的方式打开上传资源，不会将整个文件读入内存；返回的上下文管理器退出时关闭映射"""
+        if file := self.local_file(url):
+            return map_file(file)
+
+    def stream_local_file(self, url: str, chunk_size: int | None = None) -> AsyncIterator[bytes] | None:
+        """分块读取上传资源"""
+        if file := self.local_file(url):
+            return iter_file(file, chunk_size or self.stream_chunk_size)
+
     async def _default_upload_create_handler(self, request: Request[FormData]):
         res = {}
-        root = Path(self._tempdir.name)
         for _, data in request.params.items():
             if isinstance(data, str):
                 continue
@@ -419,35 +668,67 @@ class Server(Service, RouterMixin):
             disp = parse_content_disposition(data.headers["content-disposition"])
             fid = secrets.token_urlsafe(16)
             if "filename" in disp:
-                filename = f"{fid}-{disp['filename']}"
+                filename = f"{fid}-{Path(disp['filename']).name}"
             else:
                 filename = f"{fid}-{disp['name']}{mimetypes.guess_extension(ext) or '.png'}"
-            file = root / filename
-            with file.resolve().open("wb+") as f:
-                f.write(await data.read())
-
-            res[disp["name"]] = f"internal:{request.platform}/{request.self_id}/_tmp/{filename}"
-
-            loop = asyncio.get_running_loop()
-            loop.call_later(600, file.unlink, True)
+            file = await self.uploads.save_upload(filename, data)
+            res[disp["name"]] = f"internal:{request.platform}/{request.self_id}/_tmp/{file.name}"
         return res
 
-    async def meta_get_handler(self, request: StarletteRequest):
+    async def refresh_logins(self, notify: bool = True):
+        """从全部 Provider 重新同步登录信息
+
+        Args:
+            notify (bool): 是否与当前的登录信息对比，并为新增、变化与移除的登录信息推送 `login-*` 事件；
+                为 False 时直接替换全部登录信息，仅用于启动时的初次同步
+        """
         logins = []
         proxy_urls = []
         for provider in self.providers:
             logins.extend(await provider.get_logins())
             proxy_urls.extend(provider.proxy_urls())
-        return JSONResponse(content=Meta(logins=logins, proxy_urls=proxy_urls).dump())
+        if not notify:
+            self.logins.sync(logins, proxy_urls)
+            # 登录信息整体替换，账号与适配器的对应关系可能已经变化
+            self._dispatch.invalidate()
+            return
+        if list(dict.fromkeys(proxy_urls)) != self.logins.proxy_urls:
+            self.logins.set_proxy_urls(proxy_urls)
+        seen = set()
+        for login in logins:
+            if not login.user or not login.platform:
+                continue
+            key = (login.platform, login.user.id)
+            seen.add(key)
+            if self.logins.changed(login):
+                event_type = EventType.LOGIN_UPDATED if key in self.logins else EventType.LOGIN_ADDED
+                await self.post(Event(event_type, datetime.now(), login))
+        for login in self.logins.logins:
+            key = (login.platform, login.user.id)  # type: ignore
+            if key not in seen and not (self.cluster and self.cluster.owner(*key)):  # type: ignore
+                await self.post(Event(EventType.LOGIN_REMOVED, datetime.now(), login))
+
+    async def _login_refresher(self):
+        """定期从 Provider 同步登录信息，用于不推送 `login-*` 事件的 Provider"""
+        while True:
+            await asyncio.sleep(self.login_refresh_interval)  # type: ignore
+            try:
+                await self.refresh_logins()
+            except Exception as e:
+                logger.error(f"Failed to refresh logins: {e!r}")
+
+    async def meta_get_handler(self, request: StarletteRequest):
+        return EncodedJSONResponse(content=self.logins.meta_body)
 
     async def webhook_create_handler(self, request: StarletteRequest):
         body = await request.json()
         url = body["url"]
         token = body.get("token")
-        self.webhooks.append(WebhookEndpoint(url, token))
-        proxy_urls = []
-        for provider in self.providers:
-            proxy_urls.extend(provider.proxy_urls())
+        try:
+            subscription = Subscription.parse(body.get("filter"))
+        except (TypeError, ValueError) as e:
+            return Response(status_code=400, content=str(e))
+        self.webhooks.append(WebhookEndpoint(url, token, subscription=subscription))
         async with self.session.post(
             URL(url),
             headers={
@@ -455,7 +736,7 @@ class Server(Service, RouterMixin):
                 "Authorization": f"Bearer {token or ''}",
                 "Satori-OpCode": str(Opcode.META.value),
             },
-            json={"proxy_urls": proxy_urls},
+            data=encode_bytes({"proxy_urls": self.logins.proxy_urls}),
         ) as resp:
             resp.raise_for_status()
         return Response()
@@ -475,8 +756,12 @@ class Server(Service, RouterMixin):
 
         if Api.UPLOAD_CREATE.value not in self.routes:
             self.routes[Api.UPLOAD_CREATE.value] = self._default_upload_create_handler
+        self._dispatch.invalidate()
 
         async with self.stage("preparing"):
+            await self.refresh_logins(notify=False)
+            if self.cluster:
+                await self.cluster.start()
             self.app.routes.extend(
                 [
                     *chain.from_iterable(ada.get_routes() for ada in self._adapters),
@@ -496,6 +781,11 @@ class Server(Service, RouterMixin):
                         self.webhook_delete_handler,
                         methods=["POST"],
                     ),
+                    Route(
+                        f"{self.path}/{self.version}/batch",
+                        self.batch_handler,
+                        methods=["POST"],
+                    ),
                     Route(
                         f"{self.path}/{self.version}/proxy/{{internal_url:path}}",
                         self.proxy_url_handler,
@@ -511,6 +801,9 @@ class Server(Service, RouterMixin):
             for path, file in self.resources.items():
                 self.app.mount(path, StaticFiles(directory=file.parent, html=file.suffix == ".html"))
             self.asgi_service.middleware.mounts[""] = self.app  # type: ignore
+            if self.workers > 1:
+                self._hub = WorkerHub(self, self.workers, str(Path(self._tempdir.name) / "workers.sock"))
+                await self._hub.start()
 
         async def event_task(_provider: Provider):
             async for event in _provider.publisher():  # type: ignore
@@ -519,9 +812,9 @@ class Server(Service, RouterMixin):
         event_tasks = [event_task(_provider) for _provider in self.providers if hasattr(_provider, "publisher")]
 
         async with self.stage("blocking"):
-            proxy_urls = []
-            for provider in self.providers:
-                proxy_urls.extend(provider.proxy_urls())
+            sweeper = asyncio.create_task(self.uploads.sweeper())
+            heartbeat = asyncio.create_task(self.heartbeats.run())
+            refresher = asyncio.create_task(self._login_refresher()) if self.login_refresh_interval else None
             for hook in self.webhooks:
                 async with self.session.post(
                     URL(hook.url),
@@ -530,7 +823,7 @@ class Server(Service, RouterMixin):
                         "Authorization": f"Bearer {hook.token or ''}",
                         "Satori-OpCode": str(Opcode.META.value),
                     },
-                    json={"proxy_urls": proxy_urls},
+                    data=encode_bytes({"proxy_urls": self.logins.proxy_urls}),
                     timeout=ClientTimeout(hook.timeout or 300),
                 ) as resp:
                     resp.raise_for_status()
@@ -543,7 +836,18 @@ class Server(Service, RouterMixin):
         async with self.stage("cleanup"):
             with suppress(KeyError):
                 del self.asgi_service.middleware.mounts[""]
+            if self._hub:
+                await self._hub.stop()
+                self._hub = None
+            if self.cluster:
+                await self.cluster.stop()
             await self.session.close()
+            heartbeat.cancel()
+            if refresher:
+                refresher.cancel()
+            sweeper.cancel()
+            with suppress(asyncio.CancelledError):
+                await sweeper
             self._tempdir.cleanup()
 
     def run(
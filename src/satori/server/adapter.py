@@ -8,6 +8,7 @@ from starlette.routing import BaseRoute
 from satori.model import Login, LoginPartial
 
 from .model import Request
+from .response import stream_response
 from .route import RouterMixin
 from .utils import ctx
 
@@ -39,8 +40,7 @@ class Adapter(Service, RouterMixin):
     async def handle_internal(self, request: Request, path: str) -> Response: ...
 
     async def handle_proxied(self, prefix: str, url: str) -> Response | None:
-        async with self.server.session.get(url, ssl=ctx) as resp:
-            return Response(await resp.read())
+        return await stream_response(self.server.session, url, ssl=ctx, chunk_size=self.server.stream_chunk_size)
 
     @abstractmethod
     async def get_logins(self) -> list[LoginType]: ...
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterable
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+
+from loguru import logger
+from starlette.requests import Request as StarletteRequest
+from starlette.responses import FileResponse, Response, StreamingResponse
+
+_KEY_PAT = re.compile(r"^[0-9a-f]{64}\.bin$")
+_MAX_AGE_PAT = re.compile(r"max-age=(\d+)")
+CACHED_HEADERS = ("content-type", "content-disposition")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    """命中次数 (包含 304)"""
+    misses: int = 0
+    """未命中次数"""
+    memory_hits: int = 0
+    disk_hits: int = 0
+    not_modified: int = 0
+    """返回 304 的次数"""
+    stores: int = 0
+    evictions: int = 0
+    memory_size: int = 0
+    disk_size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    size: int
+    etag: str
+    last_modified: str
+    expires_at: float
+    headers: dict[str, str] = field(default_factory=dict)
+    body: bytes | None = None
+    path: Path | None = None
+
+
+class MediaCache:
+    """代理资源的缓存
+
+    以资源链接的哈希为键，较小的资源保存在内存 LRU 中，较大的资源在流式转发的同时写入磁盘，
+    两级缓存分别按总大小淘汰最久未使用的条目。
+
+    客户端请求头中的 `Cache-Control: no-cache` 会跳过缓存，`no-store` 会阻止写入缓存；
+    `If-None-Match` 与 `If-Modified-Since` 在命中时返回 304。
+
+    Args:
+        directory (str | Path | None): 磁盘缓存目录，为 None 时仅使用内存缓存
+        ttl (float): 缓存有效期 (秒)，上游响应的 max-age 更短时以其为准
+        memory_limit (int): 内存缓存的总大小上限
+        memory_object_limit (int): 单个资源进入内存缓存的大小上限
+        disk_limit (int): 磁盘缓存的总大小上限
+        disk_object_limit (int): 单个资源进入磁盘缓存的大小上限
+    """
+
+    def __init__(
+        self,
+        directory: str | Path | None = None,
+        *,
+        ttl: float = 3600,
+        memory_limit: int = 64 * 1024 * 1024,
+        memory_object_limit: int = 1024 * 1024,
+        disk_limit: int = 1024 * 1024 * 1024,
+        disk_object_limit: int = 256 * 1024 * 1024,
+    ):
+        self.directory = Path(directory) if directory is not None else None
+        self.ttl = ttl
+        self.memory_limit = memory_limit
+        self.memory_object_limit = memory_object_limit
+        self.disk_limit = disk_limit
+        self.disk_object_limit = disk_object_limit
+        self.stats = CacheStats()
+        self._memory: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._disk: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._pending: set[str] = set()
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # 上次运行遗留的缓存文件没有对应的元信息，无法复用
+            for file in self.directory.iterdir():
+                if _KEY_PAT.match(file.name) or file.name.endswith(".bin.part"):
+                    file.unlink(missing_ok=True)
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def _get(self, key: str) -> CacheEntry | None:
+        for tier in (self._memory, self._disk):
+            if (entry := tier.get(key)) is None:
+                continue
+            if entry.expires_at < time.time() or (entry.path is not None and not entry.path.exists()):
+                self._discard(tier, key)
+                return None
+            tier.move_to_end(key)
+            return entry
+        return None
+
+    def _discard(self, tier: OrderedDict[str, CacheEntry], key: str, unlink: bool = True):
+        entry = tier.pop(key)
+        if entry.path is None:
+            self.stats.memory_size -= entry.size
+        else:
+            self.stats.disk_size -= entry.size
+            if unlink:
+                entry.path.unlink(missing_ok=True)
+
+    def _evict(self, tier: OrderedDict[str, CacheEntry], limit: int, size: int):
+        while tier and size > limit:
+            key = next(iter(tier))
+            size -= tier[key].size
+            self._discard(tier, key)
+            self.stats.evictions += 1
+
+    def _commit(self, entry: CacheEntry):
+        self.stats.stores += 1
+        for tier in (self._memory, self._disk):
+            if (old := tier.get(entry.key)) is not None:
+                # 新的磁盘缓存文件与旧条目同名，此时不能删除
+                self._discard(tier, entry.key, unlink=old.path != entry.path)
+        if entry.path is None:
+            self._memory[entry.key] = entry
+            self.stats.memory_size += entry.size
+            self._evict(self._memory, self.memory_limit, self.stats.memory_size)
+        else:
+            self._disk[entry.key] = entry
+            self.stats.disk_size += entry.size
+            self._evict(self._disk, self.disk_limit, self.stats.disk_size)
+
+    def clear(self):
+        for tier in (self._memory, self._disk):
+            for key in list(tier):
+                self._discard(tier, key)
+
+    @staticmethod
+    def _not_modified(entry: CacheEntry, request: StarletteRequest) -> bool:
+        if (if_none_match := request.headers.get("if-none-match")) is not None:
+            return if_none_match.strip() == "*" or entry.etag in (tag.strip() for tag in if_none_match.split(","))
+        if (if_modified_since := request.headers.get("if-modified-since")) is not None:
+            try:
+                return parsedate_to_datetime(entry.last_modified) <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def lookup(self, url: str, request: StarletteRequest) -> Response | None:
+        """查找缓存并构造响应；未命中时返回 None"""
+        if request.method != "GET" or "no-cache" in request.headers.get("cache-control", ""):
+            return None
+        if (entry := self._get(self.key(url))) is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        headers = {**entry.headers, "etag": entry.etag, "last-modified": entry.last_modified, "x-cache": "HIT"}
+        if self._not_modified(entry, request):
+            self.stats.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        if entry.body is not None:
+            self.stats.memory_hits += 1
+            return Response(entry.body, headers=headers)
+        assert entry.path is not None
+        self.stats.disk_hits += 1
+        return FileResponse(entry.path, headers=headers)
+
+    def _expires_at(self, response: Response) -> float | None:
+        cache_control = response.headers.get("cache-control", "")
+        if "no-store" in cache_control or "private" in cache_control:
+            return None
+        ttl = self.ttl
+        if mat := _MAX_AGE_PAT.search(cache_control):
+            ttl = min(ttl, int(mat[1]))
+        return time.time() + ttl if ttl > 0 else None
+
+    def _new_entry(self, key: str, size: int, response: Response, etag: str) -> CacheEntry | None:
+        if (expires_at := self._expires_at(response)) is None:
+            return None
+        return CacheEntry(
+            key,
+            size,
+            response.headers.get("etag") or etag,
+            response.headers.get("last-modified") or formatdate(usegmt=True),
+            expires_at,
+            {k: v for k in CACHED_HEADERS if (v := response.headers.get(k))},
+        )
+
+    async def store(self, url: str, request: StarletteRequest, response: Response) -> Response:
+        """尝试缓存代理响应，并返回应当发送给客户端的响应"""
+        if (
+            request.method != "GET"
+            or "range" in request.headers
+            or "no-store" in request.headers.get("cache-control", "")
+            or response.status_code != 200
+        ):
+            return response
+        key = self.key(url)
+        if key in self._pending:
+            return response
+        if not isinstance(response, StreamingResponse):
+            body = bytes(response.body)
+            if len(body) <= self.memory_object_limit and (
+                entry := self._new_entry(key, len(body), response, f'"{hashlib.sha1(body).hexdigest()}"')
+            ):
+                entry.body = body
+                self._commit(entry)
+            response.headers["x-cache"] = "MISS"
+            return response
+        length = response.headers.get("content-length")
+        size = int(length) if length and length.isdigit() else None
+        if size is not None and size <= self.memory_object_limit:
+            body = b"".join([bytes(chunk) async for chunk in response.body_iterator])  # type: ignore
+            headers = {k: v for k, v in response.headers.items() if k != "content-length"}
+            result = Response(body, status_code=response.status_code, headers=headers)
+            if entry := self._new_entry(key, len(body), response, f'"{hashlib.sha1(body).hexdigest()}"'):
+                entry.body = body
+                self._commit(entry)
+            result.headers["x-cache"] = "MISS"
+            return result
+        if self.directory is not None and (size is None or size <= self.disk_object_limit):
+            response.body_iterator = self._tee(key, response, response.body_iterator)
+        response.headers["x-cache"] = "MISS"
+        return response
+
+    async def _tee(self, key: str, response: Response, iterator: AsyncIterable[str | bytes | memoryview]):
+        assert self.directory is not None
+        path = self.directory / f"{key}.bin"
+        part = self.directory / f"{key}.bin.part"
+        digest = hashlib.sha1()
+        size = 0
+        complete = False
+        self._pending.add(key)
+        file = await asyncio.to_thread(part.open, "wb")
+        try:
+            async for chunk in iterator:
+                data = chunk.encode() if isinstance(chunk, str) else bytes(chunk)
+                if file is not None:
+                    size += len(data)
+                    if size > self.disk_object_limit:
+                        await asyncio.to_thread(file.close)
+                        file = None
+                    else:
+                        digest.update(data)
+                        await asyncio.to_thread(file.write, data)
+                yield data
+            complete = file is not None
+        finally:
+            self._pending.discard(key)
+            if file is not None:
+                await asyncio.to_thread(file.close)
+            entry = self._new_entry(key, size, response, f'"{digest.hexdigest()}"') if complete else None
+            if entry is None:
+                part.unlink(missing_ok=True)
+            else:
+                try:
+                    part.replace(path)
+                except OSError as e:
+                    logger.warning(f"Failed to store proxy cache for {key}: {e!r}")
+                    part.unlink(missing_ok=True)
+                else:
+                    entry.path = path
+                    self._commit(entry)
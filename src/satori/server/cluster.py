@@ -0,0 +1,416 @@
+"""集群模式
+
+多个 Server 节点通过消息总线 (`EventBus`) 共享登录信息与事件：
+
+- 节点加入总线后互相同步各自的登录信息，客户端连接任一节点即可获得全部登录信息；
+- 代理路由前缀只由拥有对应适配器的节点提供，各节点只公布本节点的前缀；
+- 各节点产生的事件会广播给其他节点，再由其他节点推送给各自的客户端；
+- 对不属于本节点的登录信息的 API 调用，会转发给拥有该登录信息的节点处理。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import itertools
+import secrets
+import struct
+from abc import ABCMeta, abstractmethod
+from collections.abc import Iterable
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from loguru import logger
+from starlette.requests import Request as StarletteRequest
+from yarl import URL
+
+from satori.const import EventType
+from satori.model import Event, Login
+from satori.utils import decode, encode_bytes
+
+from .ratelimit import RateLimited
+from .registry import LOGIN_EVENTS
+
+if TYPE_CHECKING:
+    from . import Server
+
+_LENGTH = struct.Struct("!I")
+_HANDSHAKE_LIMIT = 64 * 1024
+"""鉴权完成前单条消息的大小上限"""
+_HANDSHAKE_TIMEOUT = 10
+
+
+def _loopback(address: str) -> bool:
+    """地址是否只能从本机访问"""
+    url = URL(address)
+    if url.scheme == "unix" or url.host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(url.host or "").is_loopback
+    except ValueError:
+        return False
+
+
+class EventBus(metaclass=ABCMeta):
+    """集群节点之间的消息总线"""
+
+    @abstractmethod
+    async def join(self, node: Cluster) -> None:
+        """将节点加入总线"""
+
+    @abstractmethod
+    async def leave(self, node: Cluster) -> None:
+        """将节点移出总线"""
+
+    @abstractmethod
+    async def send(self, source: str, target: str, message: dict[str, Any]) -> None:
+        """向指定节点发送消息"""
+
+    @abstractmethod
+    async def broadcast(self, source: str, message: dict[str, Any]) -> None:
+        """向其他全部节点发送消息"""
+
+    @abstractmethod
+    async def call(self, source: str, target: str, message: dict[str, Any], timeout: float = 300) -> dict[str, Any]:
+        """请求指定节点处理 API 调用并等待结果"""
+
+
+class LocalBus(EventBus):
+    """进程内的消息总线，由同一进程中的多个 Server 共享同一实例"""
+
+    def __init__(self):
+        self.nodes: dict[str, Cluster] = {}
+
+    async def join(self, node: Cluster) -> None:
+        others = list(self.nodes.values())
+        self.nodes[node.node_id] = node
+        for other in others:
+            await other.on_connect(node.node_id)
+            await node.on_connect(other.node_id)
+
+    async def leave(self, node: Cluster) -> None:
+        self.nodes.pop(node.node_id, None)
+        for other in list(self.nodes.values()):
+            await other.on_disconnect(node.node_id)
+
+    async def send(self, source: str, target: str, message: dict[str, Any]) -> None:
+        if node := self.nodes.get(target):
+            await node.handle(source, message)
+
+    async def broadcast(self, source: str, message: dict[str, Any]) -> None:
+        for node_id, node in list(self.nodes.items()):
+            if node_id != source:
+                await node.handle(source, message)
+
+    async def call(self, source: str, target: str, message: dict[str, Any], timeout: float = 300) -> dict[str, Any]:
+        if (node := self.nodes.get(target)) is None:
+            return {"status": 503, "message": f"Node {target!r} is not available"}
+        try:
+            return await asyncio.wait_for(node.handle_call(source, message), timeout)
+        except asyncio.TimeoutError:
+            return {"status": 504, "message": f"Node {target!r} did not respond in {timeout}s"}
+
+
+class SocketBus(EventBus):
+    """基于 TCP 或 Unix socket 的消息总线
+
+    每个节点监听 `listen` 地址，并主动连接 `peers` 中的地址，断开后按 `reconnect_interval` 重连。
+    地址形如 `tcp://127.0.0.1:7000` 或 `unix:///tmp/satori.sock`。
+
+    建立连接时双方以 `secret` 进行质询-应答鉴权，未通过的连接会被断开；
+    `secret` 为 None 时使用 `Server.token`。两者均未设置时只允许监听本机地址。
+
+    Args:
+        listen (str | None): 本节点的监听地址，为 None 时不监听
+        peers (Iterable[str]): 需要连接的其他节点的地址
+        reconnect_interval (float): 重连间隔 (秒)
+        secret (str | None): 节点之间共享的密钥
+    """
+
+    def __init__(
+        self,
+        listen: str | None = None,
+        peers: Iterable[str] = (),
+        reconnect_interval: float = 5,
+        secret: str | None = None,
+    ):
+        self.listen = listen
+        self.peers = list(peers)
+        self.reconnect_interval = reconnect_interval
+        self.secret = secret
+        self._key = b""
+        self.node: Cluster | None = None
+        self.links: dict[str, list[asyncio.StreamWriter]] = {}
+        self._server: asyncio.Server | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._calls: dict[int, tuple[str, asyncio.Future[dict[str, Any]]]] = {}
+        self._ids = itertools.count(1)
+
+    @staticmethod
+    async def _open(address: str):
+        url = URL(address)
+        if url.scheme == "unix":
+            return await asyncio.open_unix_connection(url.path)
+        return await asyncio.open_connection(url.host, url.port)
+
+    async def join(self, node: Cluster) -> None:
+        secret = self.secret if self.secret is not None else node.server.token
+        if not secret and self.listen and not _loopback(self.listen):
+            raise ValueError(f"SocketBus requires a secret to listen on non-loopback address {self.listen!r}")
+        self._key = (secret or "").encode()
+        self.node = node
+        if self.listen:
+            url = URL(self.listen)
+            if url.scheme == "unix":
+                self._server = await asyncio.start_unix_server(self._handle, url.path)
+            else:
+                self._server = await asyncio.start_server(self._handle, url.host, url.port)
+        for address in self.peers:
+            self._spawn(self._connect(address))
+
+    async def leave(self, node: Cluster) -> None:
+        if self._server is not None:
+            self._server.close()
+        for task in self._tasks:
+            task.cancel()
+        for writers in self.links.values():
+            for writer in writers:
+                writer.close()
+        self.links.clear()
+        self.node = None
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _connect(self, address: str):
+        while True:
+            try:
+                reader, writer = await self._open(address)
+            except OSError:
+                await asyncio.sleep(self.reconnect_interval)
+                continue
+            await self._handle(reader, writer)
+            await asyncio.sleep(self.reconnect_interval)
+
+    def _write(self, writer: asyncio.StreamWriter, message: dict[str, Any]):
+        data = encode_bytes(message)
+        writer.writelines([_LENGTH.pack(len(data)), data])
+
+    @staticmethod
+    async def _read(reader: asyncio.StreamReader, limit: int | None = None) -> dict[str, Any]:
+        (length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+        if limit is not None and length > limit:
+            raise ConnectionError(f"Message too large: {length}")
+        return decode(await reader.readexactly(length))
+
+    def _digest(self, nonce: str) -> str:
+        return hmac.new(self._key, nonce.encode(), hashlib.sha256).hexdigest()
+
+    async def _handshake(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> str | None:
+        """交换节点 ID 并互相验证密钥；成功时返回对方的节点 ID"""
+        assert self.node is not None
+        nonce = secrets.token_hex(16)
+        self._write(writer, {"type": "hello", "node": self.node.node_id, "nonce": nonce})
+        hello = await self._read(reader, _HANDSHAKE_LIMIT)
+        if not isinstance(hello, dict) or hello.get("type") != "hello" or not isinstance(hello.get("nonce"), str):
+            return None
+        self._write(writer, {"type": "auth", "digest": self._digest(hello["nonce"])})
+        auth = await self._read(reader, _HANDSHAKE_LIMIT)
+        if not isinstance(auth, dict) or not hmac.compare_digest(str(auth.get("digest")), self._digest(nonce)):
+            logger.warning(f"Cluster peer {hello.get('node')!r} failed authentication")
+            return None
+        if hello["node"] == self.node.node_id:
+            return None
+        return hello["node"]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        assert self.node is not None
+        node = self.node
+        peer = None
+        try:
+            try:
+                peer = await asyncio.wait_for(self._handshake(reader, writer), _HANDSHAKE_TIMEOUT)
+            except asyncio.TimeoutError:
+                return
+            if peer is None:
+                return
+            self.links.setdefault(peer, []).append(writer)
+            # 两个节点互相连接时会建立两条链路，仅在第一条链路建立时同步
+            if len(self.links[peer]) == 1:
+                await node.on_connect(peer)
+            while True:
+                message = await self._read(reader)
+                if not isinstance(message, dict) or not isinstance(message.get("type"), str):
+                    raise ValueError(f"Malformed cluster message from {peer!r}")
+                if message["type"] == "call":
+                    self._spawn(self._reply(writer, peer, message))
+                elif message["type"] == "result":
+                    if (call := self._calls.pop(message["id"], None)) and not call[1].done():
+                        call[1].set_result(message["result"])
+                else:
+                    await node.handle(peer, message)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except (ValueError, KeyError, TypeError) as e:
+            # 格式错误的消息视为协议错误，断开该链路
+            logger.warning(f"Cluster link to {peer!r} closed: {e!r}")
+        finally:
+            writer.close()
+            if peer is not None and writer in (writers := self.links.get(peer, [])):
+                writers.remove(writer)
+                if not writers:
+                    del self.links[peer]
+                    for target, future in self._calls.values():
+                        if target == peer and not future.done():
+                            future.set_result({"status": 503, "message": f"Node {peer!r} disconnected"})
+                    await node.on_disconnect(peer)
+
+    async def _reply(self, writer: asyncio.StreamWriter, peer: str, message: dict[str, Any]):
+        assert self.node is not None
+        try:
+            result = await self.node.handle_call(peer, message["body"])
+        except (KeyError, TypeError, AttributeError):
+            result = {"status": 400, "message": "Malformed cluster call"}
+        if not writer.is_closing():
+            self._write(writer, {"type": "result", "id": message["id"], "result": result})
+
+    async def send(self, source: str, target: str, message: dict[str, Any]) -> None:
+        if writers := self.links.get(target):
+            self._write(writers[0], message)
+            await writers[0].drain()
+
+    async def broadcast(self, source: str, message: dict[str, Any]) -> None:
+        for writers in list(self.links.values()):
+            self._write(writers[0], message)
+        for writers in list(self.links.values()):
+            await writers[0].drain()
+
+    async def call(self, source: str, target: str, message: dict[str, Any], timeout: float = 300) -> dict[str, Any]:
+        if not (writers := self.links.get(target)):
+            return {"status": 503, "message": f"Node {target!r} is not available"}
+        call_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._calls[call_id] = (target, future)
+        try:
+            self._write(writers[0], {"type": "call", "id": call_id, "body": message})
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return {"status": 504, "message": f"Node {target!r} did not respond in {timeout}s"}
+        except ConnectionError:
+            return {"status": 503, "message": f"Node {target!r} is not available"}
+        finally:
+            self._calls.pop(call_id, None)
+
+
+class Cluster:
+    """Server 在集群中的节点
+
+    Args:
+        server (Server): 本节点的服务端
+        bus (EventBus): 消息总线
+        node_id (str): 节点 ID
+        call_timeout (float): 转发 API 调用时等待远端节点响应的时长 (秒)
+    """
+
+    def __init__(self, server: Server, bus: EventBus, node_id: str, call_timeout: float = 300):
+        self.server = server
+        self.bus = bus
+        self.node_id = node_id
+        self.call_timeout = call_timeout
+        self.owners: dict[tuple[str, str], str] = {}
+        """远端登录信息到其所属节点的映射"""
+
+    async def start(self):
+        await self.bus.join(self)
+
+    async def stop(self):
+        await self.bus.leave(self)
+
+    def owner(self, platform: str, self_id: str) -> str | None:
+        """获取拥有该登录信息的远端节点"""
+        return self.owners.get((platform, self_id))
+
+    def snapshot(self) -> dict[str, Any]:
+        logins = [login.dump() for login in self.server.logins.logins if self._local(login)]
+        return {"type": "sync", "logins": logins}
+
+    def _local(self, login) -> bool:
+        return not login.user or (login.platform, login.user.id) not in self.owners
+
+    async def on_connect(self, node: str):
+        logger.info(f"Cluster node {node} connected")
+        await self.bus.send(self.node_id, node, self.snapshot())
+
+    async def on_disconnect(self, node: str):
+        logger.info(f"Cluster node {node} disconnected")
+        await self._drop(node)
+
+    async def _drop(self, node: str, keep: Iterable[tuple[str, str]] = ()):
+        """移除远端节点的登录信息，并向本节点的客户端推送 `login-removed` 事件"""
+        keep = set(keep)
+        for key in [key for key, owner in self.owners.items() if owner == node and key not in keep]:
+            del self.owners[key]
+            if login := self.server.logins.get(*key):
+                await self.server.post(Event(EventType.LOGIN_REMOVED, datetime.now(), login), publish=False)
+
+    async def publish(self, body: dict[str, Any]):
+        """将本节点产生的事件广播给其他节点"""
+        await self.bus.broadcast(self.node_id, {"type": "event", "event": body})
+
+    async def handle(self, source: str, message: dict[str, Any]):
+        if message["type"] == "sync":
+            logins = [login for raw in message["logins"] if (login := Login.parse(raw)).user and login.platform]
+            await self._drop(source, keep=((login.platform, login.user.id) for login in logins))  # type: ignore
+            for login in logins:
+                key = (login.platform, login.user.id)  # type: ignore
+                if key in self.owners:
+                    self.server.logins.add(login)
+                    continue
+                self.owners[key] = source
+                # 客户端可能在该节点加入前已完成鉴权，以事件的形式通知新的登录信息
+                await self.server.post(Event(EventType.LOGIN_ADDED, datetime.now(), login), publish=False)
+        elif message["type"] == "event":
+            event = Event.parse(message["event"])
+            if event.type in LOGIN_EVENTS and event.login.user:
+                key = (event.login.platform, event.login.user.id)
+                if event.type == EventType.LOGIN_REMOVED:
+                    self.owners.pop(key, None)
+                else:
+                    self.owners[key] = source
+            await self.server.post(event, publish=False)
+
+    async def handle_call(self, source: str, message: dict[str, Any]) -> dict[str, Any]:
+        """处理其他节点转发的 API 调用，返回值的形式与批量调用的单项结果相同"""
+        from . import _batch_item_handler
+
+        action, platform, self_id = message["action"], message["platform"], message["self_id"]
+        if (func := self.server._dispatch.resolve(platform, self_id, action)) is None:
+            return {"status": 404, "message": f"Action {action!r} is not supported in current platform {platform!r}."}
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": f"{self.server.path}/{self.server.version}/{action}",
+            "headers": [(b"satori-platform", platform.encode()), (b"satori-user-id", self_id.encode())],
+            "query_string": b"",
+        }
+        try:
+            await self.server.admit(platform, self_id, action, f"node:{source}")
+        except RateLimited as e:
+            return {"status": 429, "message": str(e), "retry_after": e.retry_after}
+        result = await _batch_item_handler(
+            action, StarletteRequest(scope), func, message.get("params") or {}, platform, self_id
+        )
+        if result["status"] == 429:
+            self.server.throttled(platform, self_id, action, result.get("retry_after"))
+        return result
+
+    async def forward(self, action: str, params: dict, platform: str, self_id: str) -> dict[str, Any]:
+        """将 API 调用转发给拥有该登录信息的节点"""
+        if (node := self.owner(platform, self_id)) is None:
+            return {"status": 404, "message": f"Login {platform}:{self_id} not found in cluster"}
+        message = {"action": action, "params": params, "platform": platform, "self_id": self_id}
+        return await self.bus.call(self.node_id, node, message, self.call_timeout)
@@ -1,40 +1,64 @@
 from __future__ import annotations
 
 import asyncio
+import time
+from contextlib import suppress
 
 from loguru import logger
 from starlette.websockets import WebSocket, WebSocketDisconnect
 
 from satori.model import Opcode
-from satori.utils import decode, encode
+from satori.utils import decode_frame, encode, encode_msgpack
+
+from .subscription import Subscription
 
 
 class WebsocketConnection:
+    """服务端的 WebSocket 连接
+
+    `binary` 为 True 时 (客户端在 `IDENTIFY` 中声明了 `encoding: msgpack`)，信令以 msgpack 编码的二进制帧发送；
+    客户端发来的信令无论文本帧还是二进制帧均可解析。
+    """
+
     connection: WebSocket
 
-    def __init__(self, connection: WebSocket):
+    def __init__(self, connection: WebSocket, subscription: Subscription | None = None, binary: bool = False):
         self.connection = connection
+        self.subscription = subscription
+        self.binary = binary
         self.close_signal: asyncio.Event = asyncio.Event()
 
     @property
     def alive(self) -> bool:
         return not self.close_signal.is_set()
 
-    async def heartbeat(self):
-        while True:
-            try:
-                msg = await asyncio.wait_for(self.connection.receive_text(), timeout=12)
-                msg = decode(msg)
-                if not isinstance(msg, dict) or msg.get("op") != Opcode.PING:
-                    continue
-                await self.connection.send_text(encode({"op": Opcode.PONG}))
-            except asyncio.TimeoutError:
-                logger.warning(f"Connection {id(self):x} heartbeat timeout, closing connection.")
-                await self.connection.close()
-                await self.connection_closed()
-                break
-            except WebSocketDisconnect:
+    async def receive_loop(self, monitor: HeartbeatMonitor):
+        """在连接所在的处理协程中读取客户端信令，直到连接断开
+
+        每条信令都会刷新心跳时间；PING 回复 PONG，其余信令与无法解析的数据被忽略而不会关闭连接。
+        """
+        while self.alive:
+            message = await self.connection.receive()
+            if message["type"] == "websocket.disconnect":
                 return
+            monitor.touch(self)
+            try:
+                msg = decode_frame(message["text"] if message.get("text") is not None else message["bytes"])
+            except Exception as e:
+                logger.trace(f"Connection {id(self):x} received invalid payload: {e!r}")
+                continue
+            if isinstance(msg, dict) and msg.get("op") == Opcode.PING:
+                try:
+                    await self.send({"op": Opcode.PONG})
+                except (WebSocketDisconnect, RuntimeError):
+                    return
+            else:
+                logger.trace(f"Connection {id(self):x} received payload: {msg}")
+
+    async def close(self):
+        self.close_signal.set()
+        with suppress(Exception):
+            await self.connection.close()
 
     async def connection_closed(self):
         self.close_signal.set()
@@ -42,5 +66,61 @@ class WebsocketConnection:
     async def wait_for_available(self):
         return
 
+    def encode(self, payload: dict) -> str | bytes:
+        """按连接协商的编码方式编码信令"""
+        return encode_msgpack(payload) if self.binary else encode(payload)
+
     async def send(self, payload: dict) -> None:
-        return await self.connection.send_text(encode(payload))
+        return await self.send_raw(self.encode(payload))
+
+    async def send_raw(self, data: str | bytes) -> None:
+        """发送已编码的信令；bytes 以二进制帧发送"""
+        if isinstance(data, bytes):
+            return await self.connection.send_bytes(data)
+        return await self.connection.send_text(data)
+
+
+class HeartbeatMonitor:
+    """集中管理全部连接的心跳
+
+    各连接最后一次收到信令的时间按先后顺序记录在同一个字典中，由单个任务每隔 `interval` 秒从最早的记录开始扫描，
+    关闭超过 `timeout` 秒未收到任何信令的连接；连接本身不再需要独立的心跳任务与计时器。
+    """
+
+    def __init__(self, timeout: float = 12, interval: float = 2):
+        self.timeout = timeout
+        self.interval = interval
+        self._last_seen: dict[WebsocketConnection, float] = {}
+
+    def __len__(self):
+        return len(self._last_seen)
+
+    def add(self, connection: WebsocketConnection):
+        self._last_seen[connection] = time.monotonic()
+
+    def touch(self, connection: WebsocketConnection):
+        # 重新插入以保持字典按时间排序
+        if self._last_seen.pop(connection, None) is not None:
+            self._last_seen[connection] = time.monotonic()
+
+    def discard(self, connection: WebsocketConnection):
+        self._last_seen.pop(connection, None)
+
+    async def sweep(self):
+        """关闭心跳超时的连接"""
+        deadline = time.monotonic() - self.timeout
+        expired = []
+        for connection, last_seen in self._last_seen.items():
+            if last_seen > deadline:
+                break
+            expired.append(connection)
+        for connection in expired:
+            logger.warning(f"Connection {id(connection):x} heartbeat timeout, closing connection.")
+            del self._last_seen[connection]
+        if expired:
+            await asyncio.gather(*(connection.close() for connection in expired))
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.sweep()
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from .route import RouteCall
+
+if TYPE_CHECKING:
+    from .adapter import Adapter
+    from .model import Router
+
+INTERNAL_ROUTE = "internal/*"
+
+
+def lookup_route(routes: dict[str, RouteCall[Any, Any]], action: str) -> RouteCall[Any, Any] | None:
+    if action in routes:
+        return routes[action]
+    if action.startswith("internal"):
+        return routes.get(INTERNAL_ROUTE)
+    return None
+
+
+class DispatchIndex:
+    """API 调用的分发索引
+
+    以 (platform, self_id) 缓存负责该账号的适配器，以 action 缓存服务端自身与各 Router 的路由，
+    使每次请求只需常数次字典查找即可定位处理函数。
+
+    适配器缓存在收到 `login-*` 事件时按账号失效；
+    路由缓存在 `Server.apply` 或 `Server.route` 注册新的处理函数时整体清空。
+    """
+
+    def __init__(self, adapters: list[Adapter], routes: dict[str, RouteCall[Any, Any]], routers: list[Router]):
+        self.adapters = adapters
+        self.routes = routes
+        self.routers = routers
+        self._owners: dict[tuple[str, str], tuple[Adapter, ...]] = {}
+        self._fallback: dict[str, RouteCall[Any, Any]] = {}
+
+    def invalidate(self):
+        """清空全部缓存，在适配器或路由发生变化后调用"""
+        self._owners.clear()
+        self._fallback.clear()
+
+    def forget(self, platform: str, self_id: str):
+        """移除某一账号的适配器缓存"""
+        self._owners.pop((platform, self_id), None)
+
+    def owners(self, platform: str, self_id: str) -> tuple[Adapter, ...]:
+        key = (platform, self_id)
+        if (adapters := self._owners.get(key)) is not None:
+            return adapters
+        adapters = tuple(adapter for adapter in self.adapters if adapter.ensure(platform, self_id))
+        # 不缓存未命中的结果，账号上线时无需额外通知
+        if adapters:
+            self._owners[key] = adapters
+        return adapters
+
+    def _lookup_fallback(self, action: str) -> RouteCall[Any, Any] | None:
+        if (func := lookup_route(self.routes, action)) is not None:
+            return func
+        for router in self.routers:
+            if (func := lookup_route(router.routes, action)) is not None:
+                return func
+        return None
+
+    def resolve(self, platform: str, self_id: str, action: str) -> RouteCall[Any, Any] | None:
+        for adapter in self.owners(platform, self_id):
+            if (func := lookup_route(adapter.routes, action)) is not None:
+                return func
+        if (func := self._fallback.get(action)) is not None:
+            return func
+        if (func := self._lookup_fallback(action)) is not None:
+            self._fallback[action] = func
+        return func
@@ -1,4 +1,26 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
 import re
+import secrets
+from dataclasses import dataclass, field
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO
+
+from starlette.datastructures import FormData, Headers, UploadFile
+from starlette.formparsers import MultiPartException
+from starlette.requests import Request as StarletteRequest
+
+try:
+    import python_multipart as multipart
+    from python_multipart.exceptions import FormParserError
+    from python_multipart.multipart import parse_options_header
+except ModuleNotFoundError:  # python-multipart < 0.0.13
+    import multipart  # type: ignore
+    from multipart.exceptions import FormParserError  # type: ignore
+    from multipart.multipart import parse_options_header  # type: ignore
 
 
 def parse_content_disposition(header_value):
@@ -11,3 +33,209 @@ def parse_content_disposition(header_value):
             parsed_data[key.strip('"')] = value.strip('"')
         return parsed_data
     raise ValueError(header_value)
+
+
+class UploadTooLarge(MultiPartException):
+    """上传的文件超过大小限制"""
+
+
+class UploadedFile(UploadFile):
+    """接收过程中已计算 sha256 的上传文件
+
+    若解析时指定了目录，文件内容直接写入该目录下的 `path`，可以通过重命名取用而无需再次复制。
+    """
+
+    def __init__(
+        self,
+        file: BinaryIO,
+        *,
+        size: int | None = None,
+        filename: str | None = None,
+        headers: Headers | None = None,
+        path: Path | None = None,
+    ):
+        super().__init__(file, size=size, filename=filename, headers=headers)
+        self.path = path
+        self.sha256 = hashlib.sha256()
+        self.received = 0
+
+
+@dataclass(eq=False)
+class _Part:
+    headers: list[tuple[bytes, bytes]] = field(default_factory=list)
+    disposition: bytes = b""
+    name: str = ""
+    filename: str | None = None
+    data: bytearray = field(default_factory=bytearray)
+    file: UploadedFile | None = None
+
+
+def _decode(value: bytes, charset: str) -> str:
+    try:
+        return value.decode(charset)
+    except (UnicodeDecodeError, LookupError):
+        return value.decode("latin-1")
+
+
+class UploadParser:
+    """流式解析 multipart 上传请求
+
+    只依赖 python-multipart 的公开接口。解析回调只记录待处理的操作，文件的打开、写入与关闭都在线程池中进行；
+    写入的同时计算 sha256，并在接收过程中检查单个文件的大小限制。
+    """
+
+    max_files = 1000
+    max_fields = 1000
+    max_part_size = 1024 * 1024
+    """非文件字段的大小上限"""
+    spool_max_size = 1024 * 1024
+    """未指定目录时，文件内容超过该大小后写入临时文件"""
+
+    def __init__(self, request: StarletteRequest, directory: Path | None = None, max_file_size: int | None = None):
+        self.headers = request.headers
+        self.stream = request.stream()
+        self.directory = directory
+        self.max_file_size = max_file_size
+        self.items: list[tuple[str, str | _Part]] = []
+        self.files: list[UploadedFile] = []
+        self._charset = "utf-8"
+        self._part = _Part()
+        self._header_name = b""
+        self._header_value = b""
+        self._fields = 0
+        self._files = 0
+        self._pending: list[tuple[_Part, bytes | None]] = []
+        """待处理的文件操作：(part, None) 打开文件，(part, data) 写入数据"""
+
+    def on_part_begin(self) -> None:
+        self._part = _Part()
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        name = self._header_name.lower()
+        if name == b"content-disposition":
+            self._part.disposition = self._header_value
+        self._part.headers.append((name, self._header_value))
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._part.disposition)
+        if b"name" not in options:
+            raise MultiPartException('The Content-Disposition header field "name" must be provided.')
+        self._part.name = _decode(options[b"name"], self._charset)
+        if b"filename" in options:
+            self._files += 1
+            if self._files > self.max_files:
+                raise MultiPartException(f"Too many files. Maximum number of files is {self.max_files}.")
+            self._part.filename = _decode(options[b"filename"], self._charset)
+            self._pending.append((self._part, None))
+        else:
+            self._fields += 1
+            if self._fields > self.max_fields:
+                raise MultiPartException(f"Too many fields. Maximum number of fields is {self.max_fields}.")
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._part.filename is None:
+            if len(self._part.data) + end - start > self.max_part_size:
+                raise MultiPartException(f"Part exceeded maximum size of {self.max_part_size // 1024}KB.")
+            self._part.data.extend(data[start:end])
+        else:
+            self._pending.append((self._part, data[start:end]))
+
+    def on_part_end(self) -> None:
+        if self._part.filename is None:
+            self.items.append((self._part.name, _decode(self._part.data, self._charset)))
+        else:
+            # 文件在处理 _pending 时才会打开，解析完成后再取出
+            self.items.append((self._part.name, self._part))
+
+    def _open(self, part: _Part) -> UploadedFile:
+        path = None
+        if self.directory is not None:
+            path = self.directory / f"{secrets.token_hex(16)}.part"
+            fp: BinaryIO = path.open("w+b")
+        else:
+            fp = SpooledTemporaryFile(max_size=self.spool_max_size)  # type: ignore
+        return UploadedFile(fp, size=0, filename=part.filename, headers=Headers(raw=part.headers), path=path)
+
+    async def _flush(self):
+        for part, data in self._pending:
+            if data is None:
+                part.file = await asyncio.to_thread(self._open, part)
+                self.files.append(part.file)
+                continue
+            file = part.file
+            assert file is not None
+            file.received += len(data)
+            if self.max_file_size is not None and file.received > self.max_file_size:
+                raise UploadTooLarge(f"File {file.filename!r} exceeds size limit {self.max_file_size}")
+            file.sha256.update(data)
+            await file.write(data)
+        self._pending.clear()
+
+    async def parse(self) -> FormData:
+        _, params = parse_options_header(self.headers["Content-Type"])
+        charset = params.get(b"charset", b"utf-8")
+        self._charset = charset.decode("latin-1") if isinstance(charset, bytes) else charset
+        if b"boundary" not in params:
+            raise MultiPartException("Missing boundary in multipart.")
+        parser = multipart.MultipartParser(
+            params[b"boundary"],
+            {
+                "on_part_begin": self.on_part_begin,
+                "on_part_data": self.on_part_data,
+                "on_part_end": self.on_part_end,
+                "on_header_field": self.on_header_field,
+                "on_header_value": self.on_header_value,
+                "on_header_end": self.on_header_end,
+                "on_headers_finished": self.on_headers_finished,
+            },
+        )
+        try:
+            async for chunk in self.stream:
+                parser.write(chunk)
+                await self._flush()
+            parser.finalize()
+            await self._flush()
+        except FormParserError as e:
+            raise MultiPartException("Invalid multipart data.") from e
+        for file in self.files:
+            await file.seek(0)
+        return FormData([(name, value if isinstance(value, str) else value.file) for name, value in self.items])
+
+    async def discard(self):
+        """关闭并删除解析过程中打开的文件"""
+        for file in self.files:
+            await asyncio.to_thread(file.file.close)
+            if file.path is not None:
+                await asyncio.to_thread(file.path.unlink, True)
+
+
+async def parse_upload(
+    request: StarletteRequest, directory: Path | None = None, max_file_size: int | None = None
+) -> FormData:
+    """解析上传请求；非 multipart 请求按普通表单解析"""
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        return await request.form()
+    if directory is not None:
+        await asyncio.to_thread(directory.mkdir, parents=True, exist_ok=True)
+    parser = UploadParser(request, directory, max_file_size)
+    try:
+        return await parser.parse()
+    except BaseException:
+        await asyncio.shield(parser.discard())
+        raise
+
+
+async def close_upload(form: FormData):
+    """关闭表单中的文件，并删除未被取用的临时文件"""
+    await form.close()
+    for _, item in form.multi_items():
+        if isinstance(item, UploadedFile) and item.path is not None:
+            item.path.unlink(missing_ok=True)
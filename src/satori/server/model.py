@@ -7,6 +7,8 @@ from starlette.responses import Response
 from satori.const import Api
 from satori.model import Login
 
+from .subscription import Subscription
+
 if TYPE_CHECKING:
     from .route import RouteCall
 
@@ -47,3 +49,4 @@ class WebhookEndpoint:
     url: str
     token: str | None = None
     timeout: float | None = None
+    subscription: Subscription | None = None
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    rate: float
+    """每秒补充的令牌数"""
+    burst: int = 1
+    """令牌桶容量，即允许的突发请求数"""
+
+
+class RateLimited(Exception):
+    """请求需要等待的时间超过了上限"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limit exceeded, retry after {retry_after:.2f}s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """令牌桶
+
+    令牌不足时请求按客户端分别排队，补充的令牌在各客户端之间轮流分配，
+    因此单个客户端的大量请求不会阻塞其他客户端。
+    """
+
+    def __init__(self, limit: RateLimit):
+        self.limit = limit
+        self.tokens = float(limit.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._queues: OrderedDict[str, deque[asyncio.Future[None]]] = OrderedDict()
+        self._waiting = 0
+        self._timer: asyncio.TimerHandle | None = None
+
+    def _refill(self, now: float):
+        start = max(self.updated, self.blocked_until)
+        if now > start:
+            self.tokens = min(self.limit.burst, self.tokens + (now - start) * self.limit.rate)
+        self.updated = now
+
+    def _delay(self, tokens: float, now: float) -> float:
+        """获得第 `tokens` 个令牌还需等待的时间"""
+        wait = max(0.0, tokens - self.tokens) / self.limit.rate
+        return max(0.0, self.blocked_until - now) + wait
+
+    @property
+    def remaining(self) -> int:
+        return max(0, math.floor(self.tokens) - self._waiting)
+
+    def reset_after(self) -> float:
+        """令牌桶恢复满额所需的时间"""
+        now = time.monotonic()
+        self._refill(now)
+        return self._delay(self.limit.burst + self._waiting, now)
+
+    def block(self, seconds: float):
+        """清空令牌并在 `seconds` 秒内停止补充，用于响应平台返回的频率限制"""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens = 0
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+    async def acquire(self, client: str, max_wait: float | None = None):
+        """获取一个令牌；预计等待时间超过 `max_wait` 时抛出 `RateLimited`"""
+        now = time.monotonic()
+        self._refill(now)
+        if not self._waiting and now >= self.blocked_until and self.tokens >= 1:
+            self.tokens -= 1
+            return
+        if max_wait is not None and (delay := self._delay(self._position(client) + 1, now)) > max_wait:
+            raise RateLimited(delay)
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(client, deque()).append(future)
+        self._waiting += 1
+        self._schedule()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 令牌已经分配给该请求，归还给其他请求
+                self.tokens = min(self.limit.burst, self.tokens + 1)
+                self._schedule()
+            raise
+
+    def _position(self, client: str) -> int:
+        """按轮流分配的顺序，该客户端的新请求之前需要放行的请求数"""
+        own = len(self._queues.get(client, ()))
+        return own + sum(min(len(queue), own + 1) for key, queue in self._queues.items() if key != client)
+
+    def _schedule(self):
+        if self._timer is not None or not self._waiting:
+            return
+        now = time.monotonic()
+        self._timer = asyncio.get_running_loop().call_later(self._delay(1, now), self._release)
+
+    def _release(self):
+        self._timer = None
+        self._refill(time.monotonic())
+        while self._queues and self.tokens >= 1 and time.monotonic() >= self.blocked_until:
+            client, queue = next(iter(self._queues.items()))
+            future = queue.popleft()
+            self._waiting -= 1
+            if queue:
+                self._queues.move_to_end(client)
+            else:
+                del self._queues[client]
+            if future.cancelled():
+                continue
+            self.tokens -= 1
+            future.set_result(None)
+        self._schedule()
+
+
+class RateLimiter:
+    """按 (platform, self_id, action) 划分令牌桶的限流器
+
+    `limits` 以接口名为键设置各接口的限制，未列出的接口使用 `default`，为 None 时不限制。
+    令牌不足的请求会排队等待，预计等待时间超过 `max_wait` 时直接以 429 拒绝。
+
+    平台返回频率限制错误 (`RateLimitException`) 时，对应的令牌桶会在其给出的 `retry_after`
+    (缺省为 `penalty`) 秒内停止发放令牌。
+
+    Args:
+        limits (dict[str, RateLimit] | None): 各接口的限制
+        default (RateLimit | None): 其他接口的限制
+        max_wait (float | None): 请求排队等待的时间上限 (秒)，为 None 时不限制
+        penalty (float): 平台未给出重试时间时的暂停时长 (秒)
+    """
+
+    def __init__(
+        self,
+        limits: dict[str, RateLimit] | None = None,
+        default: RateLimit | None = None,
+        *,
+        max_wait: float | None = 30,
+        penalty: float = 1,
+    ):
+        self.limits = limits or {}
+        self.default = default
+        self.max_wait = max_wait
+        self.penalty = penalty
+        self._buckets: dict[tuple[str, str, str], TokenBucket] = {}
+
+    def bucket(self, platform: str, self_id: str, action: str) -> TokenBucket | None:
+        key = (platform, self_id, action)
+        if (bucket := self._buckets.get(key)) is None:
+            if (limit := self.limits.get(action, self.default)) is None:
+                return None
+            bucket = self._buckets[key] = TokenBucket(limit)
+        return bucket
+
+    async def acquire(self, platform: str, self_id: str, action: str, client: str) -> TokenBucket | None:
+        """等待直至允许调用，返回对应的令牌桶；接口未设置限制时返回 None"""
+        if (bucket := self.bucket(platform, self_id, action)) is not None:
+            await bucket.acquire(client, self.max_wait)
+        return bucket
+
+    def penalize(self, platform: str, self_id: str, action: str, retry_after: float | None = None):
+        """根据平台返回的频率限制暂停对应的令牌桶"""
+        if (bucket := self.bucket(platform, self_id, action)) is not None:
+            bucket.block(self.penalty if retry_after is None else retry_after)
+
+    @staticmethod
+    def headers(bucket: TokenBucket) -> dict[str, str]:
+        return {
+            "X-RateLimit-Limit": str(bucket.limit.burst),
+            "X-RateLimit-Remaining": str(bucket.remaining),
+            "X-RateLimit-Reset": f"{bucket.reset_after():.3f}",
+        }
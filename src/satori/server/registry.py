@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import replace
+from typing import Any
+
+from satori.const import EventType
+from satori.model import Event, Login, LoginPartial, Opcode
+from satori.utils import encode, encode_bytes
+
+LOGIN_EVENTS = frozenset({EventType.LOGIN_ADDED, EventType.LOGIN_UPDATED, EventType.LOGIN_REMOVED})
+
+
+class LoginRegistry:
+    """服务端的登录信息注册表
+
+    启动时从各 Provider 同步全部登录信息，此后由 `login-*` 事件增量维护；
+    不推送 `login-*` 事件的 Provider 由 `Server` 定期调用 `get_logins` 补全变化。
+    注册表保存登录信息的副本并为其分配 `sn`，不会修改 Provider 返回的对象。
+
+    `READY` 信令与 `meta` 响应会在首次使用时编码并缓存，登录信息变化时失效，
+    因此鉴权与元信息请求无需再逐个调用 `Provider.get_logins`。
+    """
+
+    def __init__(self):
+        self._logins: dict[tuple[str, str], Login | LoginPartial] = {}
+        self._proxy_urls: list[str] = []
+        self._sn = 0
+        self._payload: dict[str, Any] | None = None
+        self._ready_frame: str | None = None
+        self._meta_body: bytes | None = None
+
+    @property
+    def logins(self) -> list[Login | LoginPartial]:
+        return list(self._logins.values())
+
+    @property
+    def proxy_urls(self) -> list[str]:
+        return self._proxy_urls
+
+    def __len__(self):
+        return len(self._logins)
+
+    def __contains__(self, key: tuple[str, str]):
+        return key in self._logins
+
+    def get(self, platform: str, self_id: str) -> Login | LoginPartial | None:
+        return self._logins.get((platform, self_id))
+
+    def _invalidate(self):
+        self._payload = None
+        self._ready_frame = None
+        self._meta_body = None
+
+    def sync(self, logins: Iterable[Login | LoginPartial], proxy_urls: Iterable[str]):
+        """以给定的登录信息与代理路由前缀替换当前内容"""
+        self._logins.clear()
+        for login in logins:
+            self.add(login)
+        self._proxy_urls = list(dict.fromkeys(proxy_urls))
+        self._invalidate()
+
+    def set_proxy_urls(self, proxy_urls: Iterable[str]):
+        """替换代理路由前缀"""
+        self._proxy_urls = list(dict.fromkeys(proxy_urls))
+        self._invalidate()
+
+    def add(self, login: Login | LoginPartial):
+        """添加或更新一个登录信息"""
+        if not login.user or not login.platform:
+            return
+        key = (login.platform, login.user.id)
+        if (old := self._logins.get(key)) is None:
+            sn = self._sn
+            self._sn += 1
+        else:
+            sn = old.sn
+        self._logins[key] = replace(login, sn=sn)
+        self._invalidate()
+
+    def changed(self, login: Login | LoginPartial) -> bool:
+        """登录信息与注册表中的记录是否不同 (不比较 `sn`)"""
+        if not login.user or not login.platform:
+            return False
+        if (old := self._logins.get((login.platform, login.user.id))) is None:
+            return True
+        return replace(login, sn=old.sn).dump() != old.dump()
+
+    def remove(self, login: Login | LoginPartial):
+        """移除一个登录信息"""
+        if not login.user or not login.platform:
+            return
+        if self._logins.pop((login.platform, login.user.id), None) is not None:
+            self._invalidate()
+
+    def update(self, event: Event) -> bool:
+        """根据 `login-*` 事件更新注册表；若事件不是登录事件则返回 False"""
+        if event.type not in LOGIN_EVENTS:
+            return False
+        if event.type == EventType.LOGIN_REMOVED:
+            self.remove(event.login)
+        else:
+            self.add(event.login)
+        return True
+
+    @property
+    def payload(self) -> dict[str, Any]:
+        if self._payload is None:
+            self._payload = {
+                "logins": [login.dump() for login in self._logins.values()],
+                "proxy_urls": self._proxy_urls,
+            }
+        return self._payload
+
+    @property
+    def ready_frame(self) -> str:
+        """已编码的 `READY` 信令"""
+        if self._ready_frame is None:
+            self._ready_frame = encode({"op": Opcode.READY, "body": self.payload})
+        return self._ready_frame
+
+    @property
+    def meta_body(self) -> bytes:
+        """已编码的 `meta` 响应体"""
+        if self._meta_body is None:
+            self._meta_body = encode_bytes(self.payload)
+        return self._meta_body
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from contextvars import ContextVar
+from typing import Any
+
+from aiohttp import ClientSession
+from starlette.background import BackgroundTask
+from starlette.requests import Request as StarletteRequest
+from starlette.responses import JSONResponse, StreamingResponse
+from yarl import URL
+
+from satori.model import ModelBase
+from satori.utils import encode_bytes
+
+
+class EncodedJSONResponse(JSONResponse):
+    """使用 `satori.utils.encode_bytes` 编码的 JSON 响应
+
+    `content` 为 bytes 时视为已编码的 JSON，直接作为响应体；为模型时使用其 `dump` 结果编码。
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return bytes(content)
+        if isinstance(content, ModelBase):
+            return encode_bytes(content.dump())
+        return encode_bytes(content)
+
+
+proxy_request: ContextVar[StarletteRequest | None] = ContextVar("proxy_request", default=None)
+"""当前正在处理的代理请求，用于向上游转发 Range 等请求头"""
+
+FORWARD_REQUEST_HEADERS = ("range", "if-range", "if-none-match", "if-modified-since")
+FORWARD_RESPONSE_HEADERS = (
+    "content-type",
+    "content-length",
+    "content-range",
+    "accept-ranges",
+    "content-disposition",
+    "cache-control",
+    "etag",
+    "last-modified",
+)
+
+
+async def stream_response(
+    session: ClientSession,
+    url: str | URL,
+    *,
+    method: str = "GET",
+    headers: Mapping[str, str] | None = None,
+    chunk_size: int = 64 * 1024,
+    **kwargs: Any,
+) -> StreamingResponse:
+    """以流式响应转发上游资源，内存占用与资源大小无关
+
+    当前代理请求中的 Range 与条件请求头会被转发至上游；上游响应的状态码、
+    Content-Type、Content-Length、Content-Range 等响应头会被转发至客户端。
+
+    Args:
+        session (ClientSession): 用于请求上游的会话
+        url (str | URL): 上游资源链接
+        method (str, optional): 请求方法，默认为 GET
+        headers (Mapping[str, str], optional): 额外的请求头
+        chunk_size (int, optional): 每次读取的块大小，默认为 64KB
+        **kwargs: 传递给 `ClientSession.request` 的其他参数
+    """
+    request_headers = dict(headers or {})
+    if (request := proxy_request.get()) is not None:
+        for key in FORWARD_REQUEST_HEADERS:
+            if key in request.headers:
+                request_headers.setdefault(key, request.headers[key])
+    resp = await session.request(method, url, headers=request_headers, **kwargs)
+    response_headers = {key: value for key in FORWARD_RESPONSE_HEADERS if (value := resp.headers.get(key))}
+    if resp.headers.get("content-encoding", "identity") != "identity":
+        # aiohttp 会自动解压响应体，此时上游的 Content-Length 不再准确
+        response_headers.pop("content-length", None)
+
+    async def iter_content():
+        async for chunk in resp.content.iter_chunked(chunk_size):
+            yield chunk
+
+    return StreamingResponse(
+        iter_content(),
+        status_code=resp.status,
+        headers=response_headers,
+        background=BackgroundTask(resp.release),
+    )
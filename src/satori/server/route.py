@@ -31,7 +31,7 @@ class RouteCall(Protocol[T, R]):
     def __call__(self, request: Request[T]) -> Awaitable[R]: ...
 
 
-INTERAL: TypeAlias = RouteCall[Any, ModelBase | list[ModelBase] | dict[str, Any] | list[dict[str, Any]] | None]
+INTERAL: TypeAlias = RouteCall[Any, ModelBase | list[ModelBase] | dict[str, Any] | list[dict[str, Any]] | bytes | None]
 
 
 class MessageParam(TypedDict):
@@ -400,6 +400,10 @@ class RouterMixin:
                 self.routes[path.value] = func
             else:
                 self.routes[f"internal/{path}"] = func
+            self._routes_changed()
             return func
 
         return wrapper
+
+    def _routes_changed(self):
+        """注册新的路由后调用，用于清除依赖路由表的缓存"""
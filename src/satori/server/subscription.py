@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Any
+
+from satori.model import Event
+
+from .registry import LOGIN_EVENTS
+
+FIELDS = ("platforms", "self_ids", "types", "channels", "guilds")
+
+EventKey = tuple[str, str, str, "str | None", "str | None"]
+"""(platform, self_id, type, channel_id, guild_id)"""
+
+
+def event_key(event: Event) -> EventKey:
+    """提取事件中用于订阅匹配的字段"""
+    login = event.login
+    return (
+        login.platform or "",
+        login.user.id if login.user else "",
+        event.type,
+        event.channel.id if event.channel else None,
+        event.guild.id if event.guild else None,
+    )
+
+
+class Subscription:
+    """事件订阅过滤器
+
+    各字段为允许的取值列表，未指定的字段不做限制；指定了 `channels` 或 `guilds` 时，不含对应字段的事件不会被推送。
+
+    登录事件 (`login-*`) 仅按 `platforms` 与 `self_ids` 过滤，以保证订阅方能够维护登录状态。
+
+    过滤器在创建时编译为 (字段下标, 取值集合) 的元组，匹配时只需若干次集合查找。
+    """
+
+    __slots__ = ("raw", "_checks", "_login_checks")
+
+    def __init__(
+        self,
+        platforms: Iterable[str] | None = None,
+        self_ids: Iterable[str] | None = None,
+        types: Iterable[str] | None = None,
+        channels: Iterable[str] | None = None,
+        guilds: Iterable[str] | None = None,
+    ):
+        self.raw: dict[str, list[str]] = {}
+        checks: list[tuple[int, frozenset[str]]] = []
+        for index, (name, values) in enumerate(zip(FIELDS, (platforms, self_ids, types, channels, guilds))):
+            if values is None:
+                continue
+            if isinstance(values, str):
+                raise TypeError(f"Subscription field {name!r} must be a list of strings")
+            values = frozenset(values)
+            if not all(isinstance(value, str) for value in values):
+                raise TypeError(f"Subscription field {name!r} must be a list of strings")
+            self.raw[name] = sorted(values)
+            checks.append((index, values))
+        self._checks = tuple(checks)
+        self._login_checks = tuple(check for check in checks if check[0] < 2)
+
+    @classmethod
+    def parse(cls, raw: Any) -> Subscription | None:
+        """解析订阅请求中的 `filter` 字段；未指定任何条件时返回 None (即接收全部事件)"""
+        if raw is None:
+            return None
+        if not isinstance(raw, dict):
+            raise TypeError("Subscription filter must be an object")
+        if unknown := raw.keys() - set(FIELDS):
+            raise ValueError(f"Unknown subscription fields: {', '.join(sorted(unknown))}")
+        return cls(**raw) if any(raw.get(name) is not None for name in FIELDS) else None
+
+    def dump(self) -> dict[str, list[str]]:
+        return {name: list(values) for name, values in self.raw.items()}
+
+    def match(self, key: EventKey) -> bool:
+        checks = self._login_checks if key[2] in LOGIN_EVENTS else self._checks
+        for index, values in checks:
+            if key[index] not in values:
+                return False
+        return True
+
+    def __repr__(self):
+        return f"Subscription({', '.join(f'{k}={v!r}' for k, v in self.raw.items())})"
+
+
+def accepts(subscription: Subscription | None, key: EventKey) -> bool:
+    """未设置订阅时接收全部事件"""
+    return subscription is None or subscription.match(key)
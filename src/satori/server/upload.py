@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import re
+import shutil
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from loguru import logger
+from starlette.datastructures import UploadFile
+
+from satori.utils import decode, encode_bytes
+
+from .formdata import UploadedFile
+
+MANIFEST = "manifest.json"
+PARTS = ".upload"
+# 上传文件名的形式为 `{secrets.token_urlsafe(16)}-{filename}`
+_NAME_PAT = re.compile(r"^[\w-]{22}-.+")
+
+
+@dataclass
+class StoredFile:
+    name: str
+    size: int
+    expires_at: float
+    digest: str | None = None
+
+
+class UploadStore:
+    """上传文件的存储
+
+    文件在保存后 `ttl` 秒过期，由单个清理任务按过期时间堆统一删除；总大小超过 `quota` 时淘汰最久未访问的文件。
+    内容相同的文件只保存一份，重复上传会延长其有效期。
+
+    文件信息记录在目录下的 `manifest.json` 中，服务端重启后仍按原有的过期时间清理；
+    目录中未记录在 manifest 内的上传文件 (如异常退出前刚保存的文件) 会在加载时按修改时间重新计算有效期。
+
+    Args:
+        directory (str | Path): 存储目录
+        ttl (float): 文件的有效期 (秒)
+        quota (int | None): 存储的总大小上限，为 None 时不限制
+        sweep_interval (float): 清理任务的执行间隔 (秒)
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        *,
+        ttl: float = 600,
+        quota: int | None = None,
+        sweep_interval: float = 30,
+    ):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.quota = quota
+        self.sweep_interval = sweep_interval
+        self.size = 0
+        self._files: OrderedDict[str, StoredFile] = OrderedDict()
+        self._hashes: dict[str, str] = {}
+        self._heap: list[tuple[float, str]] = []
+        self._dirty = False
+        self.load()
+
+    @property
+    def parts(self) -> Path:
+        """接收中的文件所在目录"""
+        return self.directory / PARTS
+
+    def __len__(self):
+        return len(self._files)
+
+    def __contains__(self, name: str):
+        return name in self._files
+
+    def _track(self, entry: StoredFile):
+        self._files[entry.name] = entry
+        self.size += entry.size
+        if entry.digest:
+            self._hashes[entry.digest] = entry.name
+        heapq.heappush(self._heap, (entry.expires_at, entry.name))
+        self._dirty = True
+
+    def _remove(self, name: str):
+        entry = self._files.pop(name)
+        self.size -= entry.size
+        if entry.digest and self._hashes.get(entry.digest) == name:
+            del self._hashes[entry.digest]
+        (self.directory / name).unlink(missing_ok=True)
+        self._dirty = True
+
+    def load(self):
+        """从 manifest 恢复文件信息，并删除过期的文件"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        shutil.rmtree(self.parts, ignore_errors=True)
+        manifest = self.directory / MANIFEST
+        entries = []
+        if manifest.exists():
+            try:
+                entries = [StoredFile(**item) for item in decode(manifest.read_bytes())["files"]]
+            except Exception as e:
+                logger.warning(f"Failed to load upload manifest: {e!r}")
+        now = time.time()
+        for entry in sorted(entries, key=lambda x: x.expires_at):
+            if entry.expires_at > now and (self.directory / entry.name).is_file():
+                self._track(entry)
+        for file in self.directory.iterdir():
+            if not file.is_file() or not _NAME_PAT.match(file.name) or file.name in self._files:
+                continue
+            # manifest 定期写入，异常退出前保存的文件可能尚未记录；按修改时间计算其有效期
+            stat = file.stat()
+            if (expires_at := stat.st_mtime + self.ttl) > now:
+                self._track(StoredFile(file.name, stat.st_size, expires_at))
+            else:
+                file.unlink(missing_ok=True)
+        self._evict()
+        self.save()
+
+    def _dump_manifest(self) -> bytes:
+        self._dirty = False
+        return encode_bytes({"files": [asdict(entry) for entry in self._files.values()]})
+
+    def _write_manifest(self, data: bytes):
+        manifest = self.directory / MANIFEST
+        temp = manifest.with_suffix(".tmp")
+        temp.write_bytes(data)
+        temp.replace(manifest)
+
+    def save(self):
+        """写入 manifest"""
+        self._write_manifest(self._dump_manifest())
+
+    def get(self, name: str) -> Path | None:
+        """获取文件路径；文件不存在或已过期时返回 None"""
+        if (entry := self._files.get(name)) is None:
+            return None
+        if entry.expires_at <= time.time():
+            self._remove(name)
+            return None
+        self._files.move_to_end(name)
+        return self.directory / name
+
+    def _evict(self, keep: str | None = None):
+        if self.quota is None:
+            return
+        for name in list(self._files):
+            if self.size <= self.quota:
+                break
+            if name != keep:
+                self._remove(name)
+
+    async def save_upload(self, name: str, data: UploadFile) -> Path:
+        """保存上传的文件，返回其路径；内容相同的文件只保存一份"""
+        digest = data.sha256.hexdigest() if isinstance(data, UploadedFile) else None
+        if digest and (exists := self._hashes.get(digest)) and self.get(exists):
+            entry = self._files[exists]
+            entry.expires_at = time.time() + self.ttl
+            heapq.heappush(self._heap, (entry.expires_at, entry.name))
+            self._dirty = True
+            return self.directory / entry.name
+        if name in self._files:
+            self._remove(name)
+        file = self.directory / name
+        if isinstance(data, UploadedFile) and data.path is not None:
+            # 解析时已写入存储目录，直接移动即可
+            await data.close()
+            await asyncio.to_thread(data.path.replace, file)
+        else:
+
+            def copy():
+                data.file.seek(0)
+                with file.open("wb") as f:
+                    shutil.copyfileobj(data.file, f)
+
+            await asyncio.to_thread(copy)
+        self._track(StoredFile(name, file.stat().st_size, time.time() + self.ttl, digest))
+        self._evict(keep=name)
+        return file
+
+    def sweep(self):
+        """删除已过期的文件"""
+        now = time.time()
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, name = heapq.heappop(self._heap)
+            # 堆中可能残留已延期或已删除文件的旧记录
+            if (entry := self._files.get(name)) is not None and entry.expires_at == expires_at:
+                self._remove(name)
+
+    async def sweeper(self):
+        """定期清理过期文件并写入 manifest"""
+        try:
+            while True:
+                await asyncio.sleep(self.sweep_interval)
+                self.sweep()
+                if self._dirty:
+                    await asyncio.to_thread(self._write_manifest, self._dump_manifest())
+        finally:
+            if self._dirty:
+                self.save()
@@ -1,5 +1,10 @@
+import asyncio
+import mmap
 import ssl
 from collections import deque
+from collections.abc import AsyncIterator, Iterator
+from contextlib import contextmanager
+from pathlib import Path
 
 
 class Deque:
@@ -28,6 +33,41 @@ ctx = ssl.create_default_context()
 ctx.set_ciphers("DEFAULT")
 
 
+@contextmanager
+def map_file(path: Path) -> Iterator[memoryview]:
+    """以只读内存映射的方式打开文件
+
+    返回的视图按需从磁盘读取页面，不会将整个文件读入内存；退出上下文后映射随即关闭，视图不可再使用。
+    """
+    with path.open("rb") as f:
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空文件无法映射
+            yield memoryview(b"")
+            return
+    view = memoryview(mapping)
+    try:
+        yield view
+    finally:
+        try:
+            view.release()
+            mapping.close()
+        except BufferError:
+            # 调用方仍持有视图的切片时，映射在其不再被引用后释放
+            pass
+
+
+async def iter_file(path: Path, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+    """在线程中分块读取文件"""
+    f = await asyncio.to_thread(path.open, "rb")
+    try:
+        while chunk := await asyncio.to_thread(f.read, chunk_size):
+            yield chunk
+    finally:
+        await asyncio.to_thread(f.close)
+
+
 if __name__ == "__main__":
     d = Deque(3)
     d.append(0)
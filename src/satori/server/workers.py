@@ -0,0 +1,680 @@
+"""多进程模式
+
+主进程运行全部适配器，并与工作进程以同一端口 (SO_REUSEPORT) 提供 HTTP 与 WebSocket 服务。
+工作进程通过 Unix socket 与主进程通信：
+
+- 收到的 HTTP 请求 (API 调用、资源代理、上传等) 以 ASGI 消息的形式转发给主进程处理，响应按块传回；
+- 事件推送 (`/events`) 以外的 WebSocket 连接 (如适配器的反向连接) 同样转发给主进程，双向逐条传递消息；
+- 主进程将每个事件编码一次后广播给全部工作进程，由工作进程推送给各自的 WebSocket 连接。
+
+请求体、响应体与 WebSocket 消息按请求进行流量控制：发送方最多发送 `WINDOW` 字节尚未被对方消费的数据，
+接收方每消费一块数据就以 `CREDIT` 帧归还相应的额度。因此慢速的客户端只会阻塞自己的请求，
+而不会使另一方的缓冲区无限增长或阻塞共用的 Unix socket。
+
+工作进程由 `python -m satori.server.workers` 启动，不会重新执行用户的入口脚本。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import os
+import signal
+import socket
+import struct
+import sys
+from collections import deque
+from collections.abc import Awaitable, Callable
+from enum import IntEnum
+from typing import TYPE_CHECKING, Any
+
+from graia.amnesia.builtins.asgi.uvicorn import UvicornASGIService, WithoutSigHandlerServer
+from launart import Launart, any_completed
+from loguru import logger
+from starlette.applications import Starlette
+from starlette.routing import WebSocketRoute
+from starlette.websockets import WebSocket, WebSocketDisconnect
+from uvicorn import Config
+
+from satori.model import Opcode
+from satori.utils import MSGPACK_AVAILABLE, decode, encode, encode_bytes, encode_msgpack
+
+from .connection import HeartbeatMonitor, WebsocketConnection
+from .registry import LOGIN_EVENTS
+from .subscription import EventKey, Subscription, accepts
+
+if TYPE_CHECKING:
+    from . import Server
+
+_HEADER = struct.Struct("!IBI")
+_CREDIT = struct.Struct("!I")
+
+WINDOW = 1024 * 1024
+"""单个请求在单个方向上未被消费的数据上限 (字节)"""
+
+
+class Frame(IntEnum):
+    REQUEST = 1
+    """工作进程 -> 主进程：HTTP 请求的 scope"""
+    BODY = 2
+    """工作进程 -> 主进程：请求体分块"""
+    BODY_END = 3
+    """工作进程 -> 主进程：请求体的最后一块"""
+    CANCEL = 4
+    """工作进程 -> 主进程：客户端已断开"""
+    START = 5
+    """主进程 -> 工作进程：响应状态与响应头"""
+    CHUNK = 6
+    """主进程 -> 工作进程：响应体分块"""
+    END = 7
+    """主进程 -> 工作进程：响应结束"""
+    EVENT = 8
+    """主进程 -> 工作进程：事件的订阅匹配字段与已编码的事件信令，以换行分隔"""
+    LOGIN_EVENT = 9
+    """主进程 -> 工作进程：登录事件的订阅匹配字段与已编码的事件信令，以换行分隔"""
+    READY = 10
+    """主进程 -> 工作进程：已编码的 READY 信令"""
+    WS_OPEN = 11
+    """工作进程 -> 主进程：WebSocket 连接的 scope"""
+    WS_TEXT = 12
+    """双向：WebSocket 文本消息"""
+    WS_BYTES = 13
+    """双向：WebSocket 二进制消息"""
+    WS_CONTROL = 14
+    """双向：不含数据的 WebSocket ASGI 消息 (accept、close 与 disconnect)"""
+    TOKEN = 15
+    """主进程 -> 工作进程：鉴权令牌，在连接建立时最先发送，避免出现在工作进程的命令行参数中"""
+    CREDIT = 16
+    """双向：接收方已消费的数据字节数，发送方据此恢复发送窗口"""
+
+
+def write_frame(writer: asyncio.StreamWriter, kind: Frame, rid: int = 0, payload: bytes = b""):
+    writer.writelines([_HEADER.pack(len(payload), kind, rid), payload])
+
+
+async def read_frame(reader: asyncio.StreamReader) -> tuple[Frame, int, bytes]:
+    length, kind, rid = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    return Frame(kind), rid, await reader.readexactly(length) if length else b""
+
+
+def write_credit(writer: asyncio.StreamWriter, rid: int, size: int):
+    """归还已消费的数据额度"""
+    if size and not writer.is_closing():
+        write_frame(writer, Frame.CREDIT, rid, _CREDIT.pack(size))
+
+
+class FlowWindow:
+    """单个请求的发送窗口
+
+    可用额度不大于 0 时 `acquire` 等待对方归还额度；单块数据可以超过剩余额度，因此任意大小的数据块都不会死锁。
+    """
+
+    def __init__(self, size: int = WINDOW):
+        self.available = size
+        self._granted = asyncio.Event()
+
+    def grant(self, payload: bytes):
+        (size,) = _CREDIT.unpack(payload)
+        self.available += size
+        if self.available > 0:
+            self._granted.set()
+
+    async def acquire(self, size: int):
+        while self.available <= 0:
+            self._granted.clear()
+            await self._granted.wait()
+        self.available -= size
+
+
+def reuseport_socket(host: str, port: int) -> socket.socket:
+    """创建以 SO_REUSEPORT 绑定的监听 socket，使多个进程可以监听同一端口"""
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    return sock
+
+
+class ReusePortASGIService(UvicornASGIService):
+    """以 SO_REUSEPORT 监听端口的 uvicorn 服务"""
+
+    async def launch(self, manager: Launart) -> None:
+        async with self.stage("preparing"):
+            self.server = WithoutSigHandlerServer(
+                Config(self.middleware, host=self.host, port=self.port, factory=False, **self.options)
+            )
+            if self.patch_logger:
+                self._patch_logger()
+            sock = reuseport_socket(self.host, self.port)
+            serve_task = asyncio.create_task(self.server.serve(sockets=[sock]))
+
+        async with self.stage("blocking"):
+            await any_completed(serve_task, manager.status.wait_for_sigexit())
+
+        async with self.stage("cleanup"):
+            logger.warning("try to shutdown uvicorn server...")
+            self.server.should_exit = True
+            await any_completed(serve_task, asyncio.sleep(5))
+            if not serve_task.done():
+                logger.warning("timeout, force exit uvicorn server...")
+            sock.close()
+
+
+def _dump_headers(headers: list[tuple[bytes, bytes]]) -> list[list[str]]:
+    return [[k.decode("latin-1"), v.decode("latin-1")] for k, v in headers]
+
+
+def _load_headers(headers: list[list[str]]) -> list[tuple[bytes, bytes]]:
+    return [(k.encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+
+
+def dump_ws_message(message: dict[str, Any]) -> tuple[Frame, bytes]:
+    """将 WebSocket 的 ASGI 消息转换为帧；文本与二进制数据不经过编码"""
+    if message["type"] in ("websocket.send", "websocket.receive"):
+        if message.get("bytes") is not None:
+            return Frame.WS_BYTES, bytes(message["bytes"])
+        return Frame.WS_TEXT, message.get("text", "").encode()
+    control = {k: _dump_headers(v) if k == "headers" else v for k, v in message.items()}
+    return Frame.WS_CONTROL, encode_bytes(control)
+
+
+async def write_ws_message(writer: asyncio.StreamWriter, rid: int, message: dict[str, Any], window: FlowWindow):
+    """写入 WebSocket 消息；文本与二进制消息占用发送窗口"""
+    kind, payload = dump_ws_message(message)
+    if kind != Frame.WS_CONTROL:
+        await window.acquire(len(payload))
+    write_frame(writer, kind, rid, payload)
+    await writer.drain()
+
+
+def _load_ws_message(kind: Frame, payload: bytes, incoming: bool = True) -> dict[str, Any]:
+    """`incoming` 为 True 时还原为 `websocket.receive` 消息，否则为 `websocket.send` 消息"""
+    message_type = "websocket.receive" if incoming else "websocket.send"
+    if kind == Frame.WS_TEXT:
+        return {"type": message_type, "text": payload.decode()}
+    if kind == Frame.WS_BYTES:
+        return {"type": message_type, "bytes": payload}
+    message = decode(payload)
+    if "headers" in message:
+        message["headers"] = _load_headers(message["headers"])
+    return message
+
+
+class WorkerHub:
+    """主进程端：启动工作进程，处理其转发的请求并向其广播事件
+
+    Args:
+        server (Server): 主进程的服务端
+        workers (int): 进程总数 (包含主进程)
+        ipc_path (str): 与工作进程通信的 Unix socket 路径
+        max_buffer (int): 单个工作进程的发送缓冲区上限 (字节)，超出时断开该工作进程
+    """
+
+    def __init__(self, server: Server, workers: int, ipc_path: str, max_buffer: int = 64 * 1024 * 1024):
+        self.server = server
+        self.workers = workers
+        self.ipc_path = ipc_path
+        self.max_buffer = max_buffer
+        self.processes: list[asyncio.subprocess.Process] = []
+        self.writers: list[asyncio.StreamWriter] = []
+        self._ipc: asyncio.Server | None = None
+
+    async def start(self):
+        self._ipc = await asyncio.start_unix_server(self._handle_worker, self.ipc_path)
+        options = {
+            k: v
+            for k, v in self.server.uvicorn_options.items()
+            if k not in ("fd", "uds", "workers", "loop", "lifespan") and isinstance(v, (str, int, float, list))
+        }
+        config = encode(
+            {
+                "host": self.server.host,
+                "port": self.server.port,
+                "path": self.server.path,
+                "version": self.server.version,
+                "ipc_path": self.ipc_path,
+                "options": options,
+            }
+        )
+        # 使工作进程与主进程的模块搜索路径一致
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, sys.path))}
+        for index in range(1, self.workers):
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "satori.server.workers", config, str(index), env=env
+            )
+            self.processes.append(process)
+        logger.info(f"Started {len(self.processes)} worker processes")
+
+    async def stop(self):
+        if self._ipc is not None:
+            self._ipc.close()
+        for writer in self.writers:
+            writer.close()
+        for process in self.processes:
+            if process.returncode is None:
+                process.terminate()
+        for process in self.processes:
+            try:
+                await asyncio.wait_for(process.wait(), 5)
+            except asyncio.TimeoutError:
+                process.kill()
+        self.processes.clear()
+
+    def publish(self, sn: int, frame: str, key: EventKey):
+        """向全部工作进程广播事件信令；登录事件会先广播新的 READY 信令
+
+        信令前附带事件的订阅匹配字段，工作进程据此过滤而无需解码事件。
+        """
+        login = key[2] in LOGIN_EVENTS
+        if login:
+            self.broadcast(Frame.READY, 0, self.server.logins.ready_frame.encode())
+        self.broadcast(Frame.LOGIN_EVENT if login else Frame.EVENT, sn, b"\n".join([encode_bytes(key), frame.encode()]))
+
+    def broadcast(self, kind: Frame, rid: int, payload: bytes):
+        for writer in self.writers:
+            if writer.is_closing():
+                continue
+            if writer.transport.get_write_buffer_size() > self.max_buffer:
+                # 工作进程长时间不读取时不再为其缓存事件；断开后该工作进程会退出，其客户端将重连到其他进程
+                logger.error("Worker process is not consuming events, disconnecting it")
+                # close() 会先等待缓冲区发送完毕，此处直接丢弃
+                writer.transport.abort()
+                continue
+            write_frame(writer, kind, rid, payload)
+
+    async def _handle_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        write_frame(writer, Frame.TOKEN, 0, encode_bytes(self.server.token))
+        write_frame(writer, Frame.READY, 0, self.server.logins.ready_frame.encode())
+        self.writers.append(writer)
+        # 队列中的数据量受工作进程的发送窗口限制，因此无需等待队列空出，也不会阻塞其他请求的帧
+        requests: dict[int, tuple[asyncio.Queue[tuple[Frame, bytes]], asyncio.Task, FlowWindow]] = {}
+        try:
+            while True:
+                kind, rid, payload = await read_frame(reader)
+                if kind in (Frame.REQUEST, Frame.WS_OPEN):
+                    inbox: asyncio.Queue[tuple[Frame, bytes]] = asyncio.Queue()
+                    window = FlowWindow()
+                    serve = self._serve if kind == Frame.REQUEST else self._serve_websocket
+                    task = asyncio.create_task(serve(writer, rid, decode(payload), inbox, window))
+                    task.add_done_callback(lambda _, rid=rid: requests.pop(rid, None))
+                    requests[rid] = (inbox, task, window)
+                elif rid not in requests:
+                    continue
+                elif kind == Frame.CREDIT:
+                    requests[rid][2].grant(payload)
+                elif kind == Frame.CANCEL:
+                    requests[rid][1].cancel()
+                else:
+                    requests[rid][0].put_nowait((kind, payload))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.writers.remove(writer)
+            for _, task, _ in requests.values():
+                task.cancel()
+            writer.close()
+
+    async def _serve(
+        self,
+        writer: asyncio.StreamWriter,
+        rid: int,
+        data: dict,
+        body: asyncio.Queue[tuple[Frame, bytes]],
+        window: FlowWindow,
+    ):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": data["http_version"],
+            "method": data["method"],
+            "scheme": data["scheme"],
+            "path": data["path"],
+            "raw_path": data["path"].encode(),
+            "query_string": data["query_string"].encode("latin-1"),
+            "root_path": "",
+            "headers": _load_headers(data["headers"]),
+            "client": tuple(data["client"]) if data["client"] else None,
+            "server": tuple(data["server"]) if data["server"] else None,
+        }
+        finished = False
+        started = False
+
+        async def receive():
+            nonlocal finished
+            if finished:
+                await asyncio.Future()
+            kind, chunk = await body.get()
+            finished = kind != Frame.BODY
+            write_credit(writer, rid, len(chunk))
+            return {"type": "http.request", "body": chunk, "more_body": not finished}
+
+        async def send(message: dict[str, Any]):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+                payload = encode_bytes({"status": message["status"], "headers": _dump_headers(message["headers"])})
+                write_frame(writer, Frame.START, rid, payload)
+            elif message["type"] == "http.response.body":
+                if chunk := message.get("body", b""):
+                    await window.acquire(len(chunk))
+                    write_frame(writer, Frame.CHUNK, rid, bytes(chunk))
+                if not message.get("more_body", False):
+                    write_frame(writer, Frame.END, rid)
+                await writer.drain()
+
+        try:
+            await self.server.asgi_service.middleware(scope, receive, send)
+        except Exception as e:
+            logger.error(f"Failed to handle forwarded request {data['path']}: {e!r}")
+            if not started and not writer.is_closing():
+                write_frame(writer, Frame.START, rid, encode_bytes({"status": 500, "headers": []}))
+                write_frame(writer, Frame.END, rid)
+
+    async def _serve_websocket(
+        self,
+        writer: asyncio.StreamWriter,
+        rid: int,
+        data: dict,
+        inbox: asyncio.Queue[tuple[Frame, bytes]],
+        window: FlowWindow,
+    ):
+        scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "http_version": data["http_version"],
+            "scheme": data["scheme"],
+            "path": data["path"],
+            "raw_path": data["path"].encode(),
+            "query_string": data["query_string"].encode("latin-1"),
+            "root_path": "",
+            "headers": _load_headers(data["headers"]),
+            "client": tuple(data["client"]) if data["client"] else None,
+            "server": tuple(data["server"]) if data["server"] else None,
+            "subprotocols": data["subprotocols"],
+        }
+        connected = False
+        closed = False
+
+        async def receive():
+            nonlocal connected
+            if not connected:
+                connected = True
+                return {"type": "websocket.connect"}
+            kind, payload = await inbox.get()
+            if kind != Frame.WS_CONTROL:
+                write_credit(writer, rid, len(payload))
+            return _load_ws_message(kind, payload)
+
+        async def send(message: dict[str, Any]):
+            nonlocal closed
+            if message["type"] == "websocket.close":
+                closed = True
+            await write_ws_message(writer, rid, message, window)
+
+        try:
+            await self.server.asgi_service.middleware(scope, receive, send)
+        except Exception as e:
+            logger.error(f"Failed to handle forwarded websocket {data['path']}: {e!r}")
+        finally:
+            if not closed and not writer.is_closing():
+                kind, payload = dump_ws_message({"type": "websocket.close", "code": 1011})
+                write_frame(writer, kind, rid, payload)
+
+
+class Worker:
+    """工作进程端：在本进程内处理 WebSocket 连接，并将其余 HTTP 请求转发给主进程
+
+    事件先放入各连接的发送队列，再由各连接的发送任务推送，读取主进程消息的循环不会等待任何客户端。
+    发送队列中积压的事件超过 `max_pending` 条时断开该连接，客户端可以重连并通过 `sequence` 补发事件。
+
+    Args:
+        config (dict[str, Any]): 主进程传入的配置
+        max_pending (int): 单个连接待发送的事件数上限
+    """
+
+    def __init__(self, config: dict[str, Any], max_pending: int = 1000):
+        self.config = config
+        self.max_pending = max_pending
+        self.token: str | None = None
+        self.connections: list[WebsocketConnection] = []
+        self.heartbeats = HeartbeatMonitor()
+        self.ready_frame = ""
+        self.event_cache: deque[tuple[int, EventKey, str]] = deque(maxlen=100)
+        self.pending: dict[int, tuple[asyncio.Queue[tuple[Frame, bytes]], FlowWindow]] = {}
+        """转发中的请求：主进程传回的帧 (数据量受主进程的发送窗口限制) 与本进程的发送窗口"""
+        self.outboxes: dict[WebsocketConnection, asyncio.Queue[str | bytes]] = {}
+        self._ids = itertools.count(1)
+        self.writer: asyncio.StreamWriter
+        self.events_path = f"{config['path']}/{config['version']}/events"
+        self.app = Starlette(routes=[WebSocketRoute(self.events_path, self.websocket_handler)])
+
+    async def __call__(self, scope: dict, receive: Callable[[], Awaitable[dict]], send: Callable[[dict], Awaitable]):
+        if scope["type"] == "http":
+            return await self.forward(scope, receive, send)
+        if scope["type"] == "websocket" and scope["path"] != self.events_path:
+            return await self.forward_websocket(scope, receive, send)
+        return await self.app(scope, receive, send)
+
+    async def connect(self) -> asyncio.StreamReader:
+        reader, self.writer = await asyncio.open_unix_connection(self.config["ipc_path"])
+        while True:
+            kind, _, payload = await read_frame(reader)
+            if kind == Frame.TOKEN:
+                self.token = decode(payload)
+            elif kind == Frame.READY:
+                self.ready_frame = payload.decode()
+                return reader
+
+    async def receive_frames(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                kind, rid, payload = await read_frame(reader)
+                if kind in (Frame.START, Frame.CHUNK, Frame.END, Frame.WS_TEXT, Frame.WS_BYTES, Frame.WS_CONTROL):
+                    if pending := self.pending.get(rid):
+                        pending[0].put_nowait((kind, payload))
+                elif kind == Frame.CREDIT:
+                    if pending := self.pending.get(rid):
+                        pending[1].grant(payload)
+                elif kind == Frame.READY:
+                    self.ready_frame = payload.decode()
+                elif kind in (Frame.EVENT, Frame.LOGIN_EVENT):
+                    meta, _, data = payload.partition(b"\n")
+                    key: EventKey = tuple(decode(meta))  # type: ignore
+                    frame = data.decode()
+                    self.event_cache.append((rid, key, frame))
+                    self.dispatch(frame, key)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            logger.warning("Lost connection to the main process")
+
+    def dispatch(self, frame: str, key: EventKey):
+        """将事件放入各连接的发送队列"""
+        binary: bytes | None = None
+        for connection in self.connections:
+            if not connection.alive or not accepts(connection.subscription, key):
+                continue
+            if (outbox := self.outboxes.get(connection)) is None:
+                continue
+            data: str | bytes = frame
+            if connection.binary:
+                # 工作进程收到的是 JSON 信令，仅在有 msgpack 连接时转换一次
+                if binary is None:
+                    binary = encode_msgpack(decode(frame))
+                data = binary
+            try:
+                outbox.put_nowait(data)
+            except asyncio.QueueFull:
+                logger.warning(f"Connection {id(connection):x} is not consuming events, closing connection.")
+                del self.outboxes[connection]
+                asyncio.create_task(connection.close())
+
+    @staticmethod
+    async def _send_outbox(connection: WebsocketConnection, outbox: asyncio.Queue[str | bytes]):
+        while True:
+            data = await outbox.get()
+            try:
+                await connection.send_raw(data)
+            except (WebSocketDisconnect, RuntimeError):
+                return
+            except Exception as e:
+                logger.error(e)
+
+    async def forward(self, scope: dict, receive: Callable[[], Awaitable[dict]], send: Callable[[dict], Awaitable]):
+        rid = next(self._ids) & 0xFFFFFFFF
+        queue: asyncio.Queue[tuple[Frame, bytes]] = asyncio.Queue()
+        window = FlowWindow()
+        self.pending[rid] = (queue, window)
+        data = {
+            "http_version": scope["http_version"],
+            "method": scope["method"],
+            "scheme": scope["scheme"],
+            "path": scope["path"],
+            "query_string": scope["query_string"].decode("latin-1"),
+            "headers": _dump_headers(scope["headers"]),
+            "client": scope.get("client"),
+            "server": scope.get("server"),
+        }
+        write_frame(self.writer, Frame.REQUEST, rid, encode_bytes(data))
+
+        async def pump():
+            # 请求体接收完毕后继续等待，以便在客户端提前断开时通知主进程
+            while (message := await receive())["type"] != "http.disconnect":
+                more = message.get("more_body", False)
+                chunk = message.get("body", b"")
+                await window.acquire(len(chunk))
+                write_frame(self.writer, Frame.BODY if more else Frame.BODY_END, rid, chunk)
+                await self.writer.drain()
+            write_frame(self.writer, Frame.CANCEL, rid)
+
+        pump_task = asyncio.create_task(pump())
+        try:
+            while True:
+                kind, payload = await queue.get()
+                if kind == Frame.START:
+                    start = decode(payload)
+                    await send(
+                        {
+                            "type": "http.response.start",
+                            "status": start["status"],
+                            "headers": _load_headers(start["headers"]),
+                        }
+                    )
+                elif kind == Frame.CHUNK:
+                    await send({"type": "http.response.body", "body": payload, "more_body": True})
+                    write_credit(self.writer, rid, len(payload))
+                else:
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+                    break
+        finally:
+            pump_task.cancel()
+            self.pending.pop(rid, None)
+
+    async def forward_websocket(
+        self, scope: dict, receive: Callable[[], Awaitable[dict]], send: Callable[[dict], Awaitable]
+    ):
+        rid = next(self._ids) & 0xFFFFFFFF
+        queue: asyncio.Queue[tuple[Frame, bytes]] = asyncio.Queue()
+        window = FlowWindow()
+        self.pending[rid] = (queue, window)
+        # 握手消息由主进程端自行构造
+        await receive()
+        data = {
+            "http_version": scope.get("http_version", "1.1"),
+            "scheme": scope.get("scheme", "ws"),
+            "path": scope["path"],
+            "query_string": scope["query_string"].decode("latin-1"),
+            "headers": _dump_headers(scope["headers"]),
+            "client": scope.get("client"),
+            "server": scope.get("server"),
+            "subprotocols": scope.get("subprotocols", []),
+        }
+        write_frame(self.writer, Frame.WS_OPEN, rid, encode_bytes(data))
+
+        async def pump():
+            while True:
+                message = await receive()
+                await write_ws_message(self.writer, rid, message, window)
+                if message["type"] == "websocket.disconnect":
+                    queue.put_nowait((Frame.END, b""))
+                    break
+
+        pump_task = asyncio.create_task(pump())
+        try:
+            while True:
+                kind, payload = await queue.get()
+                if kind == Frame.END:
+                    # 客户端已断开
+                    break
+                message = _load_ws_message(kind, payload, incoming=False)
+                await send(message)
+                if kind != Frame.WS_CONTROL:
+                    write_credit(self.writer, rid, len(payload))
+                if message["type"] == "websocket.close":
+                    break
+        finally:
+            pump_task.cancel()
+            self.pending.pop(rid, None)
+
+    async def websocket_handler(self, ws: WebSocket):
+        await ws.accept()
+        connection = WebsocketConnection(ws)
+        identity = decode(await ws.receive_text())
+        if not isinstance(identity, dict) or identity.get("op") != Opcode.IDENTIFY:
+            return await ws.close(code=3000, reason="Unauthorized")
+        body = identity["body"]
+        if body.get("token") != self.token:
+            return await ws.close(code=3000, reason="Unauthorized")
+        try:
+            connection.subscription = Subscription.parse(body.get("filter"))
+        except (TypeError, ValueError) as e:
+            return await ws.close(code=3001, reason=f"Invalid filter: {e}")
+        connection.binary = body.get("encoding") == "msgpack" and MSGPACK_AVAILABLE
+        sequence = body.get("sequence")
+        if sequence is None:
+            sequence = -1
+        await connection.send_raw(encode_msgpack(decode(self.ready_frame)) if connection.binary else self.ready_frame)
+        outbox: asyncio.Queue[str | bytes] = asyncio.Queue(self.max_pending)
+        self.outboxes[connection] = outbox
+        sender = asyncio.create_task(self._send_outbox(connection, outbox))
+        self.connections.append(connection)
+        self.heartbeats.add(connection)
+        try:
+            if sequence > -1:
+                for sn, key, frame in list(self.event_cache):
+                    if sn <= sequence or key[2] in LOGIN_EVENTS or not accepts(connection.subscription, key):
+                        continue
+                    await connection.send_raw(encode_msgpack(decode(frame)) if connection.binary else frame)
+                    self.heartbeats.touch(connection)
+                    await asyncio.sleep(0.1)
+            await connection.receive_loop(self.heartbeats)
+        finally:
+            sender.cancel()
+            self.outboxes.pop(connection, None)
+            await connection.connection_closed()
+            self.heartbeats.discard(connection)
+            self.connections.remove(connection)
+
+
+async def run_worker(config: dict[str, Any], index: int):
+    worker = Worker(config)
+    reader = await worker.connect()
+    server = WithoutSigHandlerServer(
+        Config(worker, host=config["host"], port=config["port"], lifespan="off", **config["options"])
+    )
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, setattr, server, "should_exit", True)
+    sock = reuseport_socket(config["host"], config["port"])
+    ipc_task = asyncio.create_task(worker.receive_frames(reader))
+    heartbeat_task = asyncio.create_task(worker.heartbeats.run())
+    serve_task = asyncio.create_task(server.serve(sockets=[sock]))
+    logger.info(f"Worker {index} started")
+    await any_completed(ipc_task, serve_task)
+    server.should_exit = True
+    await serve_task
+    ipc_task.cancel()
+    heartbeat_task.cancel()
+    sock.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker(decode(sys.argv[1]), int(sys.argv[2])))
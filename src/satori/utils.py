@@ -37,3 +37,29 @@ except ImportError:
         return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
 
     decode = json.loads
+
+
+try:
+    from msgspec.msgpack import Decoder as MsgpackDecoder
+    from msgspec.msgpack import Encoder as MsgpackEncoder
+
+    MSGPACK_AVAILABLE = True
+    msgpack_encoder = MsgpackEncoder()
+    msgpack_decoder = MsgpackDecoder()
+
+    encode_msgpack = msgpack_encoder.encode
+    decode_msgpack = msgpack_decoder.decode
+
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+    def encode_msgpack(obj):
+        raise RuntimeError("msgpack encoding requires msgspec, please install `satori-python[msgspec]`")
+
+    def decode_msgpack(data):
+        raise RuntimeError("msgpack encoding requires msgspec, please install `satori-python[msgspec]`")
+
+
+def decode_frame(data: str | bytes):
+    """解码 WebSocket 信令：文本帧为 JSON，二进制帧为 msgpack"""
+    return decode_msgpack(data) if isinstance(data, bytes) else decode(data)